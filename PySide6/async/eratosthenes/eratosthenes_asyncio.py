@@ -2,63 +2,23 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
-from PySide6.QtCore import (Qt, QObject, Signal, Slot)
-from PySide6.QtGui import (QColor, QFont, QPalette)
-from PySide6.QtWidgets import (QApplication, QGridLayout, QLabel, QMainWindow, QVBoxLayout, QWidget)
-
-import PySide6.QtAsyncio as QtAsyncio
+from PySide6.QtCore import QObject
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QApplication
 
 import asyncio
+import os
 import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
 from random import randint
 
+from sieveview import MainWindow
 
-class MainWindow(QMainWindow):
-
-    set_num = Signal(int, QColor)
-
-    def __init__(self, rows, cols):
-        super().__init__()
-
-        self.rows = rows
-        self.cols = cols
-
-        widget_central = QWidget()
-        self.setCentralWidget(widget_central)
-
-        layout_outer = QVBoxLayout(widget_central)
-
-        self.widget_outer_text = QLabel()
-        font = QFont()
-        font.setPointSize(14)
-        self.widget_outer_text.setFont(font)
-        layout_outer.addWidget(self.widget_outer_text, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        widget_inner_grid = QWidget()
-        layout_outer.addWidget(widget_inner_grid, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        self.layout_inner_grid = QGridLayout(widget_inner_grid)
-        k = 1
-        for i in range(self.rows):
-            for j in range(self.cols):
-                box = QLabel(f"{k}")
-                self.layout_inner_grid.addWidget(box, i, j, Qt.AlignmentFlag.AlignCenter)
-                k += 1
-
-        self.set_num.connect(self.set_num_handler)
-
-    @Slot(int, QColor)
-    def set_num_handler(self, i, color):
-        row = int((i - 1) / self.cols)
-        col = (i - 1) - (row * self.cols)
-        widget = self.layout_inner_grid.itemAtPosition(row, col).widget()
-
-        font = QFont()
-        font.setWeight(QFont.Bold)
-        palette = QPalette()
-        palette.setColor(QPalette.WindowText, color)
-        widget.setFont(font)
-        widget.setPalette(palette)
+# Append the parent directory of this file so that Python can find and
+# import from the "shared" sibling directory.
+sys.path.append(os.fspath(Path(__file__).parent.parent))
+from shared.asyncbridge import AsyncioBridge, install_report  # noqa: E402
 
 
 class Eratosthenes(QObject):
@@ -103,7 +63,7 @@ class Eratosthenes(QObject):
         for i in range(2 * base, self.num + 1, base):
             if self.sieve[i - 1]:
                 self.sieve[i - 1] = False
-                self.window.set_num.emit(i, color)
+                self.window.set_num(i, color)
             await asyncio.sleep(self.tick)
         self.coroutines[id] = 0
 
@@ -122,14 +82,27 @@ class Eratosthenes(QObject):
 
 
 if __name__ == "__main__":
-    rows = 40
-    cols = 40
+    parser = ArgumentParser(description="Async Eratosthenes",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--cols", type=int, default=40)
+    parser.add_argument("--tick", type=float, default=0.1, help="Tick in seconds")
+    parser.add_argument("--image", action="store_true", default=None,
+                        help="Paint the sieve as an image (default for large sieves)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print the scheduling latency histograms on exit")
+    options = parser.parse_args()
+    rows = options.rows
+    cols = options.cols
     num = rows * cols
 
     app = QApplication(sys.argv)
-    main_window = MainWindow(rows, cols)
-    eratosthenes = Eratosthenes(num, main_window)
+    main_window = MainWindow(rows, cols, options.image)
+    eratosthenes = Eratosthenes(num, main_window, options.tick)
 
     main_window.show()
 
-    QtAsyncio.run(eratosthenes.start(), handle_sigint=True)
+    bridge = AsyncioBridge()
+    if options.stats:
+        install_report(bridge)
+    bridge.run(eratosthenes.start(), handle_sigint=True)
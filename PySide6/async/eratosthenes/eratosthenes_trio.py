@@ -2,64 +2,24 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
-from PySide6.QtCore import (Qt, QEvent, QObject, QTimer, Signal, Slot)
-from PySide6.QtGui import (QColor, QFont, QPalette)
-from PySide6.QtWidgets import (QApplication, QGridLayout, QLabel, QMainWindow, QVBoxLayout, QWidget)
+from PySide6.QtCore import (QObject, QTimer)
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QApplication
 
-import outcome
+import os
 import signal
 import sys
-import traceback
 import trio
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
 from random import randint
 
+from sieveview import MainWindow
 
-class MainWindow(QMainWindow):
-
-    set_num = Signal(int, QColor)
-
-    def __init__(self, rows, cols):
-        super().__init__()
-
-        self.rows = rows
-        self.cols = cols
-
-        widget_central = QWidget()
-        self.setCentralWidget(widget_central)
-
-        layout_outer = QVBoxLayout(widget_central)
-
-        self.widget_outer_text = QLabel()
-        font = QFont()
-        font.setPointSize(14)
-        self.widget_outer_text.setFont(font)
-        layout_outer.addWidget(self.widget_outer_text, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        widget_inner_grid = QWidget()
-        layout_outer.addWidget(widget_inner_grid, alignment=Qt.AlignmentFlag.AlignCenter)
-
-        self.layout_inner_grid = QGridLayout(widget_inner_grid)
-        k = 1
-        for i in range(self.rows):
-            for j in range(self.cols):
-                box = QLabel(f"{k}")
-                self.layout_inner_grid.addWidget(box, i, j, Qt.AlignmentFlag.AlignCenter)
-                k += 1
-
-        self.set_num.connect(self.set_num_handler)
-
-    @Slot(int, QColor)
-    def set_num_handler(self, i, color):
-        row = int((i - 1) / self.cols)
-        col = (i - 1) - (row * self.cols)
-        widget = self.layout_inner_grid.itemAtPosition(row, col).widget()
-
-        font = QFont()
-        font.setWeight(QFont.Bold)
-        palette = QPalette()
-        palette.setColor(QPalette.WindowText, color)
-        widget.setFont(font)
-        widget.setPalette(palette)
+# Append the parent directory of this file so that Python can find and
+# import from the "shared" sibling directory.
+sys.path.append(os.fspath(Path(__file__).parent.parent))
+from shared.asyncbridge import TrioBridge, install_report  # noqa: E402
 
 
 class Eratosthenes(QObject):
@@ -101,7 +61,7 @@ class Eratosthenes(QObject):
         for i in range(2 * base, self.num + 1, base):
             if self.sieve[i - 1]:
                 self.sieve[i - 1] = False
-                self.window.set_num.emit(i, color)
+                self.window.set_num(i, color)
             await trio.sleep(self.tick)
         self.coroutines[id] = 0
 
@@ -119,72 +79,27 @@ class Eratosthenes(QObject):
         )
 
 
-class AsyncHelper(QObject):
-
-    class ReenterQtObject(QObject):
-        """ This is a QObject to which an event will be posted, allowing
-            Trio to resume when the event is handled. event.fn() is the
-            next entry point of the Trio event loop. """
-        def event(self, event):
-            if event.type() == QEvent.Type.User + 1:
-                event.fn()
-                return True
-            return False
-
-    class ReenterQtEvent(QEvent):
-        """ This is the QEvent that will be handled by the ReenterQtObject.
-            self.fn is the next entry point of the Trio event loop. """
-        def __init__(self, fn):
-            super().__init__(QEvent.Type(QEvent.Type.User + 1))
-            self.fn = fn
-
-    def __init__(self, worker, entry):
-        super().__init__()
-        self.reenter_qt = self.ReenterQtObject()
-        self.entry = entry
-
-        self.worker = worker
-        if hasattr(self.worker, "start_signal") and isinstance(self.worker.start_signal, Signal):
-            self.worker.start_signal.connect(self.launch_guest_run)
-
-    @Slot()
-    def launch_guest_run(self):
-        """ To use Trio and Qt together, one must run the Trio event
-            loop as a "guest" inside the Qt "host" event loop. """
-        if not self.entry:
-            raise Exception("No entry point for the Trio guest run was set.")
-        trio.lowlevel.start_guest_run(
-            self.entry,
-            run_sync_soon_threadsafe=self.next_guest_run_schedule,
-            done_callback=self.trio_done_callback,
-        )
-
-    def next_guest_run_schedule(self, fn):
-        """ This function serves to re-schedule the guest (Trio) event
-            loop inside the host (Qt) event loop. It is called by Trio
-            at the end of an event loop run in order to relinquish back
-            to Qt's event loop. By posting an event on the Qt event loop
-            that contains Trio's next entry point, it ensures that Trio's
-            event loop will be scheduled again by Qt. """
-        QApplication.postEvent(self.reenter_qt, self.ReenterQtEvent(fn))
-
-    def trio_done_callback(self, outcome_):
-        """ This function is called by Trio when its event loop has
-            finished. """
-        if isinstance(outcome_, outcome.Error):
-            error = outcome_.error
-            traceback.print_exception(type(error), error, error.__traceback__)
-
-
 if __name__ == "__main__":
-    rows = 40
-    cols = 40
+    parser = ArgumentParser(description="Async Eratosthenes",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--cols", type=int, default=40)
+    parser.add_argument("--tick", type=float, default=0.1, help="Tick in seconds")
+    parser.add_argument("--image", action="store_true", default=None,
+                        help="Paint the sieve as an image (default for large sieves)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print the scheduling latency histograms on exit")
+    options = parser.parse_args()
+    rows = options.rows
+    cols = options.cols
     num = rows * cols
 
     app = QApplication(sys.argv)
-    main_window = MainWindow(rows, cols)
-    eratosthenes = Eratosthenes(num, main_window)
-    async_helper = AsyncHelper(eratosthenes, eratosthenes.start)
+    main_window = MainWindow(rows, cols, options.image)
+    eratosthenes = Eratosthenes(num, main_window, options.tick)
+    async_helper = TrioBridge(eratosthenes, eratosthenes.start)
+    if options.stats:
+        install_report(async_helper)
 
     # This establishes the entry point for the Trio guest run. It varies
     # depending on how and when its event loop is to be triggered, e.g.,
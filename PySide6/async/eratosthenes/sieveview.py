@@ -0,0 +1,118 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+from PySide6.QtCore import (Qt, QSize, QTimer, Slot)
+from PySide6.QtGui import (QFont, QImage, QPainter, QPalette)
+from PySide6.QtWidgets import (QGridLayout, QLabel, QMainWindow, QSizePolicy, QVBoxLayout,
+                               QWidget)
+
+
+# Above this count of numbers, the sieve is painted as an image instead of
+# one label per number
+LABEL_LIMIT = 4096
+
+
+class SieveImage(QWidget):
+    """ Paints the numbers of the sieve as the pixels of an image, one
+        pixel per number, scaled to the widget. """
+
+    def __init__(self, rows, cols, parent=None):
+        super().__init__(parent)
+        self.cols = cols
+        self.image = QImage(cols, rows, QImage.Format.Format_RGB32)
+        self.image.fill(Qt.GlobalColor.white)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+    def sizeHint(self):
+        return QSize(800, 800 * self.image.height() // self.image.width())
+
+    def set_nums(self, marks):
+        # One 32-bit pixel per number, the rows of the image are contiguous
+        pixels = self.image.bits().cast('I')
+        for i, color in marks:
+            pixels[i - 1] = color.rgb()
+        self.update()
+
+    def paintEvent(self, event):
+        with QPainter(self) as painter:
+            painter.drawImage(self.rect(), self.image)
+
+
+class MainWindow(QMainWindow):
+
+    def __init__(self, rows, cols, image_view=None):
+        super().__init__()
+
+        self.rows = rows
+        self.cols = cols
+        if image_view is None:
+            image_view = rows * cols > LABEL_LIMIT
+        self.image_view = image_view
+
+        widget_central = QWidget()
+        self.setCentralWidget(widget_central)
+
+        layout_outer = QVBoxLayout(widget_central)
+
+        self.widget_outer_text = QLabel()
+        font = QFont()
+        font.setPointSize(14)
+        self.widget_outer_text.setFont(font)
+        layout_outer.addWidget(self.widget_outer_text, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        if self.image_view:
+            self.widget_inner_grid = SieveImage(rows, cols)
+            layout_outer.addWidget(self.widget_inner_grid)
+        else:
+            self.widget_inner_grid = QWidget()
+            layout_outer.addWidget(self.widget_inner_grid, alignment=Qt.AlignmentFlag.AlignCenter)
+
+            self.layout_inner_grid = QGridLayout(self.widget_inner_grid)
+            k = 1
+            for i in range(self.rows):
+                for j in range(self.cols):
+                    box = QLabel(f"{k}")
+                    self.layout_inner_grid.addWidget(box, i, j, Qt.AlignmentFlag.AlignCenter)
+                    k += 1
+
+        # The marks queued during one iteration of the event loop are
+        # applied together, with a font and palettes created once
+        self.bold_font = QFont()
+        self.bold_font.setWeight(QFont.Weight.Bold)
+        self.palettes = {}
+        self.pending = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(0)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def set_num(self, i, color):
+        """ Queue the marking of number i. The coroutines run in the GUI
+            thread, so this is a plain call rather than a signal emission
+            per number. """
+        self.pending.append((i, color))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    @Slot()
+    def flush(self):
+        pending, self.pending = self.pending, []
+        if self.image_view:
+            self.widget_inner_grid.set_nums(pending)
+            return
+
+        self.widget_inner_grid.setUpdatesEnabled(False)
+        for i, color in pending:
+            row = int((i - 1) / self.cols)
+            col = (i - 1) - (row * self.cols)
+            widget = self.layout_inner_grid.itemAtPosition(row, col).widget()
+
+            palette = self.palettes.get(color.rgb())
+            if palette is None:
+                palette = QPalette()
+                palette.setColor(QPalette.ColorRole.WindowText, color)
+                self.palettes[color.rgb()] = palette
+            widget.setFont(self.bold_font)
+            widget.setPalette(palette)
+        self.widget_inner_grid.setUpdatesEnabled(True)
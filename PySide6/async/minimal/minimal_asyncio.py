@@ -5,10 +5,16 @@ from __future__ import annotations
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (QApplication, QLabel, QMainWindow, QPushButton, QVBoxLayout, QWidget)
 
-import PySide6.QtAsyncio as QtAsyncio
-
 import asyncio
+import os
 import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+# Append the parent directory of this file so that Python can find and
+# import from the "shared" sibling directory.
+sys.path.append(os.fspath(Path(__file__).parent.parent))
+from shared.asyncbridge import AsyncioBridge, install_report  # noqa: E402
 
 
 class MainWindow(QMainWindow):
@@ -34,8 +40,16 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="Async Minimal")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print the scheduling latency histograms on exit")
+    options = parser.parse_args()
+
     app = QApplication(sys.argv)
     main_window = MainWindow()
     main_window.show()
 
-    QtAsyncio.run(handle_sigint=True)
+    bridge = AsyncioBridge()
+    if options.stats:
+        install_report(bridge)
+    bridge.run(handle_sigint=True)
@@ -0,0 +1,294 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+""" Glue running asyncio or Trio coroutines on top of the Qt event loop,
+    shared by the async examples, with histograms of how long the callbacks
+    wait in the Qt event queue and how long they run. """
+
+import asyncio
+import threading
+import time
+import traceback
+
+from PySide6.QtCore import (QCoreApplication, QEvent, QObject, QTimer, Signal, Slot)
+from PySide6.QtAsyncio import QAsyncioEventLoop, QAsyncioEventLoopPolicy
+
+
+class LatencyHistogram:
+    """ Histogram of durations with power of two buckets in microseconds. """
+
+    BUCKETS = 28  # Up to 2**27 us, about 134 seconds
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, percent):
+        """ Return the upper bound in seconds of the bucket holding the
+            given percentile. """
+        threshold = self.count * percent / 100
+        cumulated = 0
+        for bucket, count in enumerate(self.counts):
+            cumulated += count
+            if count and cumulated >= threshold:
+                return (1 << bucket) / 1e6
+        return 0.0
+
+    def summary(self):
+        if not self.count:
+            return f"{self.name}: no sample"
+        return (f"{self.name}: {self.count} samples, "
+                f"mean {1000 * self.total / self.count:.3f} ms, "
+                f"p50 < {1000 * self.percentile(50):.3f} ms, "
+                f"p99 < {1000 * self.percentile(99):.3f} ms, "
+                f"max {1000 * self.maximum:.3f} ms")
+
+    def format(self, width=40):
+        lines = [self.summary()]
+        peak = max(self.counts)
+        for bucket, count in enumerate(self.counts):
+            if count:
+                bar = "#" * max(1, count * width // peak)
+                lines.append(f"  < {(1 << bucket) / 1000:10.3f} ms {count:8d} {bar}")
+        return "\n".join(lines)
+
+
+class BridgeStats:
+    """ Scheduling latency (time between the moment a callback is due and
+        the moment it runs), run time of the callbacks and number of
+        callbacks handled per Qt event. """
+
+    def __init__(self):
+        self.scheduling = LatencyHistogram("Scheduling latency")
+        self.run = LatencyHistogram("Callback run time")
+        self.batches = 0
+        self.batched = 0
+        self.max_batch = 0
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched += size
+        self.max_batch = max(self.max_batch, size)
+
+    def report(self):
+        text = [self.scheduling.format(), self.run.format()]
+        if self.batches:
+            text.append(f"Batches: {self.batches}, mean size "
+                        f"{self.batched / self.batches:.1f}, max size {self.max_batch}")
+        return "\n".join(text)
+
+
+class TrioBridge(QObject):
+    """ Runs the Trio event loop as a "guest" inside the Qt "host" event
+        loop (see trio.lowlevel.start_guest_run()). Trio is imported on
+        demand, so that the asyncio examples do not depend on it.
+
+        Trio hands the next entry points of its event loop to
+        next_guest_run_schedule(), possibly from another thread. They are
+        queued and a single event is posted to Qt for all the entry points
+        queued until it is handled. """
+
+    REENTER_EVENT = QEvent.Type(QEvent.Type.User + 1)
+
+    class ReenterQtObject(QObject):
+        """ This is a QObject to which an event will be posted, allowing
+            Trio to resume when the event is handled. """
+        def __init__(self, bridge):
+            super().__init__()
+            self.bridge = bridge
+
+        def event(self, event):
+            if event.type() == TrioBridge.REENTER_EVENT:
+                self.bridge.run_batch()
+                return True
+            return False
+
+    def __init__(self, worker, entry):
+        super().__init__()
+        self.reenter_qt = self.ReenterQtObject(self)
+        self.entry = entry
+        self.stats = BridgeStats()
+        self._lock = threading.Lock()
+        self._queue = []
+        self._posted = False
+
+        self.worker = worker
+        if hasattr(self.worker, "start_signal") and isinstance(self.worker.start_signal, Signal):
+            self.worker.start_signal.connect(self.launch_guest_run)
+
+    @Slot()
+    def launch_guest_run(self):
+        """ To use Trio and Qt together, one must run the Trio event
+            loop as a "guest" inside the Qt "host" event loop. """
+        import trio
+
+        if not self.entry:
+            raise Exception("No entry point for the Trio guest run was set.")
+        trio.lowlevel.start_guest_run(
+            self.entry,
+            run_sync_soon_threadsafe=self.next_guest_run_schedule,
+            done_callback=self.trio_done_callback,
+        )
+
+    def next_guest_run_schedule(self, fn):
+        """ Called by Trio to relinquish back to Qt's event loop, fn being
+            the next entry point of the Trio event loop. """
+        with self._lock:
+            self._queue.append((fn, time.perf_counter()))
+            if self._posted:
+                return
+            self._posted = True
+        QCoreApplication.postEvent(self.reenter_qt, QEvent(self.REENTER_EVENT))
+
+    def run_batch(self):
+        with self._lock:
+            batch = self._queue
+            self._queue = []
+            self._posted = False
+        self.stats.record_batch(len(batch))
+        for fn, posted in batch:
+            start = time.perf_counter()
+            self.stats.scheduling.record(start - posted)
+            fn()
+            self.stats.run.record(time.perf_counter() - start)
+
+    def trio_done_callback(self, outcome_):
+        """ This function is called by Trio when its event loop has
+            finished. """
+        import outcome
+
+        if isinstance(outcome_, outcome.Error):
+            error = outcome_.error
+            traceback.print_exception(type(error), error, error.__traceback__)
+
+
+class InstrumentedEventLoop(QAsyncioEventLoop):
+    """ QtAsyncio event loop measuring its callbacks, through the public
+        methods of QAsyncioEventLoop only.
+
+        The callbacks scheduled with call_soon() are queued and run by a
+        single zero timer for all the callbacks queued until it fires,
+        instead of one timer each. The callbacks queued while the batch
+        runs are left for the next batch, like asyncio's ready queue. No
+        callback is scheduled any more once the application is about to
+        quit, as the Qt event loop may be gone when the timer fires. """
+
+    def __init__(self, application, quit_qapp=True, stats=None):
+        super().__init__(application, quit_qapp=quit_qapp)
+        self.stats = stats if stats is not None else BridgeStats()
+        self._ready = []
+        self._ready_scheduled = False
+        self._about_to_quit = False
+        application.aboutToQuit.connect(self._application_about_to_quit)
+
+    @Slot()
+    def _application_about_to_quit(self):
+        self._about_to_quit = True
+
+    def call_soon(self, callback, *args, context=None):
+        handle = asyncio.Handle(callback, args, self, context)
+        self._ready.append((handle, time.perf_counter()))
+        if not (self._ready_scheduled or self.is_closed() or self._about_to_quit):
+            self._ready_scheduled = True
+            QTimer.singleShot(0, self._run_ready)
+        return handle
+
+    @Slot()
+    def _run_ready(self):
+        batch = self._ready
+        self._ready = []
+        self._ready_scheduled = False
+        self.stats.record_batch(len(batch))
+        for handle, queued in batch:
+            if handle.cancelled():
+                continue
+            start = time.perf_counter()
+            self.stats.scheduling.record(start - queued)
+            handle._run()
+            self.stats.run.record(time.perf_counter() - start)
+
+    def _measured(self, delay, callback):
+        """ Wrap a callback due in delay seconds to measure its latency
+            from the time it is due and its run time. """
+        due = time.perf_counter() + max(delay, 0)
+        stats = self.stats
+
+        def measured(*args):
+            start = time.perf_counter()
+            stats.scheduling.record(max(start - due, 0))
+            callback(*args)
+            stats.run.record(time.perf_counter() - start)
+
+        return measured
+
+    # Timers and thread-safe callbacks keep their own Qt timer
+
+    def call_soon_threadsafe(self, callback, *args, context=None):
+        return super().call_soon_threadsafe(self._measured(0, callback), *args,
+                                            context=context)
+
+    def call_later(self, delay, callback, *args, context=None):
+        return super().call_later(delay, self._measured(delay, callback), *args,
+                                  context=context)
+
+    def call_at(self, when, callback, *args, context=None):
+        return super().call_at(when, self._measured(when - self.time(), callback), *args,
+                               context=context)
+
+
+class InstrumentedEventLoopPolicy(QAsyncioEventLoopPolicy):
+    """ QtAsyncio event loop policy creating instrumented event loops. """
+
+    def __init__(self, stats, quit_qapp=True, handle_sigint=False):
+        # Creates the QCoreApplication if there is none yet
+        super().__init__(quit_qapp=quit_qapp, handle_sigint=handle_sigint)
+        self._stats = stats
+        self._quit_application = quit_qapp
+        self._loop = None
+
+    def get_event_loop(self):
+        if self._loop is None:
+            self._loop = self.new_event_loop()
+        return self._loop
+
+    def set_event_loop(self, loop):
+        self._loop = loop
+
+    def new_event_loop(self):
+        return InstrumentedEventLoop(QCoreApplication.instance(),
+                                     quit_qapp=self._quit_application, stats=self._stats)
+
+
+class AsyncioBridge:
+    """ Runs asyncio coroutines on the QtAsyncio event loop, like
+        QtAsyncio.run() with keep_running, with an instrumented event loop.
+        Only the public QtAsyncio API is used, tested with PySide6 6.9. """
+
+    def __init__(self):
+        self.stats = BridgeStats()
+
+    def run(self, coro=None, handle_sigint=False):
+        default_policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(
+            InstrumentedEventLoopPolicy(self.stats, handle_sigint=handle_sigint))
+        if coro:
+            asyncio.ensure_future(coro)
+        asyncio.get_event_loop().run_forever()
+        asyncio.set_event_loop_policy(default_policy)
+
+
+def install_report(bridge, application=None):
+    """ Print the statistics of the bridge when the application quits. """
+    application = application or QCoreApplication.instance()
+    application.aboutToQuit.connect(lambda: print(bridge.stats.report()))
@@ -4,28 +4,38 @@ from __future__ import annotations
 
 """PySide6 port of the charts/audio example from Qt v5.x"""
 
+from argparse import ArgumentParser, RawTextHelpFormatter
 import sys
+import time
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
-from PySide6.QtCore import QPointF, Slot
+from PySide6.QtCore import QTimer, Slot
 from PySide6.QtMultimedia import QAudioFormat, QAudioSource, QMediaDevices
 from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox
 
+from scopebuffer import ScopeBuffer
+from syntheticsource import SyntheticAudioSource
 
-SAMPLE_COUNT = 2000
 
+# Duration of the signal shown by the chart
+WINDOW_DURATION = 1000  # ms
 
-RESOLUTION = 4
+
+# Maximum rate of the chart updates
+MAX_FPS = 30
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, device):
+    def __init__(self, audio_format, device=None, speed=1.0):
         super().__init__()
 
+        sample_count = audio_format.sampleRate() * WINDOW_DURATION // 1000
+        self._buffer = ScopeBuffer(audio_format, sample_count)
+
         self._series = QLineSeries()
         self._chart = QChart()
         self._chart.addSeries(self._series)
         self._axis_x = QValueAxis()
-        self._axis_x.setRange(0, SAMPLE_COUNT)
+        self._axis_x.setRange(0, sample_count)
         self._axis_x.setLabelFormat("%g")
         self._axis_x.setTitleText("Samples")
         self._axis_y = QValueAxis()
@@ -34,23 +44,32 @@ class MainWindow(QMainWindow):
         self._chart.setAxisX(self._axis_x, self._series)
         self._chart.setAxisY(self._axis_y, self._series)
         self._chart.legend().hide()
-        name = device.description()
-        self._chart.setTitle(f"Data from the microphone ({name})")
-
-        format_audio = QAudioFormat()
-        format_audio.setSampleRate(8000)
-        format_audio.setChannelCount(1)
-        format_audio.setSampleFormat(QAudioFormat.UInt8)
 
-        self._audio_input = QAudioSource(device, format_audio, self)
+        if device is not None:
+            name = device.description()
+            self._chart.setTitle(f"Data from the microphone ({name})")
+            self._audio_input = QAudioSource(device, audio_format, self)
+        else:
+            self._chart.setTitle(f"Synthetic data ({audio_format.sampleRate()} Hz, "
+                                 f"{audio_format.channelCount()} channels)")
+            self._audio_input = SyntheticAudioSource(audio_format, speed=speed, parent=self)
         self._io_device = self._audio_input.start()
         self._io_device.readyRead.connect(self._readyRead)
 
         self._chart_view = QChartView(self._chart)
         self.setCentralWidget(self._chart_view)
 
-        self._buffer = [QPointF(x, 0) for x in range(SAMPLE_COUNT)]
-        self._series.append(self._buffer)
+        # The series is updated at most MAX_FPS times per second, whatever
+        # the number of readyRead signals
+        self._dirty = False
+        self._update_timer = QTimer(self)
+        self._update_timer.setInterval(1000 // MAX_FPS)
+        self._update_timer.timeout.connect(self._update_series)
+        self._update_timer.start()
+
+        self._read_time = 0
+        self._update_time = 0
+        self._update_count = 0
 
     def closeEvent(self, event):
         if self._audio_input is not None:
@@ -59,30 +78,80 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def _readyRead(self):
-        data = self._io_device.readAll()
-        available_samples = data.size() // RESOLUTION
-        start = 0
-        if (available_samples < SAMPLE_COUNT):
-            start = SAMPLE_COUNT - available_samples
-            for s in range(start):
-                self._buffer[s].setY(self._buffer[s + available_samples].y())
-
-        data_index = 0
-        for s in range(start, SAMPLE_COUNT):
-            value = (ord(data[data_index]) - 128) / 128
-            self._buffer[s].setY(value)
-            data_index = data_index + RESOLUTION
-        self._series.replace(self._buffer)
+        start = time.perf_counter()
+        self._buffer.write(self._io_device.readAll())
+        self._read_time += time.perf_counter() - start
+        self._dirty = True
+
+    @Slot()
+    def _update_series(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        start = time.perf_counter()
+        columns = int(self._chart.plotArea().width())
+        x, y = self._buffer.envelope(columns)
+        self._series.replaceNp(x, y)
+        self._update_time += time.perf_counter() - start
+        self._update_count += 1
+
+    def start_report(self, interval=1000):
+        """Periodically print the throughput (used by the stress mode)."""
+        self._last_frames = self._buffer.frames_written
+        self._report_timer = QTimer(self)
+        self._report_timer.setInterval(interval)
+        self._report_timer.timeout.connect(self._report)
+        self._report_timer.start()
+        self._report_elapsed = time.perf_counter()
+
+    @Slot()
+    def _report(self):
+        now = time.perf_counter()
+        elapsed = now - self._report_elapsed
+        frames = self._buffer.frames_written - self._last_frames
+        updates = max(self._update_count, 1)
+        print(f"{frames / elapsed:10.0f} frames/s, {self._update_count / elapsed:5.1f} fps, "
+              f"decode: {1000 * self._read_time / elapsed:6.2f} ms/s, "
+              f"series update: {1000 * self._update_time / updates:6.2f} ms")
+        self._report_elapsed = now
+        self._last_frames = self._buffer.frames_written
+        self._read_time = 0
+        self._update_time = 0
+        self._update_count = 0
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser(description="audio",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument('--sample-rate', '-r', type=int, default=8000,
+                        help='Sample rate of the microphone')
+    parser.add_argument('--channels', '-c', type=int, default=1,
+                        help='Channel count of the microphone')
+    parser.add_argument('--stress', '-s', action='store_true',
+                        help='Feed synthetic 48 kHz stereo PCM instead of the microphone\n'
+                             'and print the throughput')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Speed of the synthetic source relative to real time')
+    options = parser.parse_args()
+
     app = QApplication(sys.argv)
 
-    input_devices = QMediaDevices.audioInputs()
-    if not input_devices:
-        QMessageBox.warning(None, "audio", "There is no audio input device available.")
-        sys.exit(-1)
-    main_win = MainWindow(input_devices[0])
+    format_audio = QAudioFormat()
+    if options.stress:
+        format_audio.setSampleRate(48000)
+        format_audio.setChannelCount(2)
+        format_audio.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+        main_win = MainWindow(format_audio, speed=options.speed)
+        main_win.start_report()
+    else:
+        input_devices = QMediaDevices.audioInputs()
+        if not input_devices:
+            QMessageBox.warning(None, "audio", "There is no audio input device available.")
+            sys.exit(-1)
+        format_audio.setSampleRate(options.sample_rate)
+        format_audio.setChannelCount(options.channels)
+        format_audio.setSampleFormat(QAudioFormat.SampleFormat.UInt8)
+        main_win = MainWindow(format_audio, input_devices[0])
     main_win.setWindowTitle("audio")
     available_geometry = main_win.screen().availableGeometry()
     size = available_geometry.height() * 3 / 4
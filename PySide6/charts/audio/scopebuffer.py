@@ -0,0 +1,93 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Ring buffer of audio samples for the charts/audio example"""
+
+import numpy
+from PySide6.QtMultimedia import QAudioFormat
+
+
+# dtype, gain and offset converting a sample to a level in [-1, 1]
+SAMPLE_FORMATS = {
+    QAudioFormat.SampleFormat.UInt8: (numpy.uint8, 1 / 128, -1.0),
+    QAudioFormat.SampleFormat.Int16: (numpy.int16, 1 / 32768, 0.0),
+    QAudioFormat.SampleFormat.Int32: (numpy.int32, 1 / 2147483648, 0.0),
+    QAudioFormat.SampleFormat.Float: (numpy.float32, 1.0, 0.0),
+}
+
+
+class ScopeBuffer:
+    """Keeps the levels of the last `capacity` frames of the first channel.
+
+    The PCM data is decoded with numpy.frombuffer() and converted directly
+    into the storage of the ring, without intermediate Python objects."""
+
+    def __init__(self, audio_format, capacity):
+        self._dtype, self._gain, self._offset = SAMPLE_FORMATS[audio_format.sampleFormat()]
+        self._channels = audio_format.channelCount()
+        self._frame_bytes = numpy.dtype(self._dtype).itemsize * self._channels
+        self._pending = b''
+        self._data = numpy.zeros(capacity, dtype=numpy.float32)
+        self._ordered = numpy.empty(capacity, dtype=numpy.float32)
+        self._position = 0
+        self.frames_written = 0
+
+    @property
+    def capacity(self):
+        return self._data.size
+
+    def write(self, data):
+        """Append the frames of a bytes-like PCM chunk (for example the
+           QByteArray returned by QIODevice.readAll())."""
+        if self._pending:
+            data = self._pending + bytes(data)
+        view = memoryview(data)
+        usable = len(view) - len(view) % self._frame_bytes
+        # Keep an incomplete trailing frame for the next chunk
+        self._pending = bytes(view[usable:])
+        if not usable:
+            return
+
+        samples = numpy.frombuffer(view[:usable], dtype=self._dtype)
+        levels = samples[::self._channels]
+        count = levels.size
+        self.frames_written += count
+        capacity = self.capacity
+        if count >= capacity:
+            self._convert(levels[count - capacity:], self._data)
+            self._position = 0
+            return
+
+        end = self._position + count
+        if end <= capacity:
+            self._convert(levels, self._data[self._position:end])
+        else:
+            first = capacity - self._position
+            self._convert(levels[:first], self._data[self._position:])
+            self._convert(levels[first:], self._data[:end - capacity])
+        self._position = end % capacity
+
+    def _convert(self, samples, out):
+        numpy.multiply(samples, self._gain, out=out, casting='unsafe')
+        if self._offset:
+            out += self._offset
+
+    def levels(self):
+        """Return the levels oldest first. The array is reused by the next
+           call."""
+        numpy.concatenate((self._data[self._position:], self._data[:self._position]),
+                          out=self._ordered)
+        return self._ordered
+
+    def envelope(self, columns):
+        """Decimate the levels to the minimum and maximum of `columns` bins,
+           returns the x (frame index) and y arrays of 2 * columns points."""
+        levels = self.levels()
+        columns = max(1, min(columns, levels.size))
+        starts = numpy.linspace(0, levels.size, columns, endpoint=False).astype(numpy.intp)
+        y = numpy.empty(2 * columns, dtype=numpy.float32)
+        y[0::2] = numpy.minimum.reduceat(levels, starts)
+        y[1::2] = numpy.maximum.reduceat(levels, starts)
+        x = numpy.repeat(starts.astype(numpy.float32), 2)
+        return x, y
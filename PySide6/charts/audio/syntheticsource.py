@@ -0,0 +1,69 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Synthetic PCM source used to stress the charts/audio example"""
+
+import math
+
+import numpy
+from PySide6.QtCore import QByteArray, QElapsedTimer, QObject, QTimer, Signal, Slot
+
+from scopebuffer import SAMPLE_FORMATS
+
+
+class SyntheticAudioSource(QObject):
+    """Stands in for the QIODevice returned by QAudioSource.start().
+
+    Generates a tone modulated by a slow sine at the sample rate and in
+    the format of audio_format, `speed` times faster than real time, and
+    signals readyRead every `interval` ms."""
+
+    readyRead = Signal()
+
+    def __init__(self, audio_format, interval=5, speed=1.0, parent=None):
+        super().__init__(parent)
+        self._dtype, gain, offset = SAMPLE_FORMATS[audio_format.sampleFormat()]
+        self._gain = 1 / gain
+        self._offset = offset
+        self._sample_rate = audio_format.sampleRate()
+        self._channels = audio_format.channelCount()
+        self._speed = speed
+        self._frames = 0
+        self._data = bytearray()
+        self._elapsed = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._generate)
+
+    def start(self):
+        """Start generating, returns the device to read from like
+           QAudioSource.start()."""
+        self._elapsed.start()
+        self._timer.start()
+        return self
+
+    def stop(self):
+        self._timer.stop()
+
+    def readAll(self):
+        data = QByteArray(bytes(self._data))
+        self._data.clear()
+        return data
+
+    @Slot()
+    def _generate(self):
+        due = int(self._elapsed.elapsed() * self._sample_rate * self._speed / 1000)
+        count = due - self._frames
+        if count <= 0:
+            return
+        t = numpy.arange(self._frames, due) / self._sample_rate
+        self._frames = due
+        level = 0.8 * numpy.sin(2 * math.pi * 0.5 * t) * numpy.sin(2 * math.pi * 440 * t)
+        samples = (level - self._offset) * self._gain
+        if numpy.issubdtype(self._dtype, numpy.integer):
+            info = numpy.iinfo(self._dtype)
+            samples = numpy.clip(samples, info.min, info.max)
+        frames = numpy.repeat(samples.astype(self._dtype), self._channels)
+        self._data += frames.tobytes()
+        self.readyRead.emit()
@@ -2,15 +2,30 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
+import math
 import random
 
+import numpy
 from PySide6.QtCharts import QChart, QSplineSeries, QValueAxis
-from PySide6.QtCore import Qt, QTimer, Slot
+from PySide6.QtCore import QElapsedTimer, Qt, QTimer, Slot
 from PySide6.QtGui import QPen
 
+from streamingbuffer import StreamingBuffer
+
 
 class Chart(QChart):
-    def __init__(self, parent=None):
+    """Appends a random point every second and scrolls.
+
+    In streaming mode, `sample_rate` points per second are appended by
+    batches every `interval` ms (or less often when the ticks are late).
+    The last `window` seconds are kept at full resolution and `retention`
+    seconds of older points decimated to their minimum and maximum. The
+    mouse wheel scrolls back through them. The series is replaced once per
+    tick by the points in the axis range, decimated to the width of the
+    plot area."""
+
+    def __init__(self, parent=None, streaming=False, sample_rate=1000, interval=40,
+                 window=10, retention=600):
         super().__init__(QChart.ChartTypeCartesian, parent, Qt.WindowFlags(0))
         self._timer = QTimer()
         self._series = QSplineSeries(self)
@@ -21,8 +36,23 @@ class Chart(QChart):
         self._x = 5
         self._y = 1
 
+        self._streaming = streaming
+        self._sample_rate = sample_rate
+        self._window = window
+        # Seconds between the newest point and the right of the axis range
+        self._offset = 0.0
+        self._buffer = None
+        if streaming:
+            # A bucket of 64 points is retired as 2 points
+            self._buffer = StreamingBuffer(window * sample_rate,
+                                           retention * sample_rate // 32)
+            self._x = 0
+            self._sample_count = 0
+            self._clock = QElapsedTimer()
+            self._clock.start()
+
         self._timer.timeout.connect(self.handleTimeout)
-        self._timer.setInterval(1000)
+        self._timer.setInterval(interval if streaming else 1000)
 
         green = QPen(Qt.red)
         green.setWidth(3)
@@ -41,8 +71,64 @@ class Chart(QChart):
 
         self._timer.start()
 
+    def stop(self):
+        self._timer.stop()
+
+    def point_count(self):
+        """Return the number of points stored in streaming mode."""
+        return len(self._buffer) if self._buffer is not None else self._series.count()
+
+    def scroll_history(self, seconds):
+        """Move the axis range `seconds` back in the history in streaming
+           mode, forward when negative. At 0, the newest points are shown."""
+        if not len(self._buffer):
+            return
+        first, last = self._buffer.x_range()
+        self._offset = min(max(self._offset + seconds, 0.0),
+                           max(last - first - self._window, 0.0))
+        self._update_series()
+
+    def wheelEvent(self, event):
+        if not self._streaming:
+            super().wheelEvent(event)
+            return
+        # One notch of the wheel scrolls by a tenth of the window
+        self.scroll_history(event.delta() / 120 * self._window / 10)
+        event.accept()
+
+    def append_points(self, x, y):
+        """Append arrays of points in streaming mode and update the series
+           with a single replace."""
+        self._buffer.append(x, y)
+        if self._offset:
+            # Keep showing the same points while scrolled back
+            self._offset += x[-1] - x[0] + 1 / self._sample_rate
+            self.scroll_history(0)
+        else:
+            self._update_series()
+
+    def _update_series(self):
+        x_max = self._buffer.x_range()[1] - self._offset
+        x_min = x_max - self._window
+        self._axisX.setRange(x_min, x_max)
+        columns = int(self.plotArea().width())
+        visible_x, visible_y = self._buffer.points(x_min, x_max, columns)
+        self._series.replaceNp(visible_x, visible_y)
+
     @Slot()
     def handleTimeout(self):
+        if self._streaming:
+            # Append the points due since the previous tick, whatever its delay
+            count = self._clock.elapsed() * self._sample_rate // 1000 - self._sample_count
+            if count <= 0:
+                return
+            x = (numpy.arange(self._sample_count, self._sample_count + count)
+                 / self._sample_rate)
+            self._sample_count += count
+            y = 2.5 * numpy.sin(2 * math.pi * x / 5) + numpy.random.uniform(-0.5, 0.5, count)
+            self.append_points(x, y)
+            return
+
         x = self.plotArea().width() / self._axisX.tickCount()
         y = (self._axisX.max() - self._axisX.min()) / self._axisX.tickCount()
         self._x += y
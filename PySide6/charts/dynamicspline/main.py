@@ -3,26 +3,104 @@
 from __future__ import annotations
 
 """PySide6 port of the Dynamic Spline example from Qt v5.x"""
+from argparse import ArgumentParser, RawTextHelpFormatter
 import sys
+import time
 
 from PySide6.QtCharts import QChart, QChartView
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QPainter
 from PySide6.QtWidgets import QApplication, QMainWindow
 
 from chart import Chart
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def max_rss():
+    """Return the peak resident memory of the process in MB."""
+    if resource is None:
+        return float('nan')
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class SoakBenchmark:
+    """Drives the chart tick by tick for `duration` seconds, repainting
+       the view synchronously to measure the frame time, and periodically
+       prints the memory and frame time statistics."""
+
+    def __init__(self, chart, chart_view, duration, interval, report_interval=10):
+        self._chart = chart
+        self._chart_view = chart_view
+        self._duration = duration
+        self._report_interval = report_interval
+        self._frame_times = []
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        chart.stop()
+        self._timer = QTimer()
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._tick)
+        self._timer.start()
+
+    def _tick(self):
+        start = time.perf_counter()
+        self._chart.handleTimeout()
+        self._chart_view.viewport().repaint()
+        now = time.perf_counter()
+        self._frame_times.append(now - start)
+        if now - self._last_report >= self._report_interval:
+            self._report(now)
+        if now - self._start >= self._duration:
+            self._timer.stop()
+            QApplication.quit()
+
+    def _report(self, now):
+        times = sorted(self._frame_times)
+        mean = 1000 * sum(times) / len(times)
+        p99 = 1000 * times[int(0.99 * (len(times) - 1))]
+        print(f"{now - self._start:7.0f}s: {self._chart.point_count():8d} points, "
+              f"max RSS: {max_rss():7.1f} MB, frame time: mean {mean:.2f} ms, "
+              f"p99 {p99:.2f} ms, max {1000 * times[-1]:.2f} ms")
+        self._frame_times.clear()
+        self._last_report = now
+
+
 if __name__ == "__main__":
+    parser = ArgumentParser(description="dynamicspline",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument('--streaming', '-s', action='store_true',
+                        help='Stream points at --rate')
+    parser.add_argument('--rate', '-r', type=int, default=1000,
+                        help='Points per second in streaming mode')
+    parser.add_argument('--retention', type=int, default=600,
+                        help='Seconds of decimated points kept in streaming mode')
+    parser.add_argument('--soak', type=int, metavar='SECONDS', nargs='?', const=3600,
+                        help='Stream for SECONDS (default: one hour) and report\n'
+                             'the memory and frame time')
+    options = parser.parse_args()
+    streaming = options.streaming or options.soak is not None
 
     a = QApplication(sys.argv)
     window = QMainWindow()
-    chart = Chart()
+    chart = Chart(streaming=streaming, sample_rate=options.rate,
+                  retention=options.retention)
     chart.setTitle("Dynamic spline chart")
     chart.legend().hide()
-    chart.setAnimationOptions(QChart.AnimationOption.AllAnimations)
+    if not streaming:
+        chart.setAnimationOptions(QChart.AnimationOption.AllAnimations)
     chart_view = QChartView(chart)
     chart_view.setRenderHint(QPainter.RenderHint.Antialiasing)
     window.setCentralWidget(chart_view)
     window.resize(400, 300)
     window.show()
 
+    if options.soak is not None:
+        benchmark = SoakBenchmark(chart, chart_view, options.soak, 40)
+
     sys.exit(a.exec())
@@ -0,0 +1,147 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Bounded storage of a data stream for the Dynamic Spline example"""
+
+import numpy
+
+
+class _Window:
+    """Fixed capacity FIFO of (x, y) points kept contiguous in memory.
+
+    The points live in arrays twice as large as the capacity, they are
+    moved back to the beginning only when the end is reached, which keeps
+    appending amortized O(1) and the points readable without copy."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._x = numpy.empty(2 * capacity)
+        self._y = numpy.empty(2 * capacity)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def x(self):
+        return self._x[self._start:self._end]
+
+    @property
+    def y(self):
+        return self._y[self._start:self._end]
+
+    def pop(self, count):
+        """Remove the `count` oldest points, returns copies of them."""
+        end = self._start + count
+        x = self._x[self._start:end].copy()
+        y = self._y[self._start:end].copy()
+        self._start = end
+        return x, y
+
+    def extend(self, x, y):
+        """Append points, there must be room for them."""
+        count = len(x)
+        if self._end + count > self._x.size:
+            size = len(self)
+            self._x[:size] = self.x
+            self._y[:size] = self.y
+            self._start = 0
+            self._end = size
+        self._x[self._end:self._end + count] = x
+        self._y[self._end:self._end + count] = y
+        self._end += count
+
+
+def min_max_decimate(x, y, bucket_size):
+    """Replace each bucket of points by its minimum and maximum, in x order.
+       The points of an incomplete last bucket are kept as they are."""
+    buckets = len(x) // bucket_size
+    if not buckets:
+        return x, y
+    count = buckets * bucket_size
+    by = y[:count].reshape(buckets, bucket_size)
+    rows = numpy.arange(buckets)
+    low = by.argmin(axis=1)
+    high = by.argmax(axis=1)
+    first = numpy.minimum(low, high)
+    second = numpy.maximum(low, high)
+    index = numpy.empty(2 * buckets + len(x) - count, dtype=numpy.intp)
+    index[0:2 * buckets:2] = rows * bucket_size + first
+    index[1:2 * buckets:2] = rows * bucket_size + second
+    index[2 * buckets:] = numpy.arange(count, len(x))
+    return x[index], y[index]
+
+
+class StreamingBuffer:
+    """Keeps the last `capacity` points of a stream at full resolution.
+
+    The points leaving the full resolution window are decimated by buckets
+    of `bucket_size` points to their minimum and maximum, and the last
+    `retention` decimated points are kept. The memory is therefore bounded
+    whatever the duration of the stream. The x values must increase."""
+
+    def __init__(self, capacity, retention=0, bucket_size=64):
+        self._window = _Window(capacity)
+        self._history = _Window(retention) if retention else None
+        self._bucket_size = bucket_size
+
+    def __len__(self):
+        history = len(self._history) if self._history else 0
+        return history + len(self._window)
+
+    def append(self, x, y):
+        """Append arrays of points."""
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        capacity = self._window.capacity
+        if len(x) > capacity:
+            self._retire(x[:-capacity], y[:-capacity])
+            x = x[-capacity:]
+            y = y[-capacity:]
+        overflow = len(self._window) + len(x) - capacity
+        if overflow > 0:
+            # Retire whole buckets so that the decimation does not depend
+            # on the size of the appended chunks
+            count = -(-overflow // self._bucket_size) * self._bucket_size
+            self._retire(*self._window.pop(min(count, len(self._window))))
+        self._window.extend(x, y)
+
+    def _retire(self, x, y):
+        if self._history is None:
+            return
+        x, y = min_max_decimate(x, y, self._bucket_size)
+        retention = self._history.capacity
+        if len(x) > retention:
+            x = x[-retention:]
+            y = y[-retention:]
+        overflow = len(self._history) + len(x) - retention
+        if overflow > 0:
+            self._history.pop(overflow)
+        self._history.extend(x, y)
+
+    def x_range(self):
+        """Return the x of the oldest and of the newest points kept."""
+        first = self._history if self._history else self._window
+        return float(first.x[0]), float(self._window.x[-1])
+
+    def points(self, x_min=-numpy.inf, x_max=numpy.inf, columns=0):
+        """Return the x and y arrays of the points in [x_min, x_max].
+
+        When columns is not 0 and there are more than 2 * columns points,
+        they are decimated to the minimum and maximum of each column."""
+        parts = [self._window] if self._history is None else [self._history, self._window]
+        xs = []
+        ys = []
+        for part in parts:
+            x = part.x
+            first = numpy.searchsorted(x, x_min, side='left')
+            last = numpy.searchsorted(x, x_max, side='right')
+            xs.append(x[first:last])
+            ys.append(part.y[first:last])
+        x = numpy.concatenate(xs)
+        y = numpy.concatenate(ys)
+        if columns and len(x) > 2 * columns:
+            x, y = min_max_decimate(x, y, -(-len(x) // columns))
+        return x, y
@@ -4,11 +4,24 @@ from __future__ import annotations
 
 """PySide6 Charts example: Simple memory usage viewer"""
 
+from argparse import ArgumentParser, RawTextHelpFormatter
+from collections import deque
 import os
 import sys
-from PySide6.QtCore import QProcess
-from PySide6.QtWidgets import QApplication, QMainWindow
-from PySide6.QtCharts import QChart, QChartView, QPieSeries
+from PySide6.QtCore import QPointF, QProcess, Qt, Slot
+from PySide6.QtWidgets import QApplication, QMainWindow, QSplitter
+from PySide6.QtCharts import (QChart, QChartView, QLineSeries, QPieSeries,
+                              QValueAxis)
+
+from procsampler import ProcessSampler, proc_available
+
+
+SLICE_COUNT = 4
+
+# Number of samples shown by the history chart
+HISTORY_LENGTH = 60
+
+MB = 1024 * 1024
 
 
 def run_process(command, arguments):
@@ -61,31 +74,130 @@ def get_memory_usage():
 
 class MainWindow(QMainWindow):
 
-    def __init__(self):
+    def __init__(self, interval=1000):
         super().__init__()
 
         self.setWindowTitle('Memory Usage')
 
-        memory_usage = get_memory_usage()
-        if len(memory_usage) > 5:
-            memory_usage = memory_usage[0:4]
-
         self.series = QPieSeries()
-        for item in memory_usage:
-            self.series.append(item[0], item[1])
-
-        chart_slice = self.series.slices()[0]
-        chart_slice.setExploded()
-        chart_slice.setLabelVisible()
         self.chart = QChart()
         self.chart.addSeries(self.series)
         self._chart_view = QChartView(self.chart)
-        self.setCentralWidget(self._chart_view)
+
+        if not proc_available():
+            # No /proc file system: run 'ps' or 'tasklist' once
+            self._sampler = None
+            memory_usage = get_memory_usage()
+            if len(memory_usage) > 5:
+                memory_usage = memory_usage[0:SLICE_COUNT]
+            for item in memory_usage:
+                self.series.append(item[0], item[1])
+            chart_slice = self.series.slices()[0]
+            chart_slice.setExploded()
+            chart_slice.setLabelVisible()
+            self.setCentralWidget(self._chart_view)
+            return
+
+        # The slices are created once and updated in place by each sample
+        for _ in range(SLICE_COUNT):
+            self.series.append('', 0)
+        self._slice_samples = []
+        self.series.clicked.connect(self._slice_clicked)
+
+        self._history = {}  # pid -> deque of the resident memory in MB
+        self._selected_pid = None
+        self._history_series = QLineSeries()
+        self._history_chart = QChart()
+        self._history_chart.addSeries(self._history_series)
+        self._history_chart.legend().hide()
+        self._history_axis_x = QValueAxis()
+        self._history_axis_x.setRange(0, HISTORY_LENGTH - 1)
+        self._history_axis_x.setLabelFormat("%d")
+        self._history_axis_x.setTitleText(f"Samples ({interval} ms)")
+        self._history_axis_y = QValueAxis()
+        self._history_axis_y.setTitleText("Resident memory (MB)")
+        self._history_chart.addAxis(self._history_axis_x, Qt.AlignmentFlag.AlignBottom)
+        self._history_chart.addAxis(self._history_axis_y, Qt.AlignmentFlag.AlignLeft)
+        self._history_series.attachAxis(self._history_axis_x)
+        self._history_series.attachAxis(self._history_axis_y)
+        self._history_chart_view = QChartView(self._history_chart)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self._chart_view)
+        splitter.addWidget(self._history_chart_view)
+        splitter.setStretchFactor(0, 2)
+        self.setCentralWidget(splitter)
+
+        self._sampler = ProcessSampler(interval)
+        self._sampler.sampled.connect(self._update)
+        self._sampler.start()
+
+    def closeEvent(self, event):
+        if self._sampler is not None:
+            self._sampler.stop()
+        event.accept()
+
+    @Slot(list)
+    def _update(self, samples):
+        history = {}
+        for sample in samples:
+            values = self._history.get(sample.pid)
+            if values is None:
+                values = deque(maxlen=HISTORY_LENGTH)
+            values.append(sample.rss / MB)
+            history[sample.pid] = values
+        self._history = history  # Drops the processes which exited
+
+        self._slice_samples = samples[:SLICE_COUNT]
+        if self._selected_pid not in history and self._slice_samples:
+            self._select(self._slice_samples[0])
+
+        for i, chart_slice in enumerate(self.series.slices()):
+            if i < len(self._slice_samples):
+                sample = self._slice_samples[i]
+                delta = sample.rss_delta / MB
+                chart_slice.setLabel(f'{sample.name} {sample.rss / MB:.0f}M '
+                                     f'({delta:+.1f}M, {sample.cpu:.0f}% CPU)')
+                chart_slice.setValue(sample.rss)
+            else:
+                chart_slice.setLabel('')
+                chart_slice.setValue(0)
+
+        self._update_selection()
+
+    @Slot("QPieSlice*")
+    def _slice_clicked(self, chart_slice):
+        i = self.series.slices().index(chart_slice)
+        if i < len(self._slice_samples):
+            self._select(self._slice_samples[i])
+            self._update_selection()
+
+    def _select(self, sample):
+        self._selected_pid = sample.pid
+        self._history_chart.setTitle(f'{sample.name} (PID {sample.pid})')
+
+    def _update_selection(self):
+        for i, chart_slice in enumerate(self.series.slices()):
+            selected = (i < len(self._slice_samples)
+                        and self._slice_samples[i].pid == self._selected_pid)
+            chart_slice.setExploded(selected)
+            chart_slice.setLabelVisible(selected)
+
+        values = self._history.get(self._selected_pid, ())
+        self._history_series.replace([QPointF(x, y) for x, y in enumerate(values)])
+        if values:
+            self._history_axis_y.setRange(0, max(values) * 1.1)
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser(description="memoryusage",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument('--interval', '-i', type=int, default=1000,
+                        help='Sampling interval in ms')
+    options = parser.parse_args()
+
     app = QApplication(sys.argv)
-    main_win = MainWindow()
+    main_win = MainWindow(options.interval)
     available_geometry = main_win.screen().availableGeometry()
     size = available_geometry.height() * 3 / 4
     main_win.resize(size, size)
@@ -0,0 +1,111 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Background sampler of the memory usage of the processes from /proc"""
+
+from dataclasses import dataclass
+import os
+import time
+
+from PySide6.QtCore import QMutex, QMutexLocker, QThread, QWaitCondition, Signal
+
+
+PROC = '/proc'
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def proc_available():
+    return os.path.isfile(os.path.join(PROC, 'self', 'statm'))
+
+
+@dataclass
+class ProcessSample:
+    pid: int
+    name: str
+    rss: int  # bytes
+    rss_delta: int  # bytes since the previous sample
+    cpu: float  # percent of one CPU during the interval
+
+
+def _read(path):
+    # os.read() on a raw descriptor avoids the buffering of open()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 4096)
+    finally:
+        os.close(fd)
+
+
+class ProcessSampler(QThread):
+    """Samples the resident memory and CPU time of all processes every
+       `interval` ms and emits them sorted by decreasing resident memory.
+
+    Only /proc/<pid>/statm and /proc/<pid>/stat are read, no process is
+    spawned. The values of the previous sample are kept to compute the
+    per-interval deltas."""
+
+    sampled = Signal(list)
+
+    def __init__(self, interval=1000, parent=None):
+        super().__init__(parent)
+        self._interval = interval
+        self._mutex = QMutex()
+        self._condition = QWaitCondition()
+        self._abort = False
+        self._previous = {}  # pid -> (rss, cpu ticks)
+        self._previous_time = time.monotonic()
+
+    def stop(self):
+        with QMutexLocker(self._mutex):
+            self._abort = True
+            self._condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        while True:
+            self.sampled.emit(self.sample())
+            with QMutexLocker(self._mutex):
+                if not self._abort:
+                    self._condition.wait(self._mutex, self._interval)
+                if self._abort:
+                    return
+
+    def sample(self):
+        now = time.monotonic()
+        interval = max(now - self._previous_time, 1e-3)
+        self._previous_time = now
+        previous = self._previous
+        current = {}
+        result = []
+        tick_percent = 100 / (CLOCK_TICKS * interval)
+        for entry in os.scandir(PROC):
+            name = entry.name
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            try:
+                statm = _read(f'{PROC}/{name}/statm')
+                stat = _read(f'{PROC}/{name}/stat')
+            except OSError:  # The process exited meanwhile
+                continue
+
+            rss = int(statm.split(None, 2)[1]) * PAGE_SIZE
+            if not rss:  # Kernel threads
+                continue
+            # The command is enclosed in parentheses and may contain spaces
+            close = stat.rfind(b')')
+            command = stat[stat.find(b'(') + 1:close].decode('utf-8', 'replace')
+            fields = stat[close + 2:].split(None, 13)
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+
+            current[pid] = (rss, ticks)
+            previous_rss, previous_ticks = previous.get(pid, (rss, ticks))
+            result.append(ProcessSample(pid, command, rss, rss - previous_rss,
+                                        (ticks - previous_ticks) * tick_percent))
+
+        self._previous = current
+        result.sort(key=lambda s: s.rss, reverse=True)
+        return result
@@ -6,6 +6,7 @@ from __future__ import annotations
 """PySide6 port of the corelib/threads/mandelbrot example from Qt v5.x, originating from PyQt"""
 
 from argparse import ArgumentParser, RawTextHelpFormatter
+from contextlib import closing
 import sys
 
 from PySide6.QtCore import (Signal, QMutex, QElapsedTimer, QMutexLocker,
@@ -14,6 +15,11 @@ from PySide6.QtCore import (Signal, QMutex, QElapsedTimer, QMutexLocker,
 from PySide6.QtGui import QColor, QImage, QPainter, QPixmap, qRgb
 from PySide6.QtWidgets import QApplication, QWidget
 
+from renderengine import (BACKENDS, DEFAULT_BACKEND, RenderParams, benchmark,
+                          copy_tile, create_scheduler, image_origin, snap_scale,
+                          split_tiles)
+from tilecache import DEFAULT_CACHE_SIZE, TileCache
+
 
 DEFAULT_CENTER_X = -0.647011
 DEFAULT_CENTER_Y = -0.0395159
@@ -26,6 +32,9 @@ SCROLL_STEP = 20
 
 NUM_PASSES = 8
 
+# Minimum interval between two partial images of a pass
+PROGRESS_INTERVAL = 100  # ms
+
 
 INFO_KEY = 'info'
 
@@ -39,9 +48,13 @@ class RenderThread(QThread):
 
     rendered_image = Signal(QImage, float)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, backend=DEFAULT_BACKEND, jobs=0,
+                 cache_size=DEFAULT_CACHE_SIZE):
         super().__init__(parent)
 
+        self._backend = backend
+        self._scheduler = create_scheduler(jobs)
+        self._cache = TileCache(cache_size * 1024 * 1024)
         self.mutex = QMutex()
         self.condition = QWaitCondition()
         self._center_x = 0.0
@@ -64,6 +77,7 @@ class RenderThread(QThread):
         self.mutex.unlock()
 
         self.wait(2000)
+        self._scheduler.shutdown()
 
     def render(self, centerX, centerY, scale_factor, resultSize):
         with QMutexLocker(self.mutex):
@@ -80,6 +94,7 @@ class RenderThread(QThread):
 
     def run(self):
         timer = QElapsedTimer()
+        progress_timer = QElapsedTimer()
 
         while True:
             self.mutex.lock()
@@ -89,56 +104,63 @@ class RenderThread(QThread):
             centerY = self._center_y
             self.mutex.unlock()
 
-            half_width = resultSize.width() // 2
-            half_height = resultSize.height() // 2
+            width = resultSize.width()
+            height = resultSize.height()
+            grid_scale = snap_scale(scale_factor)
+            origin_x, origin_y = image_origin(centerX, centerY, grid_scale, width, height)
             image = QImage(resultSize, QImage.Format.Format_RGB32)
+            tiles = split_tiles(origin_x, origin_y, width, height)
+            colormap = tuple(self.colormap)
 
             curpass = 0
 
             while curpass < NUM_PASSES:
+                if self.restart:
+                    break
+                if self.abort:
+                    return
+
                 timer.restart()
+                progress_timer.restart()
                 max_iterations = (1 << (2 * curpass + 6)) + 32
-                LIMIT = 4
+                params = RenderParams(grid_scale, max_iterations, colormap)
                 all_black = True
-
-                for y in range(-half_height, half_height):
-                    if self.restart:
-                        break
-                    if self.abort:
-                        return
-
-                    ay = 1j * (centerY + (y * scale_factor))
-
-                    for x in range(-half_width, half_width):
-                        c0 = centerX + (x * scale_factor) + ay
-                        c = c0
-                        num_iterations = 0
-
-                        while num_iterations < max_iterations:
-                            num_iterations += 1
-                            c = c * c + c0
-                            if abs(c) >= LIMIT:
-                                break
-                            num_iterations += 1
-                            c = c * c + c0
-                            if abs(c) >= LIMIT:
-                                break
-                            num_iterations += 1
-                            c = c * c + c0
-                            if abs(c) >= LIMIT:
-                                break
-                            num_iterations += 1
-                            c = c * c + c0
-                            if abs(c) >= LIMIT:
-                                break
-
-                        if num_iterations < max_iterations:
-                            image.setPixel(x + half_width, y + half_height,
-                                           self.colormap[
-                                               num_iterations % RenderThread.colormap_size])
-                            all_black = False
-                        else:
-                            image.setPixel(x + half_width, y + half_height, qRgb(0, 0, 0))
+                num_tiles = 0
+
+                # Only the tiles which were not rendered for a previous view
+                # (the strips exposed by a pan) are computed
+                missing_tiles = []
+                for tile in tiles:
+                    entry = self._cache.get(TileCache.key(params, tile))
+                    if entry is None:
+                        missing_tiles.append(tile)
+                    else:
+                        pixels, tile_black = entry
+                        copy_tile(image, origin_x, origin_y, tile, pixels)
+                        all_black = all_black and tile_black
+                        num_tiles += 1
+
+                results = self._scheduler.map_tiles(self._backend, missing_tiles, params)
+                with closing(results):
+                    for tile, pixels, tile_black in results:
+                        if self.restart:
+                            break
+                        if self.abort:
+                            return
+
+                        self._cache.put(TileCache.key(params, tile), pixels, tile_black)
+                        copy_tile(image, origin_x, origin_y, tile, pixels)
+                        all_black = all_black and tile_black
+                        num_tiles += 1
+
+                        # Stream the finished tiles of the pass to the widget
+                        if (num_tiles < len(tiles)
+                                and progress_timer.elapsed() > PROGRESS_INTERVAL):
+                            progress_timer.restart()
+                            text = (f"Pass {curpass + 1}/{NUM_PASSES}, "
+                                    f"tiles: {num_tiles}/{len(tiles)}")
+                            image.setText(INFO_KEY, text)
+                            self.rendered_image.emit(image, scale_factor)
 
                 if all_black and curpass == 0:
                     curpass = 4
@@ -150,7 +172,8 @@ class RenderThread(QThread):
                             elapsed /= 1000
                             unit = 's'
                         text = (f"Pass {curpass + 1}/{NUM_PASSES}, "
-                                f"max iterations: {max_iterations}, time: {elapsed}{unit}")
+                                f"max iterations: {max_iterations}, time: {elapsed}{unit}, "
+                                f"{self._cache.statistics()}")
                         image.setText(INFO_KEY, text)
                         self.rendered_image.emit(image, scale_factor)
                     curpass += 1
@@ -198,10 +221,11 @@ class RenderThread(QThread):
 
 
 class MandelbrotWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, backend=DEFAULT_BACKEND, jobs=0,
+                 cache_size=DEFAULT_CACHE_SIZE):
         super().__init__(parent)
 
-        self.thread = RenderThread()
+        self.thread = RenderThread(backend=backend, jobs=jobs, cache_size=cache_size)
         self.pixmap = QPixmap()
         self._pixmap_offset = QPointF()
         self._last_drag_pos = QPointF()
@@ -335,6 +359,15 @@ if __name__ == '__main__':
     parser = ArgumentParser(description='Qt Mandelbrot Example',
                             formatter_class=RawTextHelpFormatter)
     parser.add_argument('--passes', '-p', type=int, help='Number of passes (1-8)')
+    parser.add_argument('--backend', '-b', choices=sorted(BACKENDS),
+                        default=DEFAULT_BACKEND, help='Render backend')
+    parser.add_argument('--jobs', '-j', type=int, default=-1,
+                        help='Number of worker processes rendering the tiles\n'
+                             '(0: render in the thread, -1: one per CPU)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='Memory budget of the tile cache in MB (0: disabled)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Report the pixels/second of each backend and exit')
     options = parser.parse_args()
     if options.passes:
         NUM_PASSES = int(options.passes)
@@ -342,8 +375,16 @@ if __name__ == '__main__':
             print(f'Invalid value: {options.passes}')
             sys.exit(-1)
 
+    if options.benchmark:
+        # Use the iterations of the second pass to keep the Python backend bearable
+        max_iterations = (1 << (2 * 1 + 6)) + 32
+        benchmark(RenderThread().colormap, DEFAULT_CENTER_X, DEFAULT_CENTER_Y,
+                  DEFAULT_SCALE, 320, 240, max_iterations, options.jobs)
+        sys.exit(0)
+
     app = QApplication(sys.argv)
-    widget = MandelbrotWidget()
+    widget = MandelbrotWidget(backend=options.backend, jobs=options.jobs,
+                              cache_size=options.cache_size)
     geometry = widget.screen().availableGeometry()
     widget.resize((2 * geometry.size()) / 3)
     pos = (geometry.size() - widget.size()) / 2
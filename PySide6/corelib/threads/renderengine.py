@@ -0,0 +1,257 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Render backends and tile schedulers for the Mandelbrot example.
+
+The complex plane is divided into a grid of pixels of size scale_factor,
+pixel (x, y) being the point x * scale_factor + 1j * y * scale_factor. Tiles
+are aligned on this grid so that a tile rendered for one view can be reused
+by any other view at the same scale.
+
+A backend computes the escape-time colors of one tile and returns them as
+32-bit pixels (the layout of QImage.Format_RGB32). A scheduler distributes
+the tiles of a pass over workers and yields the finished tiles as they
+become available."""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+import multiprocessing
+import os
+import time
+
+import numpy
+
+
+LIMIT = 4
+
+TILE_SIZE = 64
+
+BLACK = 0xff000000
+
+
+@dataclass(frozen=True)
+class Tile:
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+@dataclass(frozen=True)
+class RenderParams:
+    scale_factor: float
+    max_iterations: int
+    colormap: tuple
+
+
+def snap_scale(scale_factor):
+    """Round the scale so that zooming in and out again (which multiplies by
+       ZOOM_IN_FACTOR and its inverse) lands on the same pixel grid."""
+    return float(f"{scale_factor:.10g}")
+
+
+def image_origin(center_x, center_y, scale_factor, width, height):
+    """Return the grid pixel of the top left corner of an image."""
+    return (round(center_x / scale_factor) - width // 2,
+            round(center_y / scale_factor) - height // 2)
+
+
+def split_tiles(origin_x, origin_y, width, height, tile_size=TILE_SIZE):
+    """Return the grid tiles covering an image, top row first."""
+    first_x = (origin_x // tile_size) * tile_size
+    first_y = (origin_y // tile_size) * tile_size
+    return [Tile(x, y, tile_size, tile_size)
+            for y in range(first_y, origin_y + height, tile_size)
+            for x in range(first_x, origin_x + width, tile_size)]
+
+
+def python_escape_time(tile, params):
+    """Per-pixel escape-time loop using Python complex arithmetic."""
+    max_iterations = params.max_iterations
+    colormap = params.colormap
+    colormap_size = len(colormap)
+    pixels = array('I')
+    all_black = True
+
+    for y in range(tile.y, tile.y + tile.height):
+        ay = 1j * (y * params.scale_factor)
+
+        for x in range(tile.x, tile.x + tile.width):
+            c0 = (x * params.scale_factor) + ay
+            c = c0
+            num_iterations = 0
+
+            while num_iterations < max_iterations:
+                num_iterations += 1
+                c = c * c + c0
+                if abs(c) >= LIMIT:
+                    break
+                num_iterations += 1
+                c = c * c + c0
+                if abs(c) >= LIMIT:
+                    break
+                num_iterations += 1
+                c = c * c + c0
+                if abs(c) >= LIMIT:
+                    break
+                num_iterations += 1
+                c = c * c + c0
+                if abs(c) >= LIMIT:
+                    break
+
+            if num_iterations < max_iterations:
+                pixels.append(colormap[num_iterations % colormap_size])
+                all_black = False
+            else:
+                pixels.append(BLACK)
+
+    return pixels, all_black
+
+
+@lru_cache(maxsize=4)
+def _numpy_colormap(colormap):
+    return numpy.array(colormap, dtype=numpy.uint32)
+
+
+def numpy_escape_time(tile, params):
+    """Escape-time kernel iterating all pixels of the tile at once.
+
+    Escaped points are dropped from the working arrays, so the cost of an
+    iteration is proportional to the number of points still iterating."""
+    xs = numpy.arange(tile.x, tile.x + tile.width) * params.scale_factor
+    ys = numpy.arange(tile.y, tile.y + tile.height) * params.scale_factor
+    c = (xs[numpy.newaxis, :] + 1j * ys[:, numpy.newaxis]).ravel()
+    z = c.copy()
+    index = numpy.arange(c.size)
+    counts = numpy.full(c.size, params.max_iterations, dtype=numpy.int64)
+    limit = LIMIT * LIMIT
+
+    for num_iterations in range(1, params.max_iterations + 1):
+        z = z * z + c
+        escaped = (z.real * z.real + z.imag * z.imag) >= limit
+        if escaped.any():
+            counts[index[escaped]] = num_iterations
+            remaining = ~escaped
+            z = z[remaining]
+            c = c[remaining]
+            index = index[remaining]
+            if not index.size:
+                break
+
+    colormap = _numpy_colormap(params.colormap)
+    inside = counts >= params.max_iterations
+    pixels = colormap[counts % colormap.size]
+    pixels[inside] = BLACK
+    return pixels, bool(inside.all())
+
+
+BACKENDS = {
+    'python': python_escape_time,
+    'numpy': numpy_escape_time,
+}
+
+DEFAULT_BACKEND = 'numpy'
+
+
+def render_tile(backend, tile, params):
+    """Render one tile, returns (tile, pixels, all_black). This is the unit
+       of work sent to the worker processes."""
+    pixels, all_black = BACKENDS[backend](tile, params)
+    return tile, pixels, all_black
+
+
+class SerialScheduler:
+    """Renders the tiles one after the other in the calling thread."""
+
+    def map_tiles(self, backend, tiles, params):
+        for tile in tiles:
+            yield render_tile(backend, tile, params)
+
+    def shutdown(self):
+        pass
+
+
+class ProcessPoolScheduler:
+    """Renders the tiles in a pool of worker processes, yielding them in
+       completion order. Closing the generator (on restart or abort) cancels
+       the tiles that were not started yet."""
+
+    def __init__(self, jobs):
+        # Forking a process running Qt threads is unsafe, start fresh interpreters
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+
+    def map_tiles(self, backend, tiles, params):
+        futures = [self._executor.submit(render_tile, backend, tile, params)
+                   for tile in tiles]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_scheduler(jobs):
+    """Return a scheduler for jobs worker processes, 0 renders serially and
+       a negative value uses all the CPUs."""
+    if jobs < 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 0:
+        return SerialScheduler()
+    return ProcessPoolScheduler(jobs)
+
+
+def copy_tile(image, origin_x, origin_y, tile, pixels):
+    """Copy the part of a rendered tile overlapping a Format_RGB32 QImage
+       whose top left corner is the grid pixel (origin_x, origin_y)."""
+    x0 = max(tile.x, origin_x)
+    x1 = min(tile.x + tile.width, origin_x + image.width())
+    y0 = max(tile.y, origin_y)
+    y1 = min(tile.y + tile.height, origin_y + image.height())
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    bits = image.bits()
+    stride = image.bytesPerLine()
+    source = memoryview(pixels).cast('B')
+    row_bytes = (x1 - x0) * 4
+    for y in range(y0, y1):
+        offset = (y - origin_y) * stride + (x0 - origin_x) * 4
+        start = ((y - tile.y) * tile.width + x0 - tile.x) * 4
+        bits[offset:offset + row_bytes] = source[start:start + row_bytes]
+
+
+def benchmark(colormap, center_x, center_y, scale_factor, width, height,
+              max_iterations, jobs):
+    """Render one frame with each backend and scheduler and print the
+       throughput in pixels/second."""
+    params = RenderParams(scale_factor, max_iterations, tuple(colormap))
+    tiles = split_tiles(*image_origin(center_x, center_y, scale_factor, width, height),
+                        width, height)
+    schedulers = [('serial', 0)]
+    if jobs != 0:
+        schedulers.append(('process pool', jobs))
+
+    print(f"{width}x{height} pixels ({len(tiles)} tiles), "
+          f"max iterations: {max_iterations}")
+    for scheduler_name, scheduler_jobs in schedulers:
+        scheduler = create_scheduler(scheduler_jobs)
+        for backend in BACKENDS:
+            # Warm up the worker processes before timing
+            for _ in scheduler.map_tiles(backend, tiles[:1], params):
+                pass
+            start = time.perf_counter()
+            for _ in scheduler.map_tiles(backend, tiles, params):
+                pass
+            elapsed = time.perf_counter() - start
+            rate = len(tiles) * TILE_SIZE * TILE_SIZE / elapsed
+            print(f"{backend:>8} {scheduler_name:>14}: {rate:14,.0f} pixels/s "
+                  f"({elapsed:.3f}s)")
+        scheduler.shutdown()
@@ -0,0 +1,67 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Least recently used cache of the rendered tiles of the Mandelbrot example"""
+
+from collections import OrderedDict
+
+
+DEFAULT_CACHE_SIZE = 256  # MB
+
+
+class TileCache:
+    """Maps (scale factor, max iterations, tile) to the rendered pixels.
+
+    The max iterations identify the pass and the tile its position on the
+    pixel grid of the scale, which together determine the view. The least
+    recently used tiles are evicted when the pixels exceed the memory
+    budget."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_SIZE * 1024 * 1024):
+        self._tiles = OrderedDict()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(params, tile):
+        return (params.scale_factor, params.max_iterations, tile)
+
+    def get(self, key):
+        """Return (pixels, all_black) or None."""
+        entry = self._tiles.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._tiles.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, pixels, all_black):
+        if self._max_bytes <= 0:
+            return
+        old_entry = self._tiles.pop(key, None)
+        if old_entry is not None:
+            self._bytes -= memoryview(old_entry[0]).nbytes
+        self._tiles[key] = (pixels, all_black)
+        self._bytes += memoryview(pixels).nbytes
+        while self._bytes > self._max_bytes:
+            _, (evicted, _) = self._tiles.popitem(last=False)
+            self._bytes -= memoryview(evicted).nbytes
+
+    def clear(self):
+        self._tiles.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def size(self):
+        """Return the memory used by the cached pixels in bytes."""
+        return self._bytes
+
+    def statistics(self):
+        return (f"cache hits: {self.hits}, misses: {self.misses}, "
+                f"{len(self._tiles)} tiles ({self._bytes / (1024 * 1024):.1f} MB)")
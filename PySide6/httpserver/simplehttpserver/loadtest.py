@@ -0,0 +1,138 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Load test of the Simple HTTP Server example.
+
+Sends requests on keep-alive connections during a given time and reports
+the requests per second and the latency percentiles. Unless a port is
+given, the server is started for each number of workers in turn, 0 being
+the main thread server without cache."""
+
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+
+
+SERVER = Path(__file__).resolve().parent / "main.py"
+PORT_PATTERN = re.compile(r"http://127\.0\.0\.1:(\d+)/")
+
+
+async def read_response(reader):
+    """Read a response, return its status, ETag and body size."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get("etag", ""), length
+
+
+async def client(host, port, path, deadline, revalidate, latencies, statuses, errors):
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+    etag = ""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as e:
+        errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        return
+    try:
+        while time.perf_counter() < deadline:
+            conditional = f"If-None-Match: {etag}\r\n" if etag else ""
+            start = time.perf_counter()
+            writer.write(f"{request}{conditional}\r\n".encode())
+            status, new_etag, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if revalidate and new_etag:
+                etag = new_etag
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, path, connections, duration, revalidate):
+    latencies = []
+    statuses = {}
+    errors = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(host, port, path, deadline, revalidate, latencies, statuses,
+                                  errors) for _ in range(connections)))
+    return time.perf_counter() - start, sorted(latencies), statuses, errors
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def report(name, elapsed, latencies, statuses, errors):
+    line = (f"{name:>10}: {len(latencies) / elapsed:8.0f} requests/s, "
+            f"p50 {1000 * percentile(latencies, 50):6.2f} ms, "
+            f"p99 {1000 * percentile(latencies, 99):6.2f} ms, "
+            f"p99.9 {1000 * percentile(latencies, 99.9):6.2f} ms, "
+            f"max {1000 * (latencies[-1] if latencies else 0):6.2f} ms, "
+            "status " + ", ".join(f"{k} {v}" for k, v in sorted(statuses.items())))
+    if errors:
+        line += ", errors: " + ", ".join(f"{k} {v}" for k, v in errors.items())
+    print(line, flush=True)
+
+
+def start_server(workers):
+    command = [sys.executable, os.fspath(SERVER)]
+    if workers:
+        command += ["--workers", str(workers)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    match = PORT_PATTERN.search(server.stdout.readline())
+    if not match:
+        server.terminate()
+        server.wait()
+        raise RuntimeError(f"The server with {workers} workers did not start")
+    return server, int(match.group(1))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Load test of the Simple HTTP Server",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--connections", "-c", type=int, default=64,
+                        help="concurrent keep-alive connections (default 64)")
+    parser.add_argument("--duration", "-d", type=float, default=5,
+                        help="duration of each test in seconds (default 5)")
+    parser.add_argument("--path", default="/", help="requested path (default /)")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send the last ETag in If-None-Match")
+    parser.add_argument("--workers", "-w", type=int, action="append",
+                        help="workers of the server started for the test,\n"
+                        "can be repeated (default 0 and 4)")
+    parser.add_argument("--host", default="127.0.0.1", help="host of the server")
+    parser.add_argument("--port", "-p", type=int, default=0,
+                        help="port of a running server, instead of starting one")
+    options = parser.parse_args()
+
+    arguments = (options.path, options.connections, options.duration, options.revalidate)
+    if options.port:
+        report(str(options.port), *asyncio.run(run_load(options.host, options.port,
+                                                        *arguments)))
+        sys.exit(0)
+
+    print(f"{options.connections} connections for {options.duration} s on {options.path}")
+    for workers in options.workers or [0, 4]:
+        server, port = start_server(workers)
+        try:
+            report(f"{workers} workers", *asyncio.run(run_load(options.host, port, *arguments)))
+        finally:
+            server.terminate()
+            server.wait()
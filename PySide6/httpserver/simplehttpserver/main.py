@@ -5,12 +5,21 @@ from __future__ import annotations
 
 """PySide6 port of the /httpserver/afterrequest from from Qt"""
 
+import json
 import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
 
 from PySide6.QtCore import QCoreApplication
 from PySide6.QtNetwork import QHttpHeaders, QTcpServer
 from PySide6.QtHttpServer import QHttpServer
 
+from responsecache import CachedRoute
+from serverworkers import ServerWorker, listening_socket
+
+
+WWW_AUTHENTICATE = 'Basic realm="Simple example", charset="UTF-8"'
+
 
 def route(request):
     return "Hello world"
@@ -18,13 +27,12 @@ def route(request):
 
 def after_request(request, response):
     headers = response.headers()
-    headers.append(QHttpHeaders.WellKnownHeader.WWWAuthenticate,
-                   'Basic realm="Simple example", charset="UTF-8"')
+    headers.append(QHttpHeaders.WellKnownHeader.WWWAuthenticate, WWW_AUTHENTICATE)
     response.setHeaders(headers)
 
 
-if __name__ == '__main__':
-    app = QCoreApplication(sys.argv)
+def run_single():
+    """Serve on the main thread, as the C++ example."""
     httpServer = QHttpServer()
     httpServer.route("/", route)
 
@@ -36,6 +44,61 @@ if __name__ == '__main__':
         sys.exit(-1)
     port = tcpServer.serverPort()
 
-    print(f"Running on http://127.0.0.1:{port}/ (Press CTRL+\\ to quit)")
+    print(f"Running on http://127.0.0.1:{port}/ (Press CTRL+\\ to quit)", flush=True)
 
     sys.exit(app.exec())
+
+
+def run_workers(count, port, ttl):
+    """Serve from count worker threads with cached routes."""
+    started = time.time()
+    workers = []
+
+    def status():
+        return json.dumps({"uptime": round(time.time() - started, 3),
+                           "workers": len(workers),
+                           "requests": [worker.requests for worker in workers]})
+
+    static_headers = [(QHttpHeaders.WellKnownHeader.WWWAuthenticate, WWW_AUTHENTICATE)]
+    routes = {
+        "/": CachedRoute(lambda: route(None), ttl, "text/plain", static_headers),
+        "/status": CachedRoute(status, min(ttl, 1.0), "application/json", static_headers),
+    }
+
+    try:
+        listener = listening_socket(port)
+    except OSError as e:
+        print(f"Server failed to listen on a port: {e}", file=sys.stderr)
+        sys.exit(-1)
+    for _ in range(count):
+        worker = ServerWorker(routes, listener, static_headers)
+        worker.start()
+        workers.append(worker)
+    port = listener.getsockname()[1]
+
+    print(f"Running on http://127.0.0.1:{port}/ with {count} workers "
+          "(Press CTRL+\\ to quit)", flush=True)
+
+    app.aboutToQuit.connect(lambda: [worker.quit() for worker in workers])
+    result = app.exec()
+    for worker in workers:
+        worker.wait()
+    sys.exit(result)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Simple HTTP Server",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--workers", "-w", type=int, default=0,
+                        help="serve from this number of threads with cached responses,\n"
+                        "instead of the main thread")
+    parser.add_argument("--port", "-p", type=int, default=0, help="port of the workers")
+    parser.add_argument("--ttl", type=float, default=10.0,
+                        help="time to live of the cached responses in seconds (default 10)")
+    options, args = parser.parse_known_args()
+
+    app = QCoreApplication(sys.argv[:1] + args)
+    if options.workers > 0:
+        run_workers(options.workers, options.port, options.ttl)
+    else:
+        run_single()
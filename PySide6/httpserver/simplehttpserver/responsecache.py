@@ -0,0 +1,86 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Route level cache of the responses, with ETag and If-None-Match support"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+from PySide6.QtCore import QByteArray
+from PySide6.QtHttpServer import QHttpServerResponder, QHttpServerResponse
+from PySide6.QtNetwork import QHttpHeaders
+
+
+def static_headers(mime_type, max_age, extra=()):
+    """Build once the headers sent with every response of a route."""
+    headers = QHttpHeaders()
+    headers.append(QHttpHeaders.WellKnownHeader.ContentType, mime_type)
+    headers.append(QHttpHeaders.WellKnownHeader.CacheControl, f"max-age={int(max_age)}")
+    for name, value in extra:
+        headers.append(name, value)
+    return headers
+
+
+def matches(if_none_match, etag):
+    """Return whether an If-None-Match header value matches etag."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+@dataclass
+class Entry:
+    body: QByteArray
+    etag: str
+    expires: float
+
+
+class CachedRoute:
+    """Calls handler() for the body of a route at most once every ttl
+    seconds, the body being shared by the threads serving the route.
+
+    A request whose If-None-Match header matches the ETag of the body is
+    answered with 304 Not Modified and no body."""
+
+    def __init__(self, handler, ttl, mime_type="text/plain", extra_headers=()):
+        self._handler = handler
+        self._ttl = ttl
+        self._mime_type = QByteArray(mime_type.encode())
+        self._headers = static_headers(mime_type, ttl, extra_headers)
+        self._entry = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self):
+        now = time.monotonic()
+        entry = self._entry
+        if entry is not None and now < entry.expires:
+            self.hits += 1
+            return entry
+        with self._lock:
+            # Another thread may have computed it meanwhile
+            entry = self._entry
+            if entry is None or now >= entry.expires:
+                self.misses += 1
+                body = self._handler().encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                entry = self._entry = Entry(QByteArray(body), etag, now + self._ttl)
+        return entry
+
+    def response(self, request):
+        entry = self.entry()
+        value = bytes(request.headers().value(QHttpHeaders.WellKnownHeader.IfNoneMatch))
+        if value and matches(value.decode(), entry.etag):
+            response = QHttpServerResponse(QHttpServerResponder.StatusCode.NotModified)
+        else:
+            response = QHttpServerResponse(self._mime_type, entry.body)
+        headers = QHttpHeaders(self._headers)
+        headers.append(QHttpHeaders.WellKnownHeader.ETag, entry.etag)
+        response.setHeaders(headers)
+        return response
@@ -0,0 +1,89 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""QHttpServer event loops running in worker threads and accepting the
+connections of a shared listening socket"""
+
+import socket
+import sys
+
+from PySide6.QtCore import QObject, QThread
+from PySide6.QtHttpServer import QHttpServer
+from PySide6.QtNetwork import QTcpServer
+
+
+LISTEN_BACKLOG = 1024
+
+
+def listening_socket(port=0, backlog=LISTEN_BACKLOG):
+    """Return a socket listening on the local host, the workers accept its
+       connections from duplicates of its descriptor."""
+    return socket.create_server(("127.0.0.1", port), backlog=backlog)
+
+
+class HttpFrontEnd(QObject):
+    """Serves the routes, a dictionary of paths to CachedRoute, on a
+    duplicate of the listening socket.
+
+    The route handlers can only return text with PySide6, the cached
+    response replaces the placeholder of the route in an after request
+    handler. The other responses get the static headers, a list of
+    (name, value) pairs."""
+
+    def __init__(self, routes, listener, static_headers, parent=None):
+        super().__init__(parent)
+        self.requests = 0
+        self._routes = routes
+        self._static_headers = static_headers
+        self._http_server = QHttpServer(self)
+        # The handlers are not referenced by QHttpServer, they must be kept
+        self._handlers = (lambda request: "", self._after_request)
+        for path in routes:
+            self._http_server.route(path, self._handlers[0])
+        self._http_server.addAfterRequestHandler(self, self._handlers[1])
+        self._tcp_server = QTcpServer(self)
+        self._tcp_server.setMaxPendingConnections(LISTEN_BACKLOG)
+        self.listening = (self._tcp_server.setSocketDescriptor(listener.dup().detach())
+                          and self._http_server.bind(self._tcp_server))
+
+    def _after_request(self, request, response):
+        self.requests += 1
+        route = self._routes.get(request.url().path())
+        if route is not None:
+            response.swap(route.response(request))
+            return
+        headers = response.headers()
+        for name, value in self._static_headers:
+            headers.append(name, value)
+        response.setHeaders(headers)
+
+
+class ServerWorker(QThread):
+    """Runs an HttpFrontEnd in its own event loop."""
+
+    def __init__(self, routes, listener, static_headers, parent=None):
+        super().__init__(parent)
+        self._routes = routes
+        self._listener = listener
+        self._static_headers = static_headers
+        self._front_end = None
+        self._requests = 0
+
+    @property
+    def requests(self):
+        front_end = self._front_end
+        return front_end.requests if front_end is not None else self._requests
+
+    def run(self):
+        # Created in the thread, the sockets are handled by its event loop
+        front_end = HttpFrontEnd(self._routes, self._listener, self._static_headers)
+        if not front_end.listening:
+            print("Worker failed to listen on the socket.", file=sys.stderr)
+            return
+        self._front_end = front_end
+        self.exec()
+        self._requests = front_end.requests
+        # Destroyed in the thread which created it
+        self._front_end = None
+        del front_end
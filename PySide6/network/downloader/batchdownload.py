@@ -0,0 +1,118 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Downloads a list of URLs without window using DownloadQueue, and prints
+the throughput of each file and of the whole batch"""
+
+import os
+import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from PySide6.QtCore import QCoreApplication, QDir, QStandardPaths, QUrl
+
+from downloadqueue import DownloadQueue
+
+
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value):
+    """Parse a size like "512K" or "2M" to bytes."""
+    value = value.strip().upper().removesuffix("B")
+    unit = value[-1:] if value[-1:] in UNITS else ""
+    return int(float(value[:len(value) - len(unit)]) * UNITS[unit])
+
+
+def format_rate(rate):
+    return f"{rate / 1e6:.1f} MB/s"
+
+
+def destination(dest_dir, url, used):
+    """Return the path of url in dest_dir, with a suffix when the file name
+       is already used by another URL."""
+    name = url.fileName() or "index.html"
+    base, ext = os.path.splitext(name)
+    count = used.get(name, 0)
+    used[name] = count + 1
+    if count:
+        name = f"{base}.{count}{ext}"
+    return QDir(dest_dir).filePath(name)
+
+
+def run_queue(queue, urls, dest_dir):
+    """Download urls to dest_dir with queue, returns the exit code"""
+    QDir().mkpath(dest_dir)
+    used = {}
+    for url in urls:
+        queue.add(url, destination(dest_dir, url, used))
+
+    def on_finished_file(item):
+        retries = f", {item.attempts - 1} retries" if item.attempts > 1 else ""
+        print(f"{item.path}: {item.received} bytes in {item.elapsed:.2f} s, "
+              f"{format_rate(item.throughput)}{retries}", flush=True)
+
+    def on_failed_file(item):
+        print(f"{item.url.toString()}: failed after {item.attempts} attempts, {item.error}",
+              file=sys.stderr, flush=True)
+
+    def on_progress(finished, files, rate):
+        print(f"{finished} / {files} files, {format_rate(rate)}", file=sys.stderr, flush=True)
+
+    def on_finished(stats):
+        print(f"{stats.done} files downloaded, {stats.failed} failed, {stats.retries} retries, "
+              f"{stats.received} bytes in {stats.elapsed:.2f} s, {format_rate(stats.throughput)}")
+        QCoreApplication.exit(1 if stats.failed else 0)
+
+    queue.file_finished.connect(on_finished_file)
+    queue.file_failed.connect(on_failed_file)
+    queue.progress.connect(on_progress)
+    queue.finished.connect(on_finished)
+    queue.start()
+    return QCoreApplication.exec()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Batch downloader", formatter_class=RawTextHelpFormatter)
+    parser.add_argument("urls", nargs="*", help="URLs to download")
+    parser.add_argument("--input", "-i", help="file listing the URLs, one per line")
+    parser.add_argument("--output", "-o", help="destination directory")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="concurrent downloads per host (default 4)")
+    parser.add_argument("--max-active", type=int, default=16,
+                        help="concurrent downloads in total (default 16)")
+    parser.add_argument("--limit", type=parse_size, default=0,
+                        help="bandwidth limit of all the downloads in bytes per second,\n"
+                        "e.g. 512K or 2M (default unlimited)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="attempts after a transient error (default 3)")
+    parser.add_argument("--test-server", type=int, metavar="FILES",
+                        help="serve FILES files of random data from a local server,\n"
+                        "failing the first request of each, and download them")
+    parser.add_argument("--test-size", type=parse_size, default=parse_size("1M"),
+                        help="size of the files of the test server (default 1M)")
+    options, args = parser.parse_known_args()
+
+    app = QCoreApplication(sys.argv[:1] + args)
+
+    urls = [QUrl(url) for url in options.urls]
+    if options.input:
+        with open(options.input) as f:
+            urls += [QUrl(line.strip()) for line in f if line.strip()]
+    if options.test_server:
+        from rangeserver import RangeServer
+        server = RangeServer(os.urandom(options.test_size), "/file0.bin", fail_first=1)
+        for i in range(1, options.test_server):
+            server.add_file(f"/file{i}.bin", os.urandom(options.test_size))
+        if not server.listen():
+            print("Server failed to listen on a port.", file=sys.stderr)
+            sys.exit(-1)
+        urls += [server.url_of(f"/file{i}.bin") for i in range(options.test_server)]
+    if not urls:
+        parser.error("no URL to download")
+
+    output = options.output or QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.DownloadLocation)
+    queue = DownloadQueue(per_host=options.per_host, max_active=options.max_active,
+                          bandwidth=options.limit, retries=options.retries)
+    sys.exit(run_queue(queue, urls, output))
@@ -6,18 +6,29 @@ from PySide6.QtWidgets import (
     QWidget,
     QApplication,
     QMessageBox,
+    QLabel,
     QLineEdit,
     QProgressBar,
     QPushButton,
+    QSpinBox,
     QHBoxLayout,
     QVBoxLayout,
     QStyle,
     QFileDialog,
 )
-from PySide6.QtCore import QStandardPaths, QUrl, QFile, QSaveFile, QDir, QIODevice, Slot
-from PySide6.QtNetwork import QNetworkReply, QNetworkRequest, QNetworkAccessManager
+from PySide6.QtCore import (QCoreApplication, QElapsedTimer, QStandardPaths, QUrl, QFile, QDir,
+                            Slot)
+from PySide6.QtNetwork import QNetworkAccessManager
+from argparse import ArgumentParser, RawTextHelpFormatter
+import os
 import sys
 
+from segmenteddownload import SegmentedDownload
+
+
+def format_rate(rate):
+    return f"{rate / 1e6:.1f} MB/s"
+
 
 class DownloaderWidget(QWidget):
     """A widget to download a http file to a destination file"""
@@ -41,10 +52,13 @@ class DownloaderWidget(QWidget):
         )
         self._open_folder_action.triggered.connect(self.on_open_folder)
 
-        #  Current QFile
-        self.file = None
-        # Current QNetworkReply
-        self.reply = None
+        self.segments_box = QSpinBox()
+        self.segments_box.setRange(1, 16)
+        self.segments_box.setValue(4)
+        self.segments_box.setToolTip("Number of parts of the file downloaded concurrently")
+
+        # Current SegmentedDownload
+        self.download = None
 
         #  Default http url
         self.link_box.setText(
@@ -60,6 +74,8 @@ class DownloaderWidget(QWidget):
 
         # buttons bar layout
         hlayout = QHBoxLayout()
+        hlayout.addWidget(QLabel("Segments:"))
+        hlayout.addWidget(self.segments_box)
         hlayout.addStretch()
         hlayout.addWidget(self.start_button)
         hlayout.addWidget(self.abort_button)
@@ -102,62 +118,56 @@ class DownloaderWidget(QWidget):
             QFile.remove(dest_file)
 
         self.start_button.setDisabled(True)
-        # Create the file in write mode to append bytes
-        self.file = QSaveFile(dest_file)
-
-        if self.file.open(QIODevice.OpenModeFlag.WriteOnly):
+        self.progress_bar.setFormat("%p%")
 
-            # Start a GET HTTP request
-            self.reply = self.manager.get(QNetworkRequest(url_file))
-            self.reply.downloadProgress.connect(self.on_progress)
-            self.reply.finished.connect(self.on_finished)
-            self.reply.readyRead.connect(self.on_ready_read)
-            self.reply.errorOccurred.connect(self.on_error)
-        else:
-            error = self.file.errorString()
-            print(f"Cannot open device: {error}")
+        # An aborted download of the same file is resumed
+        self.download = SegmentedDownload(self.manager, url_file, dest_file,
+                                          self.segments_box.value(), parent=self)
+        self.download.progress.connect(self.on_progress)
+        self.download.finished.connect(self.on_finished)
+        self.download.failed.connect(self.on_error)
+        self.download.start()
 
     @Slot()
     def on_abort(self):
-        """When user press abort button"""
-        if self.reply:
-            self.reply.abort()
-            self.progress_bar.setValue(0)
-
-        if self.file:
-            self.file.cancelWriting()
+        """When user press abort button, the download can be resumed later"""
+        if self.download:
+            self.download.abort()
+            self.download.deleteLater()
+            self.download = None
 
         self.start_button.setDisabled(False)
 
-    @Slot()
-    def on_ready_read(self):
-        """ Get available bytes and store them into the file"""
-        if self.reply:
-            if self.reply.error() == QNetworkReply.NetworkError.NoError:
-                self.file.write(self.reply.readAll())
-
-    @Slot()
-    def on_finished(self):
-        """ Delete reply and close the file"""
-        if self.reply:
-            self.reply.deleteLater()
-
-        if self.file:
-            self.file.commit()
+    @Slot(str)
+    def on_finished(self, checksum: str):
+        """ Delete the download and show the checksum"""
+        if self.download:
+            self.download.deleteLater()
+            self.download = None
+        self.progress_bar.setToolTip(checksum)
 
         self.start_button.setDisabled(False)
 
-    @Slot(int, int)
-    def on_progress(self, bytesReceived: int, bytesTotal: int):
+    @Slot(int, int, float)
+    def on_progress(self, bytesReceived: int, bytesTotal: int, rate: float):
         """ Update progress bar"""
-        self.progress_bar.setRange(0, bytesTotal)
-        self.progress_bar.setValue(bytesReceived)
+        # The progress bar range is an int, a multi-gigabyte size would not fit
+        if bytesTotal > 0:
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.setValue(bytesReceived * 1000 // bytesTotal)
+        else:
+            self.progress_bar.setRange(0, 0)
+        self.progress_bar.setFormat(f"%p% - {format_rate(rate)}")
 
-    @Slot(QNetworkReply.NetworkError)
-    def on_error(self, code: QNetworkReply.NetworkError):
+    @Slot(str)
+    def on_error(self, message: str):
         """ Show a message if an error happen """
-        if self.reply:
-            QMessageBox.warning(self, "Error Occurred", self.reply.errorString())
+        if self.download:
+            self.download.deleteLater()
+            self.download = None
+        QMessageBox.warning(self, "Error Occurred", message)
+
+        self.start_button.setDisabled(False)
 
     @Slot()
     def on_open_folder(self):
@@ -171,10 +181,78 @@ class DownloaderWidget(QWidget):
             self.dest_box.setText(QDir.fromNativeSeparators(dest_dir.path()))
 
 
-if __name__ == "__main__":
+def download_headless(url, dest_dir, segments, checksum):
+    """Download url to dest_dir without window, returns the exit code"""
+    manager = QNetworkAccessManager()
+    dest_file = os.path.join(dest_dir, url.fileName())
+    download = SegmentedDownload(manager, url, dest_file, segments, checksum)
+    elapsed = QElapsedTimer()
+    result = []
+
+    def on_progress(received, total, rate):
+        print(f"\r{received} / {total} bytes, {format_rate(rate)}", end="", flush=True)
 
-    app = QApplication(sys.argv)
+    def on_finished(digest):
+        seconds = max(elapsed.elapsed() / 1000, 1e-3)
+        received = download.size - download.resumed
+        print(f"\n{dest_file}: {download.size} bytes ({download.resumed} resumed) in "
+              f"{seconds:.2f} s, {format_rate(received / seconds)}, {digest}")
+        result.append(0)
+        QCoreApplication.quit()
+
+    def on_failed(message):
+        print(f"\nDownload failed: {message}", file=sys.stderr)
+        result.append(1)
+        QCoreApplication.quit()
+
+    download.progress.connect(on_progress)
+    download.finished.connect(on_finished)
+    download.failed.connect(on_failed)
+    elapsed.start()
+    download.start()
+    QCoreApplication.exec()
+    return result[0] if result else 1
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Downloader", formatter_class=RawTextHelpFormatter)
+    parser.add_argument("url", nargs="?", help="URL to download")
+    parser.add_argument("--output", "-o", help="destination directory")
+    parser.add_argument("--segments", "-s", type=int, default=4,
+                        help="number of parts downloaded concurrently (default 4)")
+    parser.add_argument("--checksum", help="expected checksum, e.g. sha256:<hexdigest>")
+    parser.add_argument("--headless", action="store_true",
+                        help="download the URL without window")
+    parser.add_argument("--test-server", type=int, metavar="MB",
+                        help="serve MB of random data from a local server supporting ranges\n"
+                        "and download them with --headless")
+    options, args = parser.parse_known_args()
+
+    if options.headless or options.test_server:
+        app = QCoreApplication(sys.argv[:1] + args)
+        output = options.output or QStandardPaths.writableLocation(
+            QStandardPaths.StandardLocation.DownloadLocation)
+        url = QUrl(options.url) if options.url else None
+        checksum = options.checksum
+        if options.test_server:
+            from rangeserver import RangeServer
+            server = RangeServer(os.urandom(options.test_server * 1024 * 1024))
+            if not server.listen():
+                print("Server failed to listen on a port.", file=sys.stderr)
+                sys.exit(-1)
+            url = server.url
+            checksum = f"sha256:{server.sha256}"
+        if url is None:
+            parser.error("a URL is required")
+        sys.exit(download_headless(url, output, options.segments, checksum))
+
+    app = QApplication(sys.argv[:1] + args)
 
     w = DownloaderWidget()
+    if options.url:
+        w.link_box.setText(options.url)
+    if options.output:
+        w.dest_box.setText(options.output)
+    w.segments_box.setValue(options.segments)
     w.show()
     sys.exit(app.exec())
@@ -0,0 +1,424 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Queue downloading many files with a limited number of connections per
+host, a global bandwidth limit and retries"""
+
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from PySide6.QtCore import QFile, QIODevice, QObject, QTimer, QUrl, Signal, Slot
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+
+PUMP_INTERVAL = 20  # ms
+PROGRESS_INTERVAL = 500  # ms
+THROUGHPUT_WINDOW = 2.0  # seconds
+READ_BUFFER_SIZE = 64 * 1024  # Bytes buffered by a reply when the bandwidth is limited
+MAX_BACKOFF = 30.0  # seconds
+
+# Errors after which a new attempt may succeed
+TRANSIENT_ERRORS = {
+    QNetworkReply.NetworkError.ConnectionRefusedError,
+    QNetworkReply.NetworkError.RemoteHostClosedError,
+    QNetworkReply.NetworkError.HostNotFoundError,
+    QNetworkReply.NetworkError.TimeoutError,
+    QNetworkReply.NetworkError.TemporaryNetworkFailureError,
+    QNetworkReply.NetworkError.NetworkSessionFailedError,
+    QNetworkReply.NetworkError.ProxyConnectionClosedError,
+    QNetworkReply.NetworkError.ProxyTimeoutError,
+    QNetworkReply.NetworkError.UnknownNetworkError,
+    QNetworkReply.NetworkError.InternalServerError,
+    QNetworkReply.NetworkError.ServiceUnavailableError,
+    QNetworkReply.NetworkError.UnknownServerError,
+}
+
+
+class TokenBucket:
+    """Allows `rate` bytes per second on average, with bursts of at most
+       `burst` bytes."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(rate // 4, READ_BUFFER_SIZE)
+        self._tokens = self.burst
+        self._time = time.monotonic()
+
+    def available(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._time) * self.rate)
+        self._time = now
+        return int(self._tokens)
+
+    def take(self, count):
+        self._tokens -= count
+
+
+@dataclass
+class QueueItem:
+    url: QUrl
+    path: str
+    state: str = "pending"  # pending, active, waiting (before a retry), done, failed
+    attempts: int = 0
+    size: int = -1
+    received: int = 0
+    ranged: bool = False  # The server accepts ranges, a retry resumes the file
+    etag: str = ""
+    error: str = ""
+    started: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def host(self):
+        return self.url.host()
+
+    @property
+    def part_path(self):
+        return self.path + ".part"
+
+    @property
+    def throughput(self):
+        return self.received / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class QueueStats:
+    files: int = 0
+    done: int = 0
+    failed: int = 0
+    retries: int = 0
+    received: int = 0  # Bytes received, including those of the failed attempts
+    elapsed: float = 0.0
+    per_file: list = field(default_factory=list)  # The finished QueueItems
+
+    @property
+    def throughput(self):
+        return self.received / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class DownloadQueue(QObject):
+    """Downloads the queued files with at most `per_host` concurrent
+    requests per host and `max_active` in total.
+
+    All requests go through one QNetworkAccessManager, which keeps the
+    connections alive and reuses them for the next files of the same host.
+    Note that it opens at most 6 connections per host, the requests above
+    are queued by the manager.
+
+    When `bandwidth` is given in bytes per second, the replies are read by
+    a timer from a token bucket shared by all the downloads, and their read
+    buffer is limited so that TCP slows down the servers.
+
+    A failed attempt is retried up to `retries` times after an exponential
+    backoff with jitter when the error is transient (connection errors,
+    5xx and 429 statuses). The retry resumes the ".part" file if the server
+    accepts ranges."""
+
+    file_started = Signal(object)  # QueueItem
+    file_finished = Signal(object)
+    file_failed = Signal(object)
+    progress = Signal(int, int, float)  # files done or failed, files, bytes/s
+    finished = Signal(object)  # QueueStats
+
+    def __init__(self, manager=None, per_host=4, max_active=16, bandwidth=0, retries=3,
+                 backoff=0.5, parent=None):
+        super().__init__(parent)
+        self._manager = manager or QNetworkAccessManager(self)
+        self.per_host = per_host
+        self.max_active = max_active
+        self.retries = retries
+        self.backoff = backoff
+        self._bucket = TokenBucket(bandwidth) if bandwidth > 0 else None
+
+        self.items = []
+        self.stats = QueueStats()
+        self._pending = {}  # host -> deque of QueueItems
+        self._hosts = deque()  # Hosts with pending items, in round robin order
+        self._active = {}  # host -> count of active requests
+        self._replies = {}  # QNetworkReply -> (QueueItem, QFile)
+        self._drained = []  # Finished replies with buffered data, when shaped
+        self._waiting = 0
+        self._running = False
+        self._started = 0.0
+        self._samples = deque()
+
+        self._pump_timer = QTimer(self)
+        self._pump_timer.setInterval(PUMP_INTERVAL)
+        self._pump_timer.timeout.connect(self._pump)
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(PROGRESS_INTERVAL)
+        self._progress_timer.timeout.connect(self._report_progress)
+
+    def add(self, url, path):
+        item = QueueItem(QUrl(url), path)
+        self.items.append(item)
+        self.stats.files += 1
+        self._enqueue(item)
+        if self._running:
+            self._schedule()
+        return item
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._started = time.monotonic()
+        self._samples.append((self._started, 0))
+        self._progress_timer.start()
+        if self._bucket:
+            self._pump_timer.start()
+        self._schedule()
+        self._check_finished()
+
+    def abort(self):
+        """Abort the active downloads, their ".part" files are kept."""
+        self._running = False
+        for host in list(self._pending):
+            for item in self._pending.pop(host):
+                item.error = "Aborted"
+                self._finish(item, False)
+        self._hosts.clear()
+        for reply in list(self._replies):
+            reply.abort()
+        self._check_finished()
+
+    @property
+    def idle(self):
+        return not self._hosts and not self._replies and not self._waiting
+
+    def _enqueue(self, item, first=False):
+        item.state = "pending"
+        queue = self._pending.get(item.host)
+        if queue is None:
+            queue = self._pending[item.host] = deque()
+            self._hosts.append(item.host)
+        if first:
+            queue.appendleft(item)
+        else:
+            queue.append(item)
+
+    def _schedule(self):
+        # Round robin on the hosts, so that a host with many files does not
+        # delay the others
+        blocked = 0
+        while self._hosts and len(self._replies) < self.max_active and blocked < len(self._hosts):
+            host = self._hosts[0]
+            self._hosts.rotate(-1)
+            if self._active.get(host, 0) >= self.per_host:
+                blocked += 1
+                continue
+            blocked = 0
+            queue = self._pending[host]
+            item = queue.popleft()
+            if not queue:
+                del self._pending[host]
+                self._hosts.remove(host)
+            self._start(item)
+
+    def _start(self, item):
+        if not item.attempts:
+            item.started = time.monotonic()
+        file = QFile(item.part_path)
+        resume = item.ranged and item.received > 0
+        mode = QIODevice.OpenModeFlag.WriteOnly
+        mode |= QIODevice.OpenModeFlag.Append if resume else QIODevice.OpenModeFlag.Truncate
+        if not file.open(mode):
+            item.error = file.errorString()
+            self._finish(item, False)
+            return
+        if not resume:
+            item.received = 0
+
+        request = QNetworkRequest(item.url)
+        if resume:
+            request.setRawHeader(b"Range", f"bytes={item.received}-".encode())
+            if item.etag:
+                # The server sends the whole file if it changed
+                request.setRawHeader(b"If-Range", item.etag.encode())
+        reply = self._manager.get(request)
+        if self._bucket:
+            reply.setReadBufferSize(READ_BUFFER_SIZE)
+        else:
+            reply.readyRead.connect(self._read)
+        reply.metaDataChanged.connect(self._meta_data_changed)
+        reply.finished.connect(self._reply_finished)
+
+        self._replies[reply] = (item, file)
+        self._active[item.host] = self._active.get(item.host, 0) + 1
+        item.state = "active"
+        item.attempts += 1
+        if item.attempts == 1:
+            self.file_started.emit(item)
+
+    @Slot()
+    def _meta_data_changed(self):
+        reply = self.sender()
+        entry = self._replies.get(reply)
+        if entry is None:
+            return
+        item, file = entry
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        if status == 200 and item.received:
+            # The range was ignored, or the file changed
+            file.resize(0)
+            file.seek(0)
+            self.stats.received -= item.received
+            item.received = 0
+        if status == 206:
+            _, _, size = bytes(reply.rawHeader("Content-Range")).decode().rpartition("/")
+            item.size = int(size) if size.isdigit() else -1
+        elif status == 200:
+            length = reply.header(QNetworkRequest.KnownHeaders.ContentLengthHeader)
+            item.size = int(length) if length is not None else -1
+        if status in (200, 206):
+            item.ranged = bytes(reply.rawHeader("Accept-Ranges")).decode() == "bytes"
+            item.etag = bytes(reply.rawHeader("ETag")).decode()
+
+    def _accepts(self, reply):
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        return status in (200, 206) or status is None
+
+    def _write(self, reply, max_size=-1):
+        item, file = self._replies[reply]
+        data = reply.read(max_size) if max_size >= 0 else reply.readAll()
+        if self._accepts(reply):  # The body of an error is not the file
+            file.write(data)
+            item.received += data.size()
+            self.stats.received += data.size()
+        return data.size()
+
+    @Slot()
+    def _read(self):
+        reply = self.sender()
+        if reply in self._replies:
+            self._write(reply)
+
+    @Slot()
+    def _pump(self):
+        """Share the available tokens between the replies."""
+        replies = [reply for reply in self._replies if reply.bytesAvailable()]
+        tokens = self._bucket.available()
+        while replies and tokens > 0:
+            share = max(tokens // len(replies), 1)
+            for reply in list(replies):
+                read = self._write(reply, min(share, tokens))
+                self._bucket.take(read)
+                tokens -= read
+                if not reply.bytesAvailable():
+                    replies.remove(reply)
+                if tokens <= 0:
+                    break
+        for reply in list(self._drained):
+            if not reply.bytesAvailable():
+                self._drained.remove(reply)
+                self._complete(reply)
+
+    @Slot()
+    def _reply_finished(self):
+        reply = self.sender()
+        if reply not in self._replies:
+            reply.deleteLater()
+            return
+        if self._bucket and reply.bytesAvailable() and self._accepts(reply):
+            self._drained.append(reply)  # Completed once read by the pump
+            return
+        self._complete(reply)
+
+    def _complete(self, reply):
+        item, file = self._replies.pop(reply)
+        self._active[item.host] -= 1
+        reply.deleteLater()
+        file.close()
+
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        error = reply.error()
+        if error == QNetworkReply.NetworkError.NoError and status in (200, 206):
+            if item.size < 0 or item.received == item.size:
+                QFile.remove(item.path)
+                if QFile.rename(item.part_path, item.path):
+                    self._finish(item, True)
+                else:
+                    item.error = f"Cannot rename {item.part_path} to {item.path}"
+                    self._finish(item, False)
+                self._schedule()
+                return
+            item.error = f"Received {item.received} of {item.size} bytes"
+            transient = True
+        elif error == QNetworkReply.NetworkError.OperationCanceledError and not self._running:
+            item.error = "Aborted"
+            transient = False
+        else:
+            item.error = reply.errorString()
+            transient = error in TRANSIENT_ERRORS or status == 429 or (status or 0) >= 500
+
+        if transient and self._running and item.attempts <= self.retries:
+            self._retry(item, reply)
+        else:
+            self._finish(item, False)
+        self._schedule()
+
+    def _retry(self, item, reply):
+        delay = min(self.backoff * 2 ** (item.attempts - 1), MAX_BACKOFF)
+        retry_after = bytes(reply.rawHeader("Retry-After")).decode()
+        if retry_after.isdigit():
+            delay = max(delay, min(int(retry_after), MAX_BACKOFF))
+        # The jitter avoids retrying all the files of a host at the same time
+        delay *= random.uniform(0.5, 1.0)
+        item.state = "waiting"
+        self._waiting += 1
+        self.stats.retries += 1
+
+        def requeue():
+            self._waiting -= 1
+            if self._running:
+                self._enqueue(item, first=True)
+                self._schedule()
+            else:
+                self._finish(item, False)
+
+        QTimer.singleShot(int(delay * 1000), self, requeue)
+
+    def _finish(self, item, success):
+        item.elapsed = time.monotonic() - item.started
+        if success:
+            item.state = "done"
+            item.error = ""
+            self.stats.done += 1
+            self.stats.per_file.append(item)
+            self.file_finished.emit(item)
+        else:
+            item.state = "failed"
+            self.stats.failed += 1
+            self.file_failed.emit(item)
+        self._check_finished()
+
+    def _check_finished(self):
+        if not self.idle:
+            return
+        if not self._progress_timer.isActive():
+            return  # Already finished
+        self._running = False
+        self._pump_timer.stop()
+        self._progress_timer.stop()
+        self.stats.elapsed = time.monotonic() - self._started
+        self._report_progress()
+        self.finished.emit(self.stats)
+
+    def throughput(self):
+        """Bytes per second of all the downloads over the last seconds."""
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, r0), (t1, r1) = self._samples[0], self._samples[-1]
+        return (r1 - r0) / (t1 - t0) if t1 > t0 else 0.0
+
+    @Slot()
+    def _report_progress(self):
+        now = time.monotonic()
+        self._samples.append((now, self.stats.received))
+        while len(self._samples) > 2 and now - self._samples[0][0] > THROUGHPUT_WINDOW:
+            self._samples.popleft()
+        self.progress.emit(self.stats.done + self.stats.failed, self.stats.files,
+                           self.throughput())
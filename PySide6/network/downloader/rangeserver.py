@@ -0,0 +1,138 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Local HTTP server supporting Range requests, to try the downloader
+offline"""
+
+import hashlib
+import os
+import re
+import sys
+
+from PySide6.QtCore import QByteArray, QCoreApplication, QObject, QUrl
+from PySide6.QtHttpServer import QHttpServer, QHttpServerResponder, QHttpServerResponse
+from PySide6.QtNetwork import QHostAddress, QHttpHeaders, QTcpServer
+
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def parse_range(value, size):
+    """Return the (first, last) bytes of a single range "Range" header,
+       None if there is no range and () if it is not satisfiable."""
+    if not value:
+        return None
+    match = RANGE_PATTERN.match(value.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return ()
+    if not match.group(1):  # Suffix range, the last n bytes
+        length = int(match.group(2))
+        return (max(size - length, 0), size - 1) if length else ()
+    first = int(match.group(1))
+    last = int(match.group(2)) if match.group(2) else size - 1
+    if first >= size or last < first:
+        return ()
+    return first, min(last, size - 1)
+
+
+class RangeServer(QObject):
+    """Serves `data` at `path`, and the files added with add_file(), with
+    support of single range requests.
+
+    The first `fail_first` requests of each file are answered with a 503
+    error, to try the retries of the clients.
+
+    The route handlers can only return text with PySide6, the binary
+    response replaces the placeholder of the route in an after request
+    handler."""
+
+    def __init__(self, data, path="/data.bin", fail_first=0, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.fail_first = fail_first
+        self.requests = 0
+        self._files = {}  # path -> (data, sha256)
+        self._failures = {}  # path -> count of the failed requests
+        self._http_server = QHttpServer(self)
+        # The handlers are not referenced by QHttpServer, they must be kept
+        self._handlers = (lambda request: "", self._respond)
+        self._http_server.addAfterRequestHandler(self, self._handlers[1])
+        self._tcp_server = QTcpServer(self)
+        self.add_file(path, data)
+
+    def add_file(self, path, data):
+        self._files[path] = (data, hashlib.sha256(data).hexdigest())
+        self._http_server.route(path, self._handlers[0])
+
+    @property
+    def data(self):
+        return self._files[self.path][0]
+
+    @property
+    def sha256(self):
+        return self._files[self.path][1]
+
+    def checksum(self, path):
+        return f"sha256:{self._files[path][1]}"
+
+    def listen(self, port=0):
+        return (self._tcp_server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost), port)
+                and self._http_server.bind(self._tcp_server))
+
+    @property
+    def url(self):
+        return self.url_of(self.path)
+
+    def url_of(self, path):
+        return QUrl(f"http://127.0.0.1:{self._tcp_server.serverPort()}{path}")
+
+    def _respond(self, request, response):
+        path = request.url().path()
+        if path not in self._files:
+            return
+        self.requests += 1
+        data, sha256 = self._files[path]
+        size = len(data)
+        value = bytes(request.headers().value(QHttpHeaders.WellKnownHeader.Range)).decode()
+        byte_range = parse_range(value, size)
+        failures = self._failures.get(path, 0)
+        if failures < self.fail_first:
+            self._failures[path] = failures + 1
+            status = QHttpServerResponder.StatusCode.ServiceUnavailable
+            body = b""
+            byte_range = None
+        elif byte_range == ():
+            status = QHttpServerResponder.StatusCode.RequestRangeNotSatisfiable
+            body = b""
+        elif byte_range is None:
+            status = QHttpServerResponder.StatusCode.Ok
+            body = data
+        else:
+            status = QHttpServerResponder.StatusCode.PartialContent
+            first, last = byte_range
+            body = data[first:last + 1]
+
+        new_response = QHttpServerResponse(b"application/octet-stream", QByteArray(body), status)
+        headers = new_response.headers()
+        headers.append(QHttpHeaders.WellKnownHeader.AcceptRanges, "bytes")
+        headers.append(QHttpHeaders.WellKnownHeader.ETag, f'"{sha256[:16]}"')
+        if byte_range == ():
+            headers.append(QHttpHeaders.WellKnownHeader.ContentRange, f"bytes */{size}")
+        elif byte_range is not None:
+            headers.append(QHttpHeaders.WellKnownHeader.ContentRange,
+                           f"bytes {first}-{last}/{size}")
+        new_response.setHeaders(headers)
+        response.swap(new_response)
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    server = RangeServer(os.urandom(size * 1024 * 1024))
+    if not server.listen():
+        print("Server failed to listen on a port.", file=sys.stderr)
+        sys.exit(-1)
+    print(f"Serving {size} MB on {server.url.toString()}")
+    print(f"sha256:{server.sha256}")
+    sys.exit(app.exec())
@@ -0,0 +1,335 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Download of a file by concurrent byte ranges, which can be resumed"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+from PySide6.QtCore import QFile, QIODevice, QObject, QTimer, Signal, Slot
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+
+PROGRESS_INTERVAL = 200  # ms
+MANIFEST_INTERVAL = 1000  # ms
+THROUGHPUT_WINDOW = 2.0  # seconds
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class Segment:
+    start: int
+    end: int  # Last byte, -1 when the size is unknown
+    received: int = 0
+
+    @property
+    def complete(self):
+        return self.end >= 0 and self.start + self.received > self.end
+
+
+def split(size, count):
+    """Split size bytes in count segments of about the same length."""
+    count = max(1, min(count, size))
+    bounds = [size * i // count for i in range(count + 1)]
+    return [Segment(bounds[i], bounds[i + 1] - 1) for i in range(count)]
+
+
+def content_range_size(reply):
+    """Return the total size of a "Content-Range: bytes a-b/size" header, -1
+       if unknown."""
+    value = bytes(reply.rawHeader("Content-Range")).decode()
+    _, _, size = value.rpartition("/")
+    return int(size) if size.isdigit() else -1
+
+
+class SegmentedDownload(QObject):
+    """Downloads url to path using `segments` concurrent range requests.
+
+    A first request of the first byte tells whether the server supports
+    ranges and the size of the file, else the file is downloaded with a
+    single request. The segments are written at their offset in a
+    preallocated "<path>.part" file. The received ranges are saved to the
+    "<path>.part.json" manifest, a new download of the same url and path
+    resumes from it if the size and the ETag of the file did not change.
+
+    Once complete, the file is hashed in a thread. When `checksum` is given
+    as "algorithm:hexdigest" and does not match, the download fails,
+    otherwise the file is renamed to path.
+
+    Note that QNetworkAccessManager opens at most 6 connections per host,
+    more segments are queued."""
+
+    progress = Signal(int, int, float)  # received, total (-1 if unknown), bytes/s
+    finished = Signal(str)  # "algorithm:hexdigest" of the file
+    failed = Signal(str)
+
+    _hashed = Signal(str)
+
+    def __init__(self, manager, url, path, segments=4, checksum=None, parent=None):
+        super().__init__(parent)
+        self._manager = manager
+        self._url = url
+        self.path = path
+        self.part_path = path + ".part"
+        self.manifest_path = path + ".part.json"
+        self._segment_count = segments
+        self._algorithm, _, self._checksum = (checksum or "sha256:").partition(":")
+        self._algorithm = self._algorithm.lower()
+
+        self.size = -1
+        self.ranged = False
+        self.resumed = 0  # Bytes already there when the download started
+        self._etag = ""
+        self._segments = []
+        self._replies = {}
+        self._checked = set()
+        self._file = None
+        self._probe = None
+        self._stopped = False
+        # Set once all the segments are complete, the file is hashed once
+        self._completing = False
+
+        self._samples = deque()
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(PROGRESS_INTERVAL)
+        self._progress_timer.timeout.connect(self._report_progress)
+        self._manifest_timer = QTimer(self)
+        self._manifest_timer.setInterval(MANIFEST_INTERVAL)
+        self._manifest_timer.timeout.connect(self._save_manifest)
+        self._hashed.connect(self._verify)
+
+    @property
+    def received(self):
+        return sum(segment.received for segment in self._segments)
+
+    def start(self):
+        request = QNetworkRequest(self._url)
+        request.setRawHeader(b"Range", b"bytes=0-0")
+        self._probe = self._manager.get(request)
+        self._probe.metaDataChanged.connect(self._probed)
+        self._probe.finished.connect(self._probe_finished)
+
+    def abort(self):
+        """Stop the download, it can be resumed later."""
+        self._stop()
+        self._save_manifest()
+        self._close()
+
+    @Slot()
+    def _probed(self):
+        # The meta data changes again after a redirect, for instance
+        reply = self._probe
+        if reply is None:
+            return
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        if status is not None and 300 <= status < 400:
+            return  # The redirect is followed
+        self._probe = None
+        self._etag = bytes(reply.rawHeader("ETag")).decode()
+        if status == 206:
+            self.ranged = True
+            self.size = content_range_size(reply)
+        else:
+            length = reply.header(QNetworkRequest.KnownHeaders.ContentLengthHeader)
+            self.size = int(length) if length is not None else -1
+        # The first byte, or the whole file when ranges are not supported,
+        # is not needed
+        reply.abort()
+        if status not in (200, 206) or (self.ranged and self.size < 0):
+            self._fail(f"Unexpected response to the probe: {status}")
+            return
+        self._begin()
+
+    @Slot()
+    def _probe_finished(self):
+        reply = self.sender()
+        if self._probe is reply:  # Finished without headers
+            self._probe = None
+            self._fail(reply.errorString())
+        reply.deleteLater()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (manifest.get("url") != self._url.toString() or manifest.get("size") != self.size
+                or manifest.get("etag") != self._etag or not QFile.exists(self.part_path)
+                or QFile(self.part_path).size() != self.size):
+            return None
+        return [Segment(*segment) for segment in manifest["segments"]]
+
+    @Slot()
+    def _save_manifest(self):
+        if not self.ranged or not self._segments or self._file is None:
+            return
+        # The data must be written before the manifest refers to it
+        self._file.flush()
+        manifest = {
+            "url": self._url.toString(),
+            "size": self.size,
+            "etag": self._etag,
+            "segments": [list(asdict(segment).values()) for segment in self._segments],
+        }
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+    def _begin(self):
+        segments = self._load_manifest() if self.ranged else None
+        mode = QIODevice.OpenModeFlag.ReadWrite
+        if segments is None:
+            QFile.remove(self.manifest_path)
+            mode |= QIODevice.OpenModeFlag.Truncate
+            if self.ranged:
+                segments = split(self.size, self._segment_count)
+            else:
+                segments = [Segment(0, self.size - 1 if self.size > 0 else -1)] if self.size else []
+        self._segments = segments
+        self.resumed = self.received
+
+        self._file = QFile(self.part_path)
+        if not self._file.open(mode):
+            self._fail(self._file.errorString())
+            return
+        if self.size > 0 and not self._file.resize(self.size):
+            self._fail(self._file.errorString())
+            return
+
+        self._samples.append((time.monotonic(), self.received))
+        for segment in self._segments:
+            if not segment.complete:
+                self._request(segment)
+        self._progress_timer.start()
+        self._manifest_timer.start()
+        self._check_complete()
+
+    def _request(self, segment):
+        request = QNetworkRequest(self._url)
+        if self.ranged:
+            first = segment.start + segment.received
+            request.setRawHeader(b"Range", f"bytes={first}-{segment.end}".encode())
+        reply = self._manager.get(request)
+        self._replies[reply] = segment
+        reply.readyRead.connect(self._read)
+        reply.finished.connect(self._segment_finished)
+
+    @Slot()
+    def _read(self):
+        reply = self.sender()
+        segment = self._replies.get(reply)
+        if segment is None or self._stopped or self._completing:
+            return
+        if reply not in self._checked:
+            # A server ignoring the range would send the file from its start
+            status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+            if status != (206 if self.ranged else 200):
+                self._fail(f"Unexpected response to a range request: {status}")
+                return
+            self._checked.add(reply)
+        data = reply.readAll()
+        self._file.seek(segment.start + segment.received)
+        self._file.write(data)
+        segment.received += data.size()
+
+    @Slot()
+    def _segment_finished(self):
+        reply = self.sender()
+        segment = self._replies.pop(reply, None)
+        self._checked.discard(reply)
+        reply.deleteLater()
+        if segment is None or self._stopped or self._completing:
+            return
+        if reply.error() != QNetworkReply.NetworkError.NoError:
+            self._fail(reply.errorString())
+            return
+        if segment.end < 0:  # Unknown size, the end of the reply is the end of the file
+            segment.end = segment.start + segment.received - 1
+            self.size = segment.received
+        if not segment.complete:
+            self._fail("The connection was closed before the end of a segment")
+            return
+        self._check_complete()
+
+    def _check_complete(self):
+        if (self._stopped or self._completing
+                or not all(segment.complete for segment in self._segments)):
+            return
+        self._completing = True
+        self._progress_timer.stop()
+        self._manifest_timer.stop()
+        self._report_progress()
+        self._save_manifest()
+        self._close()
+        threading.Thread(target=self._hash, daemon=True).start()
+
+    def _hash(self):
+        # Runs in a thread, the result is queued to the thread of the object
+        digest = hashlib.new(self._algorithm)
+        with open(self.part_path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        try:
+            self._hashed.emit(digest.hexdigest())
+        except RuntimeError:  # The download was deleted while hashing
+            pass
+
+    @Slot(str)
+    def _verify(self, digest):
+        if self._stopped:  # Aborted while hashing
+            return
+        checksum = f"{self._algorithm}:{digest}"
+        if self._checksum and digest != self._checksum.lower():
+            # The data is wrong, the next download starts over
+            QFile.remove(self.manifest_path)
+            self.failed.emit(f"Checksum mismatch, expected {self._algorithm}:{self._checksum}, "
+                             f"got {checksum}")
+            return
+        QFile.remove(self.path)
+        if not QFile.rename(self.part_path, self.path):
+            self.failed.emit(f"Cannot rename {self.part_path} to {self.path}")
+            return
+        QFile.remove(self.manifest_path)
+        self.finished.emit(checksum)
+
+    def throughput(self):
+        """Bytes per second over the last seconds."""
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, r0), (t1, r1) = self._samples[0], self._samples[-1]
+        return (r1 - r0) / (t1 - t0) if t1 > t0 else 0.0
+
+    @Slot()
+    def _report_progress(self):
+        now = time.monotonic()
+        self._samples.append((now, self.received))
+        while len(self._samples) > 2 and now - self._samples[0][0] > THROUGHPUT_WINDOW:
+            self._samples.popleft()
+        self.progress.emit(self.received, self.size, self.throughput())
+
+    def _stop(self):
+        self._stopped = True
+        self._progress_timer.stop()
+        self._manifest_timer.stop()
+        if self._probe is not None:
+            self._probe.abort()
+        for reply in list(self._replies):
+            reply.abort()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _fail(self, message):
+        if self._stopped:
+            return
+        self._stop()
+        self._save_manifest()
+        self._close()
+        self.failed.emit(message)
@@ -0,0 +1,92 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Tests of the completion of the segmented downloads, run with
+python -m unittest test_segmenteddownload"""
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from PySide6.QtNetwork import QNetworkAccessManager
+
+from rangeserver import RangeServer
+from segmenteddownload import SegmentedDownload, split
+
+
+class CountingDownload(SegmentedDownload):
+    """Counts the hashes of the completed file."""
+
+    hashes = 0
+
+    def _hash(self):
+        type(self).hashes += 1
+        super()._hash()
+
+
+class CompletionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        CountingDownload.hashes = 0
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "data.bin")
+        self.manager = QNetworkAccessManager()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def wait(self, download, timeout=10000):
+        """Run the event loop until the download ends, return the messages
+        of the finished and failed signals."""
+        results = []
+        loop = QEventLoop()
+        download.finished.connect(lambda checksum: results.append(("finished", checksum)))
+        download.failed.connect(lambda message: results.append(("failed", message)))
+        download.finished.connect(loop.quit)
+        download.failed.connect(loop.quit)
+        QTimer.singleShot(timeout, loop.quit)
+        loop.exec()
+        # Let the late replies and hashes come in
+        QTimer.singleShot(200, loop.quit)
+        loop.exec()
+        return results
+
+    def test_segments_finishing_after_their_data(self):
+        """Each reply finishing once all the data arrived completes the
+        download again, the file must be hashed and renamed once."""
+        data = os.urandom(4096)
+        with open(self.path + ".part", "wb") as f:
+            f.write(data)
+        download = CountingDownload(self.manager, None, self.path, segments=4)
+        download._segments = split(len(data), 4)
+        for segment in download._segments:
+            segment.received = segment.end - segment.start + 1
+        for _ in download._segments:
+            download._check_complete()
+        results = self.wait(download)
+        self.assertEqual(CountingDownload.hashes, 1)
+        self.assertEqual([kind for kind, _ in results], ["finished"])
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_download(self):
+        server = RangeServer(os.urandom(256 * 1024))
+        self.assertTrue(server.listen())
+        download = CountingDownload(self.manager, server.url, self.path, segments=6,
+                                    checksum=f"sha256:{server.sha256}")
+        download.start()
+        results = self.wait(download)
+        self.assertEqual(results, [("finished", f"sha256:{server.sha256}")])
+        self.assertEqual(CountingDownload.hashes, 1)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), server.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,18 +2,29 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
-from PySide6.QtCore import (QByteArray, QEvent, QObject, QPoint, Qt, QTimer,
-                            QXmlStreamReader, Slot)
+import time
+
+from PySide6.QtCore import QEvent, QObject, QPoint, Qt, QTimer, Signal, Slot
 from PySide6.QtGui import QPalette
-from PySide6.QtNetwork import (QNetworkAccessManager, QNetworkReply,
-                               QNetworkRequest)
 from PySide6.QtWidgets import QAbstractItemView, QFrame, QTreeWidget, QTreeWidgetItem
 
+from suggestionproviders import RemoteProvider
+
 
 class GSuggestCompletion(QObject):
-    def __init__(self, parent=None):
+    """Shows the suggestions of a provider, by default Google, in a popup
+    below the editor. The time from the last keystroke to the popup is
+    signaled and kept in latencies."""
+
+    shown = Signal(float)  # seconds since the keystroke
+
+    def __init__(self, parent=None, provider=None):
         super().__init__(parent)
         self.editor = parent
+        self.provider = provider or RemoteProvider(parent=self)
+        self.provider.suggestions.connect(self.handle_suggestions)
+        self.latencies = []
+        self._keystroke = 0.0
         self.popup = QTreeWidget()
         self.popup.setWindowFlags(Qt.WindowType.Popup)
         self.popup.setFocusPolicy(Qt.FocusPolicy.NoFocus)
@@ -35,12 +46,9 @@ class GSuggestCompletion(QObject):
 
         self.timer = QTimer()
         self.timer.setSingleShot(True)
-        self.timer.setInterval(500)
+        self.timer.setInterval(self.provider.debounce)
         self.timer.timeout.connect(self.auto_suggest)
-        self.editor.textEdited.connect(self.timer.start)
-
-        self.network_manager = QNetworkAccessManager()
-        self.network_manager.finished.connect(self.handle_network_data)
+        self.editor.textEdited.connect(self.text_edited)
 
     def eventFilter(self, obj: QObject, ev: QEvent):
         if obj is not self.popup:
@@ -98,6 +106,10 @@ class GSuggestCompletion(QObject):
         self.popup.setFocus()
         self.popup.show()
 
+        latency = time.perf_counter() - self._keystroke
+        self.latencies.append(latency)
+        self.shown.emit(latency)
+
     @Slot()
     def done_completion(self):
         self.timer.stop()
@@ -108,28 +120,22 @@ class GSuggestCompletion(QObject):
             self.editor.setText(item.text(0))
             self.editor.returnPressed.emit()
 
+    @Slot()
+    def text_edited(self):
+        self._keystroke = time.perf_counter()
+        # The suggestions of the previous text are not wanted anymore
+        self.provider.cancel()
+        self.timer.start()
+
     @Slot()
     def auto_suggest(self):
-        s = self.editor.text()
-        url = f"https://google.com/complete/search?output=toolbar&q={s}"
-        self.network_manager.get(QNetworkRequest(url))
+        self.provider.request(self.editor.text())
 
     def prevent_suggest(self):
         self.timer.stop()
+        self.provider.cancel()
 
-    @Slot(QNetworkReply)
-    def handle_network_data(self, network_reply: QNetworkReply):
-        if network_reply.error() == QNetworkReply.NetworkError.NoError:
-            choices: list[str] = []
-
-            response: QByteArray = network_reply.readAll()
-            xml = QXmlStreamReader(str(response))
-            while not xml.atEnd():
-                xml.readNext()
-                if xml.tokenType() == QXmlStreamReader.TokenType.StartElement:
-                    if xml.name() == "suggestion":
-                        s = xml.attributes().value("data")
-                        choices.append(s)
+    @Slot(str, list)
+    def handle_suggestions(self, text: str, choices: list[str]):
+        if text == self.editor.text():
             self.show_completion(choices)
-
-        network_reply.deleteLater()
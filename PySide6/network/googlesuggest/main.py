@@ -3,13 +3,25 @@
 from __future__ import annotations
 
 import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
 
 from PySide6.QtWidgets import QApplication
 
 from searchbox import SearchBox
+from suggestionproviders import PrefixIndexProvider
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    search_edit = SearchBox()
+    parser = ArgumentParser(description="Google Suggest", formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--words", help="suggest the words of this list, one per line,\n"
+                        "instead of asking Google")
+    parser.add_argument("--latency", action="store_true",
+                        help="print the time from the keystroke to the popup")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+    provider = PrefixIndexProvider.from_file(options.words) if options.words else None
+    search_edit = SearchBox(provider=provider)
+    if options.latency:
+        search_edit.completer.shown.connect(lambda latency: print(f"{1000 * latency:.1f} ms"))
     search_edit.show()
     sys.exit(app.exec())
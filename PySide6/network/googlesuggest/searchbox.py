@@ -10,9 +10,9 @@ from googlesuggest import GSuggestCompletion
 
 
 class SearchBox(QLineEdit):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, provider=None):
         super().__init__(parent)
-        self.completer = GSuggestCompletion(self)
+        self.completer = GSuggestCompletion(self, provider)
 
         self.returnPressed.connect(self.do_search)
         self.setWindowTitle("Search with Google")
@@ -0,0 +1,152 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Measures the time from a keystroke to the suggestion popup for each
+provider, by typing words in a SearchBox.
+
+The remote provider is served offline by a local QHttpServer answering in
+the XML format of the Google toolbar from the same word list."""
+
+import os
+import random
+import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
+from xml.sax.saxutils import quoteattr
+
+from PySide6.QtCore import QTimer, QUrl
+from PySide6.QtHttpServer import QHttpServer
+from PySide6.QtNetwork import QHostAddress, QTcpServer
+from PySide6.QtWidgets import QApplication
+
+from searchbox import SearchBox
+from suggestionproviders import PrefixIndexProvider, RemoteProvider
+
+
+DICTIONARY = "/usr/share/dict/words"
+
+
+def generate_words(count, seed=0):
+    rng = random.Random(seed)
+    letters = "etaoinshrdlucmfwypvbgkjqxz"
+    weights = range(len(letters), 0, -1)
+    return ["".join(rng.choices(letters, weights, k=rng.randint(3, 12))) for _ in range(count)]
+
+
+class SuggestServer:
+    """Serves the suggestions of an index at /complete/search?q=text."""
+
+    def __init__(self, index):
+        self._index = index
+        self._http_server = QHttpServer()
+        # The handler is not referenced by QHttpServer, it must be kept
+        self._handler = self._complete
+        self._http_server.route("/complete/search", self._handler)
+        self._tcp_server = QTcpServer()
+
+    def listen(self):
+        return (self._tcp_server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost))
+                and self._http_server.bind(self._tcp_server))
+
+    @property
+    def url(self):
+        port = self._tcp_server.serverPort()
+        return QUrl(f"http://127.0.0.1:{port}/complete/search?output=toolbar")
+
+    def _complete(self, request):
+        text = request.query().queryItemValue("q")
+        suggestions = "".join(f"<CompleteSuggestion><suggestion data={quoteattr(word)}/>"
+                              "</CompleteSuggestion>" for word in self._index.lookup(text))
+        return f'<?xml version="1.0"?><toplevel>{suggestions}</toplevel>'
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def type_words(box, words, interval, pause):
+    """Type the words in box one keystroke every interval ms, pausing pause
+       ms at the end of each word, and return once all are typed."""
+    steps = []
+    for word in words:
+        steps += [word[:i] for i in range(1, len(word) + 1)]
+        steps.append(None)
+    steps.reverse()
+    completion = box.completer
+
+    def next_step():
+        if not steps:
+            QApplication.quit()
+            return
+        text = steps.pop()
+        if text is None:  # End of the word
+            completion.prevent_suggest()
+            completion.popup.hide()
+            box.clear()
+            QTimer.singleShot(interval, next_step)
+            return
+        box.setText(text)
+        box.textEdited.emit(text)
+        QTimer.singleShot(pause if steps[-1] is None else interval, next_step)
+
+    next_step()
+    QApplication.exec()
+
+
+def report(name, completion, keystrokes, extra=""):
+    latencies = completion.latencies
+    print(f"{name:>8}: {len(latencies):5d} popups for {keystrokes} keystrokes, "
+          f"p50 {1000 * percentile(latencies, 50):7.1f} ms, "
+          f"p99 {1000 * percentile(latencies, 99):7.1f} ms, "
+          f"max {1000 * max(latencies, default=0):7.1f} ms{extra}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Keystroke to popup latency of the suggestion providers",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--words", help=f"word list, one per line (default {DICTIONARY}\n"
+                        "or generated words)")
+    parser.add_argument("--typed", "-n", type=int, default=30,
+                        help="number of words typed (default 30)")
+    parser.add_argument("--interval", type=int, default=120,
+                        help="time between the keystrokes in ms (default 120)")
+    parser.add_argument("--pause", type=int, default=600,
+                        help="pause at the end of each word in ms (default 600)")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+
+    words_path = options.words or (DICTIONARY if os.path.exists(DICTIONARY) else None)
+    if words_path:
+        index = PrefixIndexProvider.from_file(words_path)
+    else:
+        index = PrefixIndexProvider(generate_words(200_000))
+    # Words sharing their first letters, as typed by a user, hit the cache
+    rng = random.Random(1)
+    candidates = [word for word in index.words if len(word) > 3]
+    typed = rng.choices(rng.sample(candidates, max(1, options.typed // 2)), k=options.typed)
+    keystrokes = sum(len(word) for word in typed)
+    print(f"{len(index)} words, {options.typed} typed, {keystrokes} keystrokes "
+          f"every {options.interval} ms")
+
+    server = SuggestServer(index)
+    if not server.listen():
+        print("Server failed to listen on a port.", file=sys.stderr)
+        sys.exit(-1)
+
+    local = SearchBox(provider=index)
+    local.show()
+    type_words(local, typed, options.interval, options.pause)
+    report(index.name, local.completer, keystrokes)
+    local.close()
+
+    remote = RemoteProvider(server.url)
+    box = SearchBox(provider=remote)
+    box.show()
+    type_words(box, typed, options.interval, options.pause)
+    report(remote.name, box.completer, keystrokes,
+           f", cache {remote.hits} hits {remote.misses} misses")
+    box.close()
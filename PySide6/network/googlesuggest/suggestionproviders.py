@@ -0,0 +1,141 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Providers of the suggestions shown by GSuggestCompletion"""
+
+from bisect import bisect_left
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QUrl, QUrlQuery, QXmlStreamReader, Signal, Slot
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+
+MAX_SUGGESTIONS = 10
+GOOGLE_URL = "https://google.com/complete/search?output=toolbar"
+
+
+def parse_suggestions(data):
+    """Return the suggestions of a Google toolbar XML response."""
+    choices = []
+    xml = QXmlStreamReader(data)
+    while not xml.atEnd():
+        xml.readNext()
+        if xml.tokenType() == QXmlStreamReader.TokenType.StartElement:
+            if xml.name() == "suggestion":
+                choices.append(xml.attributes().value("data"))
+    return choices
+
+
+class SuggestionProvider(QObject):
+    """Interface of the providers: request() looks up the suggestions of a
+    text, which are signaled with the text, possibly later. A new request
+    supersedes the previous one, whose suggestions are not signaled."""
+
+    name = ""
+    # Time to wait for the next keystroke before requesting the suggestions
+    debounce = 0  # ms
+
+    suggestions = Signal(str, list)  # text, suggestions
+
+    def request(self, text):
+        """Look up the suggestions of text, overridden by the providers.
+        There are none by default."""
+        self.suggestions.emit(text, [])
+
+    def cancel(self):
+        """Drop the pending request, if any."""
+
+
+class PrefixIndexProvider(SuggestionProvider):
+    """Looks up the words starting with the text in a sorted list, with a
+    binary search. The lookup is case insensitive."""
+
+    name = "local"
+
+    def __init__(self, words, parent=None):
+        super().__init__(parent)
+        entries = sorted({(word.casefold(), word) for word in words if word})
+        self._keys = [key for key, _ in entries]
+        self.words = [word for _, word in entries]
+
+    @classmethod
+    def from_file(cls, path, parent=None):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return cls((line.strip() for line in f), parent)
+
+    def __len__(self):
+        return len(self.words)
+
+    def lookup(self, text, limit=MAX_SUGGESTIONS):
+        prefix = text.casefold()
+        if not prefix:
+            return []
+        start = bisect_left(self._keys, prefix)
+        # The words with the prefix are contiguous from start
+        end = bisect_left(self._keys, prefix + "\U0010ffff", start,
+                          min(start + limit, len(self._keys)))
+        return self.words[start:end]
+
+    def request(self, text):
+        self.suggestions.emit(text, self.lookup(text))
+
+
+class RemoteProvider(SuggestionProvider):
+    """Requests the suggestions from a server answering in the XML format of
+    the Google toolbar.
+
+    The responses are kept in a least recently used cache keyed by the text,
+    and the reply in progress is aborted when a new text is requested."""
+
+    name = "google"
+    debounce = 300  # ms
+
+    def __init__(self, url=GOOGLE_URL, cache_size=256, manager=None, parent=None):
+        super().__init__(parent)
+        self._url = QUrl(url)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._manager = manager or QNetworkAccessManager(self)
+        self._reply = None
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, text):
+        self.cancel()
+        choices = self._cache.get(text)
+        if choices is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+            self.suggestions.emit(text, choices)
+            return
+        self.misses += 1
+        url = QUrl(self._url)
+        query = QUrlQuery(url)
+        query.addQueryItem("q", text)
+        url.setQuery(query)
+        self._reply = self._manager.get(QNetworkRequest(url))
+        self._reply.setProperty("text", text)
+        self._reply.finished.connect(self._finished)
+
+    def cancel(self):
+        if self._reply is not None:
+            reply = self._reply
+            self._reply = None
+            reply.abort()
+
+    @Slot()
+    def _finished(self):
+        reply = self.sender()
+        reply.deleteLater()
+        if reply is not self._reply:  # Superseded
+            return
+        self._reply = None
+        if reply.error() != QNetworkReply.NetworkError.NoError:
+            return
+        text = reply.property("text")
+        choices = parse_suggestions(reply.readAll().data().decode("utf-8", errors="replace"))
+        self._cache[text] = choices
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        self.suggestions.emit(text, choices)
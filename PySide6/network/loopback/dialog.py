@@ -16,6 +16,8 @@ class Dialog(QDialog):
 
         self.total_bytes = 50 * 1024 * 1024  # 50 MB
         self.payload_size = 64 * 1024  # 64 KB
+        # Written again and again, the data does not matter
+        self.payload = QByteArray(self.payload_size, "@")
 
         self.bytes_to_write = 0
         self.bytes_written = 0
@@ -96,15 +98,14 @@ class Dialog(QDialog):
     def start_transfer(self):
 
         # Called when the TCP client has connected to the loopback server
-        self.bytes_to_write = self.total_bytes - self.tcp_client.write(
-            QByteArray(self.payload_size, "@")
-        )
+        self.bytes_to_write = self.total_bytes - self.tcp_client.write(self.payload)
         self.client_status_label.setText("Connected")
 
     def update_server_progress(self):
 
-        self.bytes_received += self.tcp_server_connection.bytesAvailable()
-        self.tcp_server_connection.readAll()
+        # The data is discarded without being copied
+        self.bytes_received += self.tcp_server_connection.skip(
+            self.tcp_server_connection.bytesAvailable())
 
         self.server_progress_bar.setMaximum(self.total_bytes)
         self.server_progress_bar.setValue(self.bytes_received)
@@ -124,8 +125,9 @@ class Dialog(QDialog):
 
         # only write more if not finished and when the Qt write buffer is below a certain size
         if self.bytes_to_write > 0 and self.tcp_client.bytesToWrite() <= 4 * self.payload_size:
+            size = min(self.bytes_to_write, self.payload_size)
             self.bytes_to_write -= self.tcp_client.write(
-                QByteArray(min(self.bytes_to_write, self.payload_size), "@")
+                self.payload if size == self.payload_size else self.payload.left(size)
             )
 
         self.client_progress_bar.setMaximum(self.total_bytes)
@@ -0,0 +1,164 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Throughput benchmark of the loopback transfer without window.
+
+Sends the data over a TCP connection on the local host, or a local socket
+(a Unix domain socket or a named pipe on Windows), for each payload size
+and write buffer high-water mark, and prints the throughput and the CPU
+time of the process.
+
+By default a single preallocated payload is written and the received data
+is skipped without being copied to Python. --allocate writes a new payload
+and reads all the data on each notification instead, as the dialog did."""
+
+import os
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from PySide6.QtCore import QByteArray, QCoreApplication, QEventLoop, QObject, QTimer, Slot
+from PySide6.QtNetwork import QHostAddress, QLocalServer, QLocalSocket, QTcpServer, QTcpSocket
+
+
+TRANSPORTS = ("tcp", "local")
+KB = 1024
+MB = 1024 * 1024
+
+
+def parse_sizes(value):
+    """Parse a comma separated list of sizes in KB, e.g. "4,64,1024"."""
+    return [int(size) * KB for size in value.split(",")]
+
+
+class Transfer(QObject):
+    """Sends total bytes from a client socket to the socket accepted by a
+    server, writing the payloads while the write buffer of the client is
+    below high_water bytes."""
+
+    def __init__(self, transport, total, payload_size, high_water, allocate=False, parent=None):
+        super().__init__(parent)
+        self.total = total
+        self.payload_size = payload_size
+        self.high_water = high_water
+        self.allocate = allocate
+        self.payload = QByteArray(payload_size, "@")
+        self.bytes_to_write = total
+        self.bytes_received = 0
+        self.error = ""
+        self._loop = QEventLoop()
+        self._connection = None
+
+        if transport == "tcp":
+            self._server = QTcpServer(self)
+            self._client = QTcpSocket(self)
+            self._client.errorOccurred.connect(self._fail)
+        else:
+            self._server = QLocalServer(self)
+            self._client = QLocalSocket(self)
+            self._client.errorOccurred.connect(self._fail)
+        self._transport = transport
+        self._server.newConnection.connect(self._accept_connection)
+        self._client.connected.connect(self._write)
+        self._client.bytesWritten.connect(self._write)
+
+    def run(self):
+        """Run the transfer and return the wall and CPU times in seconds."""
+        if self._transport == "tcp":
+            if not self._server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost)):
+                raise RuntimeError(self._server.errorString())
+            start = time.perf_counter(), time.process_time()
+            self._client.connectToHost(QHostAddress(QHostAddress.SpecialAddress.LocalHost),
+                                       self._server.serverPort())
+        else:
+            name = f"loopback-benchmark-{os.getpid()}"
+            QLocalServer.removeServer(name)
+            if not self._server.listen(name):
+                raise RuntimeError(self._server.errorString())
+            start = time.perf_counter(), time.process_time()
+            self._client.connectToServer(name)
+        self._loop.exec()
+        self._client.abort()
+        self._server.close()
+        if self.error:
+            raise RuntimeError(self.error)
+        return time.perf_counter() - start[0], time.process_time() - start[1]
+
+    @Slot()
+    def _accept_connection(self):
+        self._connection = self._server.nextPendingConnection()
+        self._connection.readyRead.connect(self._read)
+        self._server.close()
+
+    @Slot()
+    def _write(self):
+        client = self._client
+        while self.bytes_to_write > 0 and client.bytesToWrite() <= self.high_water:
+            size = min(self.bytes_to_write, self.payload_size)
+            if self.allocate:
+                payload = QByteArray(size, "@")
+            else:
+                payload = self.payload if size == self.payload_size else self.payload.left(size)
+            written = client.write(payload)
+            if written <= 0:
+                break
+            self.bytes_to_write -= written
+
+    @Slot()
+    def _read(self):
+        connection = self._connection
+        if self.allocate:
+            self.bytes_received += connection.readAll().size()
+        else:
+            # Discards the buffered data without copying it
+            self.bytes_received += connection.skip(connection.bytesAvailable())
+        if self.bytes_received >= self.total:
+            self._loop.quit()
+
+    @Slot()
+    def _fail(self):
+        self.error = self._client.errorString()
+        self._loop.quit()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Loopback throughput benchmark",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--total", type=int, default=256,
+                        help="MB sent for each configuration (default 256)")
+    parser.add_argument("--payloads", type=parse_sizes, default=parse_sizes("4,64,1024"),
+                        help="payload sizes in KB, comma separated (default 4,64,1024)")
+    parser.add_argument("--high-water", type=str, default="1,4,16",
+                        help="write buffer high-water marks in payloads,\n"
+                        "comma separated (default 1,4,16)")
+    parser.add_argument("--transport", choices=TRANSPORTS, action="append",
+                        help="transport, can be repeated, all of them by default")
+    parser.add_argument("--allocate", action="store_true",
+                        help="allocate the payloads and read the data to Python")
+    options, args = parser.parse_known_args()
+
+    app = QCoreApplication(sys.argv[:1] + args)
+    high_waters = [int(value) for value in options.high_water.split(",")]
+    total = options.total * MB
+
+    print(f"{options.total} MB per transfer, "
+          f"{'allocated' if options.allocate else 'reused'} payloads")
+    print(f"{'transport':>9} {'payload':>9} {'high-water':>10} {'MB/s':>9} {'CPU s':>7}")
+    for transport in options.transport or TRANSPORTS:
+        for payload_size in options.payloads:
+            for factor in high_waters:
+                transfer = Transfer(transport, total, payload_size, factor * payload_size,
+                                    options.allocate)
+                try:
+                    elapsed, cpu = transfer.run()
+                except RuntimeError as e:
+                    print(f"{transport:>9}: {e}", file=sys.stderr)
+                    sys.exit(1)
+                finally:
+                    transfer.deleteLater()
+                print(f"{transport:>9} {payload_size // KB:>7}KB {factor:>9}x "
+                      f"{total / MB / elapsed:9.1f} {cpu:7.2f}", flush=True)
+                # Deletes the sockets of the transfer
+                QTimer.singleShot(0, app.quit)
+                app.exec()
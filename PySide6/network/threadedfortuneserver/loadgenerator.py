@@ -0,0 +1,134 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Load generator for the Threaded Fortune Server example.
+
+Opens many concurrent connections to the server, reads a fortune on each
+of them and reports the number of connections per second and the latency
+percentiles. Unless a port is given, the server is started headless for
+each serving strategy in turn."""
+
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from servingstrategies import STRATEGIES
+
+
+SERVER = Path(__file__).resolve().parent / "threadedfortuneserver.py"
+
+
+def raise_file_limit(needed):
+    """Raise the limit of open files, a connection needs a descriptor on
+       each side."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+
+async def fetch_fortune(host, port, semaphore, latencies, errors, timeout):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            try:
+                header = await asyncio.wait_for(reader.readexactly(2), timeout)
+                size, = struct.unpack(">H", header)
+                await asyncio.wait_for(reader.readexactly(size), timeout)
+            finally:
+                writer.close()
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_load(host, port, connections, concurrency, timeout):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch_fortune(host, port, semaphore, latencies, errors, timeout)
+                           for _ in range(connections)))
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def report(name, elapsed, latencies, errors):
+    line = (f"{name:>8}: {len(latencies) / elapsed:8.0f} connections/s, "
+            f"p50 {1000 * percentile(latencies, 50):7.1f} ms, "
+            f"p99 {1000 * percentile(latencies, 99):7.1f} ms, "
+            f"max {1000 * (latencies[-1] if latencies else 0):7.1f} ms")
+    if errors:
+        line += ", errors: " + ", ".join(f"{k} {v}" for k, v in errors.items())
+    print(line, flush=True)
+
+
+def start_server(strategy, threads, backlog):
+    command = [sys.executable, os.fspath(SERVER), "--headless", "--strategy", strategy]
+    if threads:
+        command += ["--threads", str(threads)]
+    if backlog:
+        command += ["--backlog", str(backlog)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    port = server.stdout.readline().strip()
+    if not port:
+        server.wait()
+        raise RuntimeError(f"The {strategy} server did not start")
+    return server, int(port)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Load generator for the Threaded Fortune Server",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--connections", "-n", type=int, default=5000,
+                        help="number of connections (default 5000)")
+    parser.add_argument("--concurrency", "-c", type=int, default=2000,
+                        help="connections open at the same time (default 2000)")
+    parser.add_argument("--strategy", "-s", choices=list(STRATEGIES), action="append",
+                        help="strategy of the server started for the test,\n"
+                        "can be repeated, all of them by default")
+    parser.add_argument("--threads", type=int, default=0, help="threads of the pool strategy")
+    parser.add_argument("--backlog", type=int, default=0, help="backlog of the pool strategy")
+    parser.add_argument("--host", default="127.0.0.1", help="host of the server")
+    parser.add_argument("--port", "-p", type=int, default=0,
+                        help="port of a running server, instead of starting one")
+    parser.add_argument("--timeout", type=float, default=30, help="timeout in seconds")
+    options = parser.parse_args()
+
+    raise_file_limit(2 * options.concurrency + 256)
+
+    if options.port:
+        report(str(options.port), *asyncio.run(run_load(options.host, options.port,
+                                                        options.connections,
+                                                        options.concurrency, options.timeout)))
+        sys.exit(0)
+
+    print(f"{options.connections} connections, {options.concurrency} concurrent")
+    for strategy in options.strategy or list(STRATEGIES):
+        server, port = start_server(strategy, options.threads, options.backlog)
+        try:
+            report(strategy, *asyncio.run(run_load(options.host, port, options.connections,
+                                                   options.concurrency, options.timeout)))
+        finally:
+            server.terminate()
+            server.wait()
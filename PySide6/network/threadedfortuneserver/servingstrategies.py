@@ -0,0 +1,147 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Strategies serving the connections of the Threaded Fortune Server example"""
+
+from PySide6.QtCore import (QByteArray, QDataStream, QIODevice, QObject, QRunnable, QThread,
+                            QThreadPool, Signal, Slot)
+from PySide6.QtNetwork import QAbstractSocket, QTcpSocket
+
+
+# Time given to a client to close the connection once the fortune is sent
+DISCONNECT_TIMEOUT = 30000  # ms
+
+
+def encode_fortune(text):
+    """Serialize a fortune in the format expected by the Fortune Client, a
+       16-bit block size followed by the string."""
+    block = QByteArray()
+    outstr = QDataStream(block, QIODevice.OpenModeFlag.WriteOnly)
+    outstr.setVersion(QDataStream.Version.Qt_4_0)
+    outstr.writeUInt16(0)
+    outstr.writeQString(text)
+    outstr.device().seek(0)
+    outstr.writeUInt16(block.size() - 2)
+    return block
+
+
+def send_and_wait(socket_descriptor, block):
+    """Send block on a new socket and block until the client disconnects.
+       Returns the socket in case of error, None otherwise."""
+    tcp_socket = QTcpSocket()
+    if not tcp_socket.setSocketDescriptor(socket_descriptor):
+        return tcp_socket
+    tcp_socket.write(block)
+    tcp_socket.disconnectFromHost()
+    if tcp_socket.state() != QAbstractSocket.SocketState.UnconnectedState:
+        tcp_socket.waitForDisconnected(DISCONNECT_TIMEOUT)
+    return None
+
+
+class FortuneThread(QThread):
+    error = Signal(QTcpSocket.SocketError)
+
+    def __init__(self, socketDescriptor, block, parent):
+        super().__init__(parent)
+
+        self._socket_descriptor = socketDescriptor
+        self._block = block
+
+    def run(self):
+        tcp_socket = send_and_wait(self._socket_descriptor, self._block)
+        if tcp_socket is not None:
+            self.error.emit(tcp_socket.error())
+
+
+class ThreadStrategy(QObject):
+    """Starts a thread per connection, as the original example."""
+
+    name = "thread"
+
+    def __init__(self, server):
+        super().__init__(server)
+        self._server = server
+
+    def serve(self, socket_descriptor, block):
+        thread = FortuneThread(socket_descriptor, block, self)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+
+class FortuneTask(QRunnable):
+
+    def __init__(self, socket_descriptor, block, strategy):
+        super().__init__()
+        self._socket_descriptor = socket_descriptor
+        self._block = block
+        self._strategy = strategy
+
+    def run(self):
+        tcp_socket = send_and_wait(self._socket_descriptor, self._block)
+        if tcp_socket is not None:
+            self._strategy.error.emit(tcp_socket.error())
+        # Queued to the thread of the strategy
+        self._strategy.task_done.emit()
+
+
+class PoolStrategy(QObject):
+    """Serves the connections with a fixed number of threads.
+
+    At most `backlog` connections are accepted and waiting for a thread,
+    above that the server stops accepting the connections, they wait in the
+    listen queue of the system until some are served."""
+
+    name = "pool"
+
+    error = Signal(QTcpSocket.SocketError)
+    task_done = Signal()
+
+    def __init__(self, server, threads=0, backlog=0):
+        super().__init__(server)
+        self._server = server
+        self._pool = QThreadPool(self)
+        if threads:
+            self._pool.setMaxThreadCount(threads)
+        self._backlog = backlog or 4 * self._pool.maxThreadCount()
+        self._pending = 0
+        self.task_done.connect(self._task_done)
+
+    def serve(self, socket_descriptor, block):
+        self._pool.start(FortuneTask(socket_descriptor, block, self))
+        self._pending += 1
+        if self._pending >= self._pool.maxThreadCount() + self._backlog:
+            self._server.pauseAccepting()
+
+    @Slot()
+    def _task_done(self):
+        self._pending -= 1
+        if self._pending < self._pool.maxThreadCount() + self._backlog:
+            self._server.resumeAccepting()
+
+
+class EventStrategy(QObject):
+    """Serves all the connections from the thread of the server without
+       blocking, the sockets signal when they are disconnected."""
+
+    name = "event"
+
+    def __init__(self, server):
+        super().__init__(server)
+        self._server = server
+
+    def serve(self, socket_descriptor, block):
+        tcp_socket = QTcpSocket(self)
+        if not tcp_socket.setSocketDescriptor(socket_descriptor):
+            tcp_socket.deleteLater()
+            return
+        tcp_socket.disconnected.connect(tcp_socket.deleteLater)
+        tcp_socket.write(block)
+        tcp_socket.disconnectFromHost()
+
+
+STRATEGIES = {
+    ThreadStrategy.name: ThreadStrategy,
+    PoolStrategy.name: PoolStrategy,
+    EventStrategy.name: EventStrategy,
+}
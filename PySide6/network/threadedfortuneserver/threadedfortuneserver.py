@@ -6,41 +6,19 @@ from __future__ import annotations
 """PySide6 port of the network/threadedfortuneserver example from Qt v5.x, originating from PyQt"""
 
 import random
+import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
 
-from PySide6.QtCore import (Signal, QByteArray, QDataStream, QIODevice,
-                            QThread, Qt)
+from PySide6.QtCore import QCoreApplication, Qt
 from PySide6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QLabel,
                                QMessageBox, QPushButton, QVBoxLayout)
-from PySide6.QtNetwork import (QHostAddress, QNetworkInterface, QTcpServer,
-                               QTcpSocket)
+from PySide6.QtNetwork import (QHostAddress, QNetworkInterface, QTcpServer)
 
+from servingstrategies import STRATEGIES, PoolStrategy, encode_fortune
 
-class FortuneThread(QThread):
-    error = Signal(QTcpSocket.SocketError)
 
-    def __init__(self, socketDescriptor, fortune, parent):
-        super().__init__(parent)
-
-        self._socket_descriptor = socketDescriptor
-        self.text = fortune
-
-    def run(self):
-        tcp_socket = QTcpSocket()
-        if not tcp_socket.setSocketDescriptor(self._socket_descriptor):
-            self.error.emit(tcp_socket.error())
-            return
-
-        block = QByteArray()
-        outstr = QDataStream(block, QIODevice.OpenModeFlag.WriteOnly)
-        outstr.setVersion(QDataStream.Version.Qt_4_0)
-        outstr.writeUInt16(0)
-        outstr.writeQString(self.text)
-        outstr.device().seek(0)
-        outstr.writeUInt16(block.size() - 2)
-
-        tcp_socket.write(block)
-        tcp_socket.disconnectFromHost()
-        tcp_socket.waitForDisconnected()
+# Length of the queue of the system for the connections not accepted yet
+LISTEN_BACKLOG = 1024
 
 
 class FortuneServer(QTcpServer):
@@ -53,19 +31,25 @@ class FortuneServer(QTcpServer):
         "You cannot kill time without injuring eternity.",
         "Computers are not intelligent. They only think they are.")
 
-    def incomingConnection(self, socketDescriptor):
-        fortune = self.fortunes[random.randint(0, len(self.fortunes) - 1)]
+    def __init__(self, strategy="thread", threads=0, backlog=0, parent=None):
+        super().__init__(parent)
+        # The fortunes are serialized once, not for each connection
+        self._blocks = [encode_fortune(fortune) for fortune in self.fortunes]
+        if strategy == PoolStrategy.name:
+            self.strategy = PoolStrategy(self, threads, backlog)
+        else:
+            self.strategy = STRATEGIES[strategy](self)
+        self.setListenBacklogSize(LISTEN_BACKLOG)
 
-        thread = FortuneThread(socketDescriptor, fortune, self)
-        thread.finished.connect(thread.deleteLater)
-        thread.start()
+    def incomingConnection(self, socketDescriptor):
+        self.strategy.serve(socketDescriptor, random.choice(self._blocks))
 
 
 class Dialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, server, port=0, parent=None):
         super().__init__(parent)
 
-        self.server = FortuneServer()
+        self.server = server
 
         status_label = QLabel()
         status_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextBrowserInteraction)
@@ -73,7 +57,7 @@ class Dialog(QDialog):
         quit_button = QPushButton("Quit")
         quit_button.setAutoDefault(False)
 
-        if not self.server.listen():
+        if not self.server.listen(QHostAddress(QHostAddress.SpecialAddress.Any), port):
             reason = self.server.errorString()
             QMessageBox.critical(self, "Threaded Fortune Server",
                                  f"Unable to start the server: {reason}.")
@@ -90,7 +74,8 @@ class Dialog(QDialog):
         ip_address = ip_address.toString()
         port = self.server.serverPort()
 
-        status_label.setText(f"The server is running on\n\nIP: {ip_address}\nport: {port}\n\n"
+        status_label.setText(f"The server is running on\n\nIP: {ip_address}\nport: {port}\n"
+                             f"strategy: {self.server.strategy.name}\n\n"
                              "Run the Fortune Client example now.")
 
         quit_button.clicked.connect(self.close)
@@ -109,10 +94,33 @@ class Dialog(QDialog):
 
 
 if __name__ == '__main__':
-
-    import sys
-
-    app = QApplication(sys.argv)
-    dialog = Dialog()
+    parser = ArgumentParser(description="Threaded Fortune Server",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--strategy", "-s", choices=list(STRATEGIES), default="thread",
+                        help="thread: one thread per connection (default)\n"
+                        "pool: fixed pool of threads\n"
+                        "event: non-blocking sockets in the main thread")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="threads of the pool, the number of CPUs by default")
+    parser.add_argument("--backlog", type=int, default=0,
+                        help="connections accepted while all the threads of the pool are busy,\n"
+                        "4 times the number of threads by default")
+    parser.add_argument("--port", "-p", type=int, default=0, help="port to listen on")
+    parser.add_argument("--headless", action="store_true",
+                        help="listen on localhost without a window and print the port")
+    options, args = parser.parse_known_args()
+
+    if options.headless:
+        app = QCoreApplication(sys.argv[:1] + args)
+        server = FortuneServer(options.strategy, options.threads, options.backlog)
+        if not server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost), options.port):
+            print(f"Unable to start the server: {server.errorString()}.", file=sys.stderr)
+            sys.exit(1)
+        print(server.serverPort(), flush=True)
+        sys.exit(app.exec())
+
+    app = QApplication(sys.argv[:1] + args)
+    server = FortuneServer(options.strategy, options.threads, options.backlog)
+    dialog = Dialog(server, options.port)
     dialog.show()
     sys.exit(dialog.exec())
@@ -5,8 +5,8 @@ from __future__ import annotations
 import copy
 from PySide6.QtSql import QSqlRelationalDelegate
 from PySide6.QtWidgets import QSpinBox, QStyle
-from PySide6.QtGui import QPixmap, QPalette
-from PySide6.QtCore import QEvent, QSize, Qt
+from PySide6.QtGui import QIcon, QPainter, QPixmap, QPalette
+from PySide6.QtCore import QEvent, QPoint, QSize, Qt
 
 
 class BookDelegate(QSqlRelationalDelegate):
@@ -16,6 +16,31 @@ class BookDelegate(QSqlRelationalDelegate):
         QSqlRelationalDelegate.__init__(self, parent)
         self.star = QPixmap(":/images/star.svg")
         self.star_filled = QPixmap(":/images/star-filled.svg")
+        self._star_icon = QIcon(":/images/star.svg")
+        self._star_filled_icon = QIcon(":/images/star-filled.svg")
+        # (rating, device pixel ratio) -> the 5 stars in a pixmap
+        self._ratings = {}
+
+    def rating_pixmap(self, rating, ratio):
+        """ Return the stars of a rating drawn in one pixmap, rendered once
+            for each rating and device pixel ratio. The background is
+            transparent, the selection is filled below it.
+        """
+        key = (rating, ratio)
+        pixmap = self._ratings.get(key)
+        if pixmap is None:
+            size = self.star.size()
+            pixmap = QPixmap(QSize(5 * size.width(), size.height()) * ratio)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            star = self._star_icon.pixmap(size, ratio)
+            star_filled = self._star_filled_icon.pixmap(size, ratio)
+            painter = QPainter(pixmap)
+            for i in range(5):
+                painter.drawPixmap(i * size.width(), 0, star_filled if i < rating else star)
+            painter.end()
+            self._ratings[key] = pixmap
+        return pixmap
 
     def paint(self, painter, option, index):
         """ Paint the items in the table.
@@ -47,16 +72,11 @@ class BookDelegate(QSqlRelationalDelegate):
                 painter.fillRect(option.rect,
                                  option.palette.color(color_group, QPalette.Highlight))
             rating = model.data(index, Qt.ItemDataRole.DisplayRole)
-            width = self.star.width()
-            height = self.star.height()
-            x = option.rect.x()
-            y = option.rect.y() + (option.rect.height() / 2) - (height / 2)
-            for i in range(5):
-                if i < rating:
-                    painter.drawPixmap(x, y, self.star_filled)
-                else:
-                    painter.drawPixmap(x, y, self.star)
-                x += width
+            if rating is not None:
+                pixmap = self.rating_pixmap(max(0, min(int(rating), 5)),
+                                            painter.device().devicePixelRatioF())
+                y = option.rect.y() + (option.rect.height() - self.star.height()) // 2
+                painter.drawPixmap(QPoint(option.rect.x(), y), pixmap)
 
         pen = painter.pen()
         painter.setPen(option.palette.color(QPalette.Mid))
@@ -0,0 +1,368 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+import sys
+import time
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from PySide6.QtCore import QAbstractTableModel, QCoreApplication, QModelIndex, Qt
+from PySide6.QtSql import QSqlQuery, QSqlTableModel
+
+
+PAGE_SIZE = 256
+MAX_PAGES = 32
+ANCHOR_STRIDE = 16 * 1024  # Rows between the anchors set on the way to a far row
+COLUMNS = ("id", "title", "author", "genre", "year", "rating")
+# Columns holding the id of a row of another table, shown by name
+RELATIONS = {"author": "authors", "genre": "genres"}
+
+
+class BookTableModel(QAbstractTableModel):
+    """Books table fetched by pages of PAGE_SIZE rows around the rows shown.
+
+    The sort and the filter are done by SQL with the indexes created by
+    createdb, the rows of a page are the LIMIT rows following the nearest
+    known row, an anchor, by keyset pagination: the first row of each page
+    fetched becomes an anchor. On the way to a row far from the anchors,
+    anchors are set every ANCHOR_STRIDE rows, so that a page is at most
+    ANCHOR_STRIDE rows away from an anchor in the index.
+
+    Sorting by author or genre sorts by name: the books of each author or
+    genre are counted once, a page is then fetched from the books of the
+    authors it spans.
+
+    At most MAX_PAGES pages are kept, the farthest from the last page
+    fetched are evicted. The names of the authors and genres are kept in
+    memory."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._headers = {}
+        self._names = {column: {} for column in RELATIONS}  # column -> id -> name
+        self._relation_models = {}
+        self._sort_column = "id"
+        self._descending = False
+        self._filter = ""
+        self._count = 0
+        self._pages = OrderedDict()  # page -> rows, least recently used first
+        self._anchor_rows = []  # Sorted rows of the anchors
+        self._anchors = {}  # row -> key of the row in the sort order
+        self._groups = []  # (first row, relation id, count) when sorted by a relation
+        self._group_rows = []
+        self.queries = 0
+        self.query_time = 0.0
+
+    # The API of QSqlTableModel used by BookWindow
+
+    def fieldIndex(self, name):
+        return COLUMNS.index(name) if name in COLUMNS else -1
+
+    def relationModel(self, column):
+        model = self._relation_models.get(column)
+        if model is None:
+            model = QSqlTableModel(self)
+            model.setTable(RELATIONS[COLUMNS[column]])
+            model.setSort(model.fieldIndex("name"), Qt.SortOrder.AscendingOrder)
+            model.select()
+            # The combo boxes find the names among the rows fetched
+            while model.canFetchMore():
+                model.fetchMore()
+            self._relation_models[column] = model
+        return model
+
+    def select(self):
+        self.beginResetModel()
+        self._pages.clear()
+        self._anchor_rows.clear()
+        self._anchors.clear()
+        self._groups.clear()
+        self._group_rows.clear()
+        where, args = self._where()
+        if self._sort_column in RELATIONS:
+            self._count_groups(where, args)
+        else:
+            q = self._exec(f"select count(*) from books{where}", args)
+            self._count = q.value(0) if q.next() else 0
+        self.endResetModel()
+        return True
+
+    def set_filter(self, title_prefix):
+        """Show the books whose title starts with title_prefix."""
+        if title_prefix != self._filter:
+            self._filter = title_prefix
+            self.select()
+
+    # Queries
+
+    def _exec(self, sql, args=()):
+        start = time.perf_counter()
+        q = QSqlQuery()
+        q.setForwardOnly(True)
+        q.prepare(sql)
+        for i, value in enumerate(args):
+            q.bindValue(i, value)
+        if not q.exec():
+            print(q.lastError().text(), file=sys.stderr)
+        self.queries += 1
+        self.query_time += time.perf_counter() - start
+        return q
+
+    def _where(self, *conditions):
+        """Return the WHERE clause of the filter and of the conditions,
+           pairs of SQL and arguments, and its arguments."""
+        clauses = []
+        args = []
+        if self._filter:
+            # A range of the index, unlike LIKE
+            clauses.append("title >= ? and title < ?")
+            args += [self._filter, self._filter + "\U0010ffff"]
+        for sql, values in conditions:
+            clauses.append(sql)
+            args += values
+        return (" where " + " and ".join(clauses) if clauses else ""), args
+
+    def _order(self):
+        direction = "desc" if self._descending else "asc"
+        if self._sort_column == "id":
+            return f"id {direction}"
+        return f"{self._sort_column} {direction}, id {direction}"
+
+    def _select(self, columns, where, args, limit, offset, order=None):
+        q = self._exec(f"select {', '.join(columns)} from books{where} "
+                       f"order by {order or self._order()} limit ? offset ?",
+                       args + [limit, offset])
+        rows = []
+        while q.next():
+            rows.append([q.value(i) for i in range(len(columns))])
+        return rows
+
+    def _seek(self, columns, key, offset, limit):
+        """Return limit rows from offset rows after the row of key in the sort
+           order, or after the first row when key is None."""
+        if key is None:
+            where, args = self._where()
+            return self._select(columns, where, args, limit, offset)
+        from_key, after_key = ("<=", "<") if self._descending else (">=", ">")
+        if self._sort_column == "id":
+            where, args = self._where((f"id {from_key} ?", [key[0]]))
+            return self._select(columns, where, args, limit, offset)
+        # A row value comparison, (column, id) >= (?, ?), would only seek the
+        # first column of the index: the rows of the same value come first
+        column = self._sort_column
+        value, book_id = key
+        where, args = self._where((f"{column} = ?", [value]), (f"id {from_key} ?", [book_id]))
+        rows = self._select(columns, where, args, limit, offset)
+        if len(rows) == limit:
+            return rows
+        skipped = offset
+        if not rows and offset:
+            q = self._exec(f"select count(*) from (select 1 from books{where} limit ?)",
+                           args + [offset])
+            skipped = q.value(0) if q.next() else 0
+        where, args = self._where((f"{column} {after_key} ?", [value]))
+        return rows + self._select(columns, where, args, limit - len(rows), offset - skipped)
+
+    def _fetch(self, start):
+        if self._groups:
+            rows = self._fetch_groups(start)
+        else:
+            rows = self._fetch_keyset(start)
+        self._resolve(rows)
+        return rows
+
+    def _fetch_keyset(self, start):
+        # The nearest anchor before start
+        i = bisect_right(self._anchor_rows, start)
+        if not i and start > ANCHOR_STRIDE:
+            key = self._key_at(None, 0)
+            if key is not None:
+                self._add_anchor(0, key)
+                i = 1
+        anchor = self._anchor_rows[i - 1] if i else 0
+        while start - anchor > ANCHOR_STRIDE:
+            key = self._key_at(self._anchors[anchor], ANCHOR_STRIDE)
+            if key is None:
+                break
+            anchor += ANCHOR_STRIDE
+            self._add_anchor(anchor, key)
+        rows = self._seek(COLUMNS, self._anchors[anchor] if anchor in self._anchors else None,
+                          start - anchor, PAGE_SIZE)
+        if rows and start not in self._anchors:
+            self._add_anchor(start, self._key(rows[0]))
+        return rows
+
+    def _add_anchor(self, row, key):
+        self._anchors[row] = key
+        insort(self._anchor_rows, row)
+
+    def _key_columns(self):
+        return ["id"] if self._sort_column == "id" else [self._sort_column, "id"]
+
+    def _key_at(self, key, offset):
+        """Return the key of the row offset rows after the row of key, or
+           after the first row when key is None."""
+        rows = self._seek(self._key_columns(), key, offset, 1)
+        return tuple(rows[0]) if rows else None
+
+    def _key(self, row):
+        return tuple(row[COLUMNS.index(column)] for column in self._key_columns())
+
+    def _count_groups(self, where, args):
+        column = self._sort_column
+        q = self._exec(f"select {column}, count(*) from books{where} group by {column}", args)
+        counts = []
+        while q.next():
+            counts.append((q.value(0), q.value(1)))
+        self._load_names(column, [relation_id for relation_id, _ in counts])
+        names = self._names[column]
+        counts.sort(key=lambda group: (names.get(group[0], ""), group[0]),
+                    reverse=self._descending)
+        first = 0
+        for relation_id, count in counts:
+            self._groups.append((first, relation_id, count))
+            self._group_rows.append(first)
+            first += count
+        self._count = first
+
+    def _fetch_groups(self, start):
+        column = self._sort_column
+        direction = "desc" if self._descending else "asc"
+        rows = []
+        i = bisect_right(self._group_rows, start) - 1
+        while len(rows) < PAGE_SIZE and 0 <= i < len(self._groups):
+            first, relation_id, count = self._groups[i]
+            offset = max(start + len(rows) - first, 0)
+            where, args = self._where((f"{column} = ?", [relation_id]))
+            rows += self._select(COLUMNS, where, args, PAGE_SIZE - len(rows), offset,
+                                 f"id {direction}")
+            i += 1
+        return rows
+
+    def _load_names(self, column, ids):
+        names = self._names[column]
+        missing = [relation_id for relation_id in set(ids) if relation_id not in names]
+        # SQLite limits the number of parameters of a query
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            q = self._exec(f"select id, name from {RELATIONS[column]} "
+                           f"where id in ({', '.join('?' * len(chunk))})", chunk)
+            while q.next():
+                names[q.value(0)] = q.value(1)
+
+    def _resolve(self, rows):
+        """Replace the ids of the relations by their names."""
+        for column in RELATIONS:
+            i = COLUMNS.index(column)
+            self._load_names(column, [row[i] for row in rows])
+            names = self._names[column]
+            for row in rows:
+                row[i] = names.get(row[i], row[i])
+
+    def _row(self, row):
+        page = row // PAGE_SIZE
+        rows = self._pages.get(page)
+        if rows is None:
+            rows = self._pages[page] = self._fetch(page * PAGE_SIZE)
+            while len(self._pages) > MAX_PAGES:
+                farthest = max(self._pages, key=lambda other: abs(other - page))
+                del self._pages[farthest]
+        else:
+            self._pages.move_to_end(page)
+        offset = row - page * PAGE_SIZE
+        return rows[offset] if offset < len(rows) else None
+
+    # QAbstractTableModel
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        row = self._row(index.row())
+        return row[index.column()] if row is not None else None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._headers.get(section, COLUMNS[section])
+        return super().headerData(section, orientation, role)
+
+    def setHeaderData(self, section, orientation, value, role=Qt.ItemDataRole.EditRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return False
+        self._headers[section] = value
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() != 0:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        row = self._row(index.row())
+        if row is None or role != Qt.ItemDataRole.EditRole:
+            return False
+        column = COLUMNS[index.column()]
+        stored = value
+        if column in RELATIONS:
+            stored = self._relation_id(column, value)
+            if stored is None:
+                return False
+        q = self._exec(f"update books set {column} = ? where id = ?", [stored, row[0]])
+        if not q.isActive():
+            return False
+        # The row keeps its place until the next select()
+        row[index.column()] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    def _relation_id(self, column, name):
+        for relation_id, known in self._names[column].items():
+            if known == name:
+                return relation_id
+        q = self._exec(f"select id from {RELATIONS[column]} where name = ?", [name])
+        if not q.next():
+            return None
+        relation_id = q.value(0)
+        self._names[column][relation_id] = name
+        return relation_id
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = COLUMNS[column]
+        self._descending = order == Qt.SortOrder.DescendingOrder
+        self.select()
+
+
+def benchmark(path, positions=11):
+    """Report the time to fetch the page at several positions of the table
+       for each sort column, in a random order."""
+    import random
+    import createdb
+    createdb.init_db(path)
+    model = BookTableModel()
+    rng = random.Random(0)
+    for column in COLUMNS:
+        model.sort(COLUMNS.index(column))
+        count = model.rowCount()
+        rows = [count * i // (positions - 1) for i in range(positions)]
+        rows[-1] = count - 1
+        rng.shuffle(rows)
+        times = []
+        for row in rows:
+            start = time.perf_counter()
+            model.data(model.index(row, 1))
+            times.append(time.perf_counter() - start)
+        print(f"{column:>7}: {count} rows, page fetch "
+              f"mean {1000 * sum(times) / len(times):6.1f} ms, max {1000 * max(times):6.1f} ms",
+              flush=True)
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv)
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else ":memory:")
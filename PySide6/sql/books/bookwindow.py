@@ -3,36 +3,46 @@
 from __future__ import annotations
 
 from PySide6.QtWidgets import (QAbstractItemView, QDataWidgetMapper,
-                               QHeaderView, QMainWindow, QMessageBox)
+                               QHeaderView, QLineEdit, QMainWindow, QMessageBox)
 from PySide6.QtGui import QKeySequence
 from PySide6.QtSql import QSqlRelation, QSqlRelationalTableModel, QSqlTableModel
 from PySide6.QtCore import Qt, Slot
 import createdb
 from ui_bookwindow import Ui_BookWindow
 from bookdelegate import BookDelegate
+from booktablemodel import BookTableModel
 
 
 class BookWindow(QMainWindow, Ui_BookWindow):
-    """A window to show the books available"""
+    """A window to show the books available.
 
-    def __init__(self):
+    With windowed, the books are shown by a BookTableModel fetching the
+    rows around the visible ones, sorted and filtered by SQL, for large
+    databases."""
+
+    def __init__(self, path=":memory:", windowed=False):
         super().__init__()
         self.setupUi(self)
 
         # Initialize db
-        createdb.init_db()
+        createdb.init_db(path)
 
-        model = QSqlRelationalTableModel(self.bookTable)
-        model.setEditStrategy(QSqlTableModel.OnManualSubmit)
-        model.setTable("books")
+        if windowed:
+            # Edits are written at once
+            model = BookTableModel(self.bookTable)
+        else:
+            model = QSqlRelationalTableModel(self.bookTable)
+            model.setEditStrategy(QSqlTableModel.OnManualSubmit)
+            model.setTable("books")
 
         # Remember the indexes of the columns:
         author_idx = model.fieldIndex("author")
         genre_idx = model.fieldIndex("genre")
 
         # Set the relations to the other database tables:
-        model.setRelation(author_idx, QSqlRelation("authors", "id", "name"))
-        model.setRelation(genre_idx, QSqlRelation("genres", "id", "name"))
+        if not windowed:
+            model.setRelation(author_idx, QSqlRelation("authors", "id", "name"))
+            model.setRelation(genre_idx, QSqlRelation("genres", "id", "name"))
 
         # Set the localized header captions:
         model.setHeaderData(author_idx, Qt.Orientation.Horizontal, self.tr("Author Name"))
@@ -50,6 +60,14 @@ class BookWindow(QMainWindow, Ui_BookWindow):
         self.bookTable.setItemDelegate(BookDelegate(self.bookTable))
         self.bookTable.setColumnHidden(model.fieldIndex("id"), True)
         self.bookTable.setSelectionMode(QAbstractItemView.SingleSelection)
+        if windowed:
+            self.bookTable.setSortingEnabled(True)
+            self.bookTable.sortByColumn(model.fieldIndex("id"), Qt.SortOrder.AscendingOrder)
+            filter_edit = QLineEdit(self.groupBox)
+            filter_edit.setPlaceholderText(self.tr("Filter by title..."))
+            filter_edit.setClearButtonEnabled(True)
+            filter_edit.textChanged.connect(model.set_filter)
+            self.vboxLayout1.insertWidget(0, filter_edit)
 
         # Initialize the Author combo box:
         self.authorEdit.setModel(model.relationModel(author_idx))
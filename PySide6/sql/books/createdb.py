@@ -2,10 +2,22 @@
 # SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
 from __future__ import annotations
 
-from PySide6.QtSql import QSqlDatabase, QSqlQuery
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtSql import QSqlDatabase, QSqlDriver, QSqlQuery
 from datetime import date
 
 
+BATCH_SIZE = 10000
+
+
 def add_book(q, title, year, authorId, genreId, rating):
     q.addBindValue(title)
     q.addBindValue(year)
@@ -48,28 +60,64 @@ INSERT_BOOK_SQL = """
     insert into books(title, year, author, genre, rating)
                 values(?, ?, ?, ?, ?)
     """
+# The id ends the indexes of the sorted columns, for the keyset pagination
+INDEXES_SQL = [
+    "create index if not exists books_title on books(title, id)",
+    "create index if not exists books_year on books(year, id)",
+    "create index if not exists books_rating on books(rating, id)",
+    "create index if not exists books_author on books(author, id)",
+    "create index if not exists books_genre on books(genre, id)",
+    "create index if not exists authors_name on authors(name)",
+    "create index if not exists genres_name on genres(name)",
+]
+
+
+def check(func, *args):
+    if not func(*args):
+        raise ValueError(func.__self__.lastError())
+
 
+def open_db(path=":memory:"):
+    """Open the default connection to the SQLite database at path. A file
+       is put in WAL mode, the readers do not block the writer."""
+    db = QSqlDatabase.addDatabase("QSQLITE")
+    db.setDatabaseName(path)
+    check(db.open)
+    if path != ":memory:":
+        q = QSqlQuery()
+        check(q.exec, "pragma journal_mode=wal")
+        # Durable at the checkpoints, which is enough with WAL
+        check(q.exec, "pragma synchronous=normal")
+    return db
+
+
+def create_indexes():
+    q = QSqlQuery()
+    for sql in INDEXES_SQL:
+        check(q.exec, sql)
 
-def init_db():
+
+def init_db(path=":memory:", demo=True):
     """
-    init_db()
-    Initializes the database.
+    init_db(path=":memory:", demo=True)
+    Initializes the database, in memory or in the SQLite file at path.
     If tables "books" and "authors" are already in the database, do nothing.
+    Otherwise the tables are created, with the demo books unless demo is
+    False, and their indexes.
     Return value: None or raises ValueError
     The error value is the QtSql error instance.
     """
-    def check(func, *args):
-        if not func(*args):
-            raise ValueError(func.__self__.lastError())
-    db = QSqlDatabase.addDatabase("QSQLITE")
-    db.setDatabaseName(":memory:")
-
-    check(db.open)
+    db = open_db(path)
+    if {"books", "authors"} <= set(db.tables()):
+        return
 
     q = QSqlQuery()
     check(q.exec, BOOKS_SQL)
     check(q.exec, AUTHORS_SQL)
     check(q.exec, GENRES_SQL)
+    if not demo:
+        create_indexes()
+        return
     check(q.prepare, INSERT_AUTHOR_SQL)
 
     asimovId = add_author(q, "Isaac Asimov", date(1920, 2, 1))
@@ -95,3 +143,192 @@ def init_db():
     add_book(q, "Guards! Guards!", 1989, pratchettId, fantasy, 3)
     add_book(q, "Night Watch", 2002, pratchettId, fantasy, 3)
     add_book(q, "Going Postal", 2004, pratchettId, fantasy, 3)
+    create_indexes()
+
+
+def read_csv(path):
+    """Stream the rows of a CSV file with a header naming the columns
+       title, author, genre, year and rating, as lists in this order."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        order = [header.index(name) for name in ("title", "author", "genre", "year", "rating")]
+        if order == list(range(5)):
+            yield from reader
+            return
+        for row in reader:
+            yield [row[i] for i in order]
+
+
+def read_json(path):
+    """Stream the objects of a JSON Lines file, one book per line. A JSON
+       file holding an array of books is read at once."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_books(path):
+    return read_csv(path) if path.endswith(".csv") else read_json(path)
+
+
+class BookLoader:
+    """Inserts streamed books in the database, batch_size rows per
+    transaction.
+
+    The authors and genres are given by name, their ids are kept in memory
+    and the missing ones are inserted. The books are inserted with
+    QSqlQuery.execBatch() when the driver supports batch operations, else
+    with the prepared query executed for each row: Qt emulates the batches
+    of the SQLite driver with a cost growing with the square of the batch
+    size."""
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self._db = QSqlDatabase.database()
+        self._native_batch = self._db.driver().hasFeature(
+            QSqlDriver.DriverFeature.BatchOperations)
+        self._authors = self._names("authors")
+        self._genres = self._names("genres")
+        self._author_query = QSqlQuery()
+        check(self._author_query.prepare, INSERT_AUTHOR_SQL)
+        self._genre_query = QSqlQuery()
+        check(self._genre_query.prepare, INSERT_GENRE_SQL)
+        self._book_query = QSqlQuery()
+        check(self._book_query.prepare, INSERT_BOOK_SQL)
+
+    def _names(self, table):
+        q = QSqlQuery(f"select name, id from {table}")
+        names = {}
+        while q.next():
+            names[q.value(0)] = q.value(1)
+        return names
+
+    def _author_id(self, name):
+        author_id = self._authors.get(name)
+        if author_id is None:
+            author_id = self._authors[name] = add_author(self._author_query, name, "")
+        return author_id
+
+    def _genre_id(self, name):
+        genre_id = self._genres.get(name)
+        if genre_id is None:
+            genre_id = self._genres[name] = add_genre(self._genre_query, name)
+        return genre_id
+
+    def _insert(self, columns):
+        q = self._book_query
+        if self._native_batch:
+            for values in columns:
+                q.addBindValue(values)
+            check(q.execBatch)
+            return
+        bind = q.bindValue
+        for title, year, author, genre, rating in zip(*columns):
+            bind(0, title)
+            bind(1, year)
+            bind(2, author)
+            bind(3, genre)
+            bind(4, rating)
+            if not q.exec():
+                raise ValueError(q.lastError())
+
+    def load(self, books, defer_indexes=True):
+        """Insert the books, dictionaries or lists of title, author name,
+           genre name, year and rating, and return their number. The indexes
+           are dropped during the load and created again after it unless
+           defer_indexes is False."""
+        if defer_indexes:
+            q = QSqlQuery()
+            for sql in INDEXES_SQL:
+                check(q.exec, "drop index if exists " + sql.split()[5])
+        count = 0
+        columns = ([], [], [], [], [])
+        titles, years, authors, genres, ratings = columns
+        for book in books:
+            if isinstance(book, dict):
+                book = (book["title"], book["author"], book["genre"], book["year"],
+                        book["rating"])
+            title, author, genre, year, rating = book
+            titles.append(title)
+            years.append(int(year))
+            authors.append(self._author_id(author))
+            genres.append(self._genre_id(genre))
+            ratings.append(int(rating))
+            if len(titles) >= self.batch_size:
+                count += self._commit(columns)
+        count += self._commit(columns)
+        if defer_indexes:
+            create_indexes()
+        return count
+
+    def _commit(self, columns):
+        count = len(columns[0])
+        if count:
+            check(self._db.transaction)
+            self._insert(columns)
+            check(self._db.commit)
+            for values in columns:
+                values.clear()
+        return count
+
+
+def generate_books(count, seed=0):
+    """Generate count random books of 1000 authors and 20 genres."""
+    rng = random.Random(seed)
+    words = ["Foundation", "Empire", "Night", "Watch", "Man", "Glory", "Power", "Earth",
+             "Edge", "Guards", "Postal", "Second", "Third", "Havana", "Prelude", "Going"]
+    for i in range(count):
+        title = " ".join(rng.choices(words, k=rng.randint(1, 4)))
+        yield (f"{title} {i}", f"Author {rng.randrange(1000)}", f"Genre {rng.randrange(20)}",
+               rng.randint(1900, 2024), rng.randint(0, 5))
+
+
+def benchmark(count, path, batch_size, defer_indexes):
+    """Seed count books from a CSV file and report the rows per second."""
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "books.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["title", "author", "genre", "year", "rating"])
+            writer.writerows(generate_books(count))
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        init_db(path, demo=False)
+        start = time.perf_counter()
+        loaded = BookLoader(batch_size).load(read_books(csv_path), defer_indexes)
+        elapsed = time.perf_counter() - start
+    print(f"{loaded} books loaded in {elapsed:.2f} s, {loaded / elapsed:.0f} rows/s "
+          f"(batches of {batch_size}, indexes {'deferred' if defer_indexes else 'kept'})")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Create the books database",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("database", help="SQLite file of the database")
+    parser.add_argument("--load", metavar="FILE",
+                        help="load the books of a CSV, JSON or JSON Lines file")
+    parser.add_argument("--benchmark", type=int, metavar="BOOKS",
+                        help="seed the database with BOOKS generated books and\n"
+                        "report the rows per second")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows per transaction (default {BATCH_SIZE})")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="keep the indexes during the load")
+    options = parser.parse_args()
+
+    app = QCoreApplication(sys.argv[:1])
+    if options.benchmark:
+        benchmark(options.benchmark, options.database, options.batch_size,
+                  not options.keep_indexes)
+    else:
+        init_db(options.database, demo=not options.load)
+        if options.load:
+            count = BookLoader(options.batch_size).load(read_books(options.load),
+                                                        not options.keep_indexes)
+            print(f"{count} books loaded")
@@ -0,0 +1,161 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Repaint benchmark of the books delegate.
+
+Scrolls a table of generated books page by page, repainting the viewport
+synchronously, and prints the frames per second of the delegate painting
+the rating stars one by one and copying the option of the other cells, as
+it used to, and of the delegate drawing the cached rating pixmaps."""
+
+import copy
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QPalette
+from PySide6.QtWidgets import QAbstractItemView, QApplication, QStyle, QTableView
+
+from bookdelegate import BookDelegate
+import rc_books  # noqa: F401
+
+
+HEADERS = ("", "Title", "Author Name", "Genre", "Year", "Rating")
+
+
+class GeneratedBooksModel(QAbstractTableModel):
+    """Read-only model of generated books, the cells being computed on
+    demand so that the model costs nothing to build."""
+
+    def __init__(self, rows, seed=0, parent=None):
+        super().__init__(parent)
+        self._rows = rows
+        self._seed = seed
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+        if column == 0:
+            return row + 1
+        if column == 1:
+            return f"Book {row + 1}"
+        if column == 2:
+            return f"Author {row % 997}"
+        if column == 3:
+            return f"Genre {row % 13}"
+        # Multiplicative hashing, cheaper than a random generator per cell
+        value = ((row + self._seed * self._rows) * 2654435761) & 0xffffffff
+        return 1800 + value % 226 if column == 4 else (value >> 8) % 6
+
+
+class UncachedBookDelegate(BookDelegate):
+    """The delegate painting as it did before the rating pixmaps were
+    cached, for comparison."""
+
+    def paint(self, painter, option, index):
+        if index.column() != 5:
+            opt = copy.copy(option)
+            opt.rect = option.rect.adjusted(0, 0, -1, -1)
+            BookDelegate.__base__.paint(self, painter, opt, index)
+        else:
+            model = index.model()
+            if option.state & QStyle.State_Enabled:
+                if option.state & QStyle.State_Active:
+                    color_group = QPalette.Normal
+                else:
+                    color_group = QPalette.Inactive
+            else:
+                color_group = QPalette.Disabled
+
+            if option.state & QStyle.State_Selected:
+                painter.fillRect(option.rect,
+                                 option.palette.color(color_group, QPalette.Highlight))
+            rating = model.data(index, Qt.ItemDataRole.DisplayRole)
+            width = self.star.width()
+            height = self.star.height()
+            x = option.rect.x()
+            y = option.rect.y() + (option.rect.height() / 2) - (height / 2)
+            for i in range(5):
+                if i < rating:
+                    painter.drawPixmap(x, y, self.star_filled)
+                else:
+                    painter.drawPixmap(x, y, self.star)
+                x += width
+
+        pen = painter.pen()
+        painter.setPen(option.palette.color(QPalette.Mid))
+        painter.drawLine(option.rect.bottomLeft(), option.rect.bottomRight())
+        painter.drawLine(option.rect.topRight(), option.rect.bottomRight())
+        painter.setPen(pen)
+
+
+def scroll(view, frames):
+    """Scroll the view by a page per frame, wrapping around at the end, and
+    return the frames per second."""
+    bar = view.verticalScrollBar()
+    step = max(1, bar.pageStep())
+    value = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        value += step
+        if value > bar.maximum():
+            value = 0
+        bar.setValue(value)
+        view.viewport().repaint()
+    return frames / (time.perf_counter() - start)
+
+
+def create_view(model, delegate_type, width, height):
+    view = QTableView()
+    view.setModel(model)
+    view.setItemDelegate(delegate_type(view))
+    view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+    view.setShowGrid(False)
+    view.verticalHeader().hide()
+    view.resize(width, height)
+    view.show()
+    view.resizeColumnsToContents()
+    view.selectRow(0)
+    return view
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Repaint benchmark of the books delegate",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="rows of the model (default 100000)")
+    parser.add_argument("--frames", "-f", type=int, default=500,
+                        help="frames painted for each delegate (default 500)")
+    parser.add_argument("--size", default="800x1000",
+                        help="size of the view (default 800x1000)")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+    width, height = (int(value) for value in options.size.split("x"))
+    model = GeneratedBooksModel(options.rows)
+
+    print(f"{options.rows} rows, {options.frames} frames of {width}x{height}")
+    for name, delegate_type in (("before", UncachedBookDelegate), ("after", BookDelegate)):
+        view = create_view(model, delegate_type, width, height)
+        app.processEvents()
+        # Warms up the caches of the style and of the delegate
+        scroll(view, 10)
+        print(f"{name:>7}: {scroll(view, options.frames):8.1f} frames/s", flush=True)
+        view.close()
+        view.deleteLater()
+        app.processEvents()
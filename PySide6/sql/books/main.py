@@ -3,14 +3,24 @@
 from __future__ import annotations
 
 import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
 from PySide6.QtWidgets import QApplication
 from bookwindow import BookWindow
 import rc_books  # noqa: F401
 
 if __name__ == "__main__":
-    app = QApplication([])
+    parser = ArgumentParser(description="Books", formatter_class=RawTextHelpFormatter)
+    parser.add_argument("database", nargs="?", default=":memory:",
+                        help="SQLite file of the database, created by createdb.py\n"
+                        "(default: the demo books in memory)")
+    parser.add_argument("--windowed", "-w", action="store_true",
+                        help="fetch the rows around the visible ones, sorted and filtered\n"
+                        "by SQL, for large databases")
+    options, args = parser.parse_known_args()
 
-    window = BookWindow()
+    app = QApplication(sys.argv[:1] + args)
+
+    window = BookWindow(options.database, options.windowed)
     window.resize(800, 600)
     window.show()
 
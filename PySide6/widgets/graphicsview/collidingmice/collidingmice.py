@@ -5,12 +5,18 @@ from __future__ import annotations
 
 import math
 import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+import numpy as np
 
 from PySide6.QtCore import (QLineF, QPointF, QRandomGenerator, QRectF, QTimer, Qt)
 from PySide6.QtGui import (QBrush, QColor, QPainter, QPainterPath, QPixmap, QPolygonF, QTransform)
 from PySide6.QtWidgets import (QApplication, QGraphicsItem, QGraphicsScene, QGraphicsView)
 
 import mice_rc  # noqa: F401
+from mousesimulation import HOME_RADIUS, MouseSimulation
+
+MOUSE_COUNT = 7
 
 
 def random(boundary):
@@ -52,6 +58,9 @@ class Mouse(QGraphicsItem):
         path.addRect(-10, -20, 20, 40)
         return path
 
+    def is_colliding(self):
+        return bool(self.scene().collidingItems(self))
+
     def paint(self, painter, option, widget):
         # Body.
         painter.setBrush(self.color)
@@ -71,7 +80,7 @@ class Mouse(QGraphicsItem):
         painter.drawEllipse(QRectF(4.0 + self._mouse_eye_direction, -17, 4, 4))
 
         # Ears.
-        if self.scene().collidingItems(self):
+        if self.is_colliding():
             painter.setBrush(Qt.GlobalColor.red)
         else:
             painter.setBrush(Qt.GlobalColor.darkYellow)
@@ -149,20 +158,82 @@ class Mouse(QGraphicsItem):
         self.setPos(self.mapToParent(0, -(3 + math.sin(self.speed) * 3)))
 
 
-if __name__ == '__main__':
-    MOUSE_COUNT = 7
-    app = QApplication(sys.argv)
+class SimulatedMouse(Mouse):
+    """Mouse whose state is computed by a MouseSimulation."""
+
+    def __init__(self):
+        super().__init__()
+        self.colliding = False
+        # The orientation of the mouse is all in its rotation
+        self.setTransform(QTransform())
+
+    def is_colliding(self):
+        return self.colliding
 
-    scene = QGraphicsScene()
-    scene.setSceneRect(-300, -300, 600, 600)
+    def advance(self, phase):
+        pass
+
+
+class SimulationScene(QGraphicsScene):
+    """Scene showing the mice of a MouseSimulation, stepped once per
+    advance() for all the mice."""
+
+    def __init__(self, simulation, parent=None):
+        super().__init__(parent)
+        self._simulation = simulation
+        self._mice = []
+        for _ in range(len(simulation)):
+            mouse = SimulatedMouse()
+            self.addItem(mouse)
+            self._mice.append(mouse)
+        self._sync()
+
+    def advance(self):
+        self._simulation.step()
+        self._sync()
+
+    def _sync(self):
+        simulation = self._simulation
+        for mouse, (x, y), rotation, eye_direction, colliding in zip(
+                self._mice, simulation.positions.tolist(), simulation.rotations.tolist(),
+                simulation.eye_directions.tolist(), simulation.colliding.tolist()):
+            mouse.setPos(x, y)
+            mouse.setRotation(rotation)
+            mouse._mouse_eye_direction = eye_direction
+            mouse.colliding = colliding
+
+
+def start_positions(count):
+    """Return the positions of the mice, on a circle, or at random in a disk
+    whose area grows with the count for more than MOUSE_COUNT mice."""
+    if count <= MOUSE_COUNT:
+        angles = np.arange(count) * 6.28 / count
+        return np.column_stack((np.sin(angles) * 200, np.cos(angles) * 200))
+    rng = np.random.default_rng()
+    radius = 200 * math.sqrt(count / MOUSE_COUNT) * np.sqrt(rng.random(count))
+    angles = rng.uniform(0, 2 * math.pi, count)
+    return np.column_stack((np.sin(angles) * radius, np.cos(angles) * radius))
+
+
+def create_scene(count=MOUSE_COUNT, simulation=False):
+    """Return a scene of count mice, moved by a MouseSimulation or, by
+    default, by their advance()."""
+    scale = math.sqrt(max(count, MOUSE_COUNT) / MOUSE_COUNT)
+    positions = start_positions(count)
+    if simulation:
+        scene = SimulationScene(MouseSimulation(positions, home_radius=HOME_RADIUS * scale))
+    else:
+        scene = QGraphicsScene()
+        for x, y in positions.tolist():
+            mouse = Mouse()
+            mouse.setPos(x, y)
+            scene.addItem(mouse)
+    scene.setSceneRect(-300 * scale, -300 * scale, 600 * scale, 600 * scale)
     scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+    return scene
 
-    for i in range(MOUSE_COUNT):
-        mouse = Mouse()
-        mouse.setPos(math.sin((i * 6.28) / MOUSE_COUNT) * 200,
-                     math.cos((i * 6.28) / MOUSE_COUNT) * 200)
-        scene.addItem(mouse)
 
+def create_view(scene):
     view = QGraphicsView(scene)
     view.setRenderHint(QPainter.RenderHint.Antialiasing)
     view.setBackgroundBrush(QBrush(QPixmap(':/images/cheese.jpg')))
@@ -171,6 +242,22 @@ if __name__ == '__main__':
     view.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
     view.setWindowTitle("Colliding Mice")
     view.resize(400, 300)
+    return view
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Colliding Mice example",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--count", "-n", type=int, default=MOUSE_COUNT,
+                        help=f"number of mice (default {MOUSE_COUNT})")
+    parser.add_argument("--simulation", "-s", action="store_true",
+                        help="move the mice by a simulation on NumPy arrays")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+
+    scene = create_scene(options.count, options.simulation)
+    view = create_view(scene)
     view.show()
 
     timer = QTimer()
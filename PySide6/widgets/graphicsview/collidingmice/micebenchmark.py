@@ -0,0 +1,77 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Frame rate benchmark of the Colliding Mice example.
+
+Advances scenes of each number of mice, moved by the advance() of the mice
+querying the scene and by the simulation on NumPy arrays, repainting the
+whole view after each tick, and prints the frames per second. Moved by
+their advance(), 10000 mice take minutes per frame: above --items-limit
+mice, the items mode is skipped."""
+
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from PySide6.QtWidgets import QApplication, QGraphicsView
+
+from collidingmice import create_scene, create_view
+
+MODES = ("items", "simulation")
+
+
+def parse_counts(value):
+    return [int(count) for count in value.split(",")]
+
+
+def frames_per_second(app, scene, view, duration):
+    """Advance and repaint for at least duration seconds, return the mean
+    times of a tick and a paint in seconds."""
+    frames = 0
+    tick_time = paint_time = 0.0
+    while tick_time + paint_time < duration:
+        start = time.perf_counter()
+        scene.advance()
+        app.processEvents()
+        middle = time.perf_counter()
+        view.viewport().repaint()
+        tick_time += middle - start
+        paint_time += time.perf_counter() - middle
+        frames += 1
+    return tick_time / frames, paint_time / frames
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Colliding Mice frame rate benchmark",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--count", "-n", type=parse_counts,
+                        default=parse_counts("1000,10000"),
+                        help="numbers of mice, comma separated (default 1000,10000)")
+    parser.add_argument("--duration", "-d", type=float, default=5,
+                        help="duration of each measure in seconds (default 5)")
+    parser.add_argument("--mode", choices=MODES, action="append",
+                        help="mode, can be repeated, all of them by default")
+    parser.add_argument("--items-limit", type=int, default=1000,
+                        help="largest number of mice moved by their advance() (default 1000)")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+    print(f"{'mice':>7} {'mode':>10} {'tick ms':>9} {'paint ms':>9} {'frames/s':>9}")
+    for count in options.count:
+        for mode in options.mode or MODES:
+            if mode == "items" and count > options.items_limit:
+                continue
+            scene = create_scene(count, mode == "simulation")
+            view = create_view(scene)
+            # Only the explicit repaints are measured, the whole scene is shown
+            view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.NoViewportUpdate)
+            view.resize(800, 800)
+            view.show()
+            view.fitInView(scene.sceneRect())
+            app.processEvents()
+            tick, paint = frames_per_second(app, scene, view, options.duration)
+            print(f"{count:>7} {mode:>10} {1000 * tick:9.1f} {1000 * paint:9.1f} "
+                  f"{1 / (tick + paint):9.1f}", flush=True)
+            view.close()
+            del view, scene
@@ -0,0 +1,218 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Simulation of the Colliding Mice example on NumPy arrays.
+
+The state of the mice is kept in arrays holding one element per mouse. The
+mice seen by each mouse in its danger triangle and the mice it collides
+with, which Mouse.advance() and Mouse.paint() query the scene for, are
+found once per tick: the pairs of mice of neighboring cells of a spatial
+hash are tested for the intersection of their shapes, all at once."""
+
+import math
+
+import numpy as np
+
+# The shape of a mouse, as returned by Mouse.shape(), and the triangle in
+# front of it in which the other mice are avoided, in item coordinates
+SHAPE = np.array([(-10.0, -20.0), (10.0, -20.0), (10.0, 20.0), (-10.0, 20.0)])
+DANGER = np.array([(0.0, 0.0), (-30.0, -50.0), (30.0, -50.0)])
+HOME_RADIUS = 150.0
+
+# Farthest distances between the positions of two mice whose shapes
+# intersect, and of a mouse and a mouse in its danger triangle
+SHAPE_RADIUS = math.hypot(10.0, 20.0)
+COLLISION_DISTANCE = 2 * SHAPE_RADIUS
+DANGER_DISTANCE = math.hypot(30.0, 50.0) + SHAPE_RADIUS
+
+
+def to_scene(points, positions, rotations):
+    """Map the points, a (k, 2) array in item coordinates, to the scene for
+    each of the n items at positions rotated by rotations in degrees.
+    Return an (n, k, 2) array."""
+    radians = np.radians(rotations)[:, None]
+    cos = np.cos(radians)
+    sin = np.sin(radians)
+    x = points[:, 0]
+    y = points[:, 1]
+    return np.stack((x * cos - y * sin + positions[:, 0, None],
+                     x * sin + y * cos + positions[:, 1, None]), axis=-1)
+
+
+def from_scene(offsets, rotations):
+    """Map offsets in the scene, an (n, 2) array, to the coordinates of
+    items rotated by rotations in degrees."""
+    radians = np.radians(rotations)
+    cos = np.cos(radians)
+    sin = np.sin(radians)
+    x = offsets[:, 0]
+    y = offsets[:, 1]
+    return np.column_stack((x * cos + y * sin, y * cos - x * sin))
+
+
+def polygons_intersect(a, b):
+    """Return whether each pair of convex polygons of a, a (k, p, 2)
+    array, and b, a (k, q, 2) array, intersect, by the separating axis
+    theorem."""
+    result = np.ones(len(a), dtype=bool)
+    for polygon in (a, b):
+        sides = np.roll(polygon, -1, axis=1) - polygon
+        normals = np.stack((-sides[:, :, 1], sides[:, :, 0]), axis=-1)
+        projected_a = np.einsum("kej,kpj->kep", normals, a)
+        projected_b = np.einsum("kej,kqj->keq", normals, b)
+        separated = ((projected_a.max(axis=2) < projected_b.min(axis=2))
+                     | (projected_b.max(axis=2) < projected_a.min(axis=2)))
+        result &= ~separated.any(axis=1)
+    return result
+
+
+class SpatialHash:
+    """Buckets points by the square cells of size cell_size containing
+    them, the cells being hashed into a table twice as large as the number
+    of points, to find the pairs of points closer than a cell."""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+
+    @staticmethod
+    def _keys(cx, cy, table_size):
+        return ((cx * 73856093) ^ (cy * 19349663)) & (table_size - 1)
+
+    def pairs(self, positions, distance=None):
+        """Return the indexes of the pairs of points of positions, an (n, 2)
+        array, at most distance apart, the cell size by default, as two
+        arrays. Each pair is listed in both orders."""
+        n = len(positions)
+        distance = self.cell_size if distance is None else min(distance, self.cell_size)
+        if n < 2:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        cells = np.floor(positions / self.cell_size).astype(np.int64)
+        cx = cells[:, 0]
+        cy = cells[:, 1]
+        table_size = 1 << (2 * n - 1).bit_length()
+        keys = self._keys(cx, cy, table_size)
+        counts = np.bincount(keys, minlength=table_size)
+        order = np.argsort(keys, kind="stable")
+        starts = np.cumsum(counts) - counts
+        points = np.arange(n)
+        firsts = []
+        seconds = []
+        for oy in (-1, 0, 1):
+            for ox in (-1, 0, 1):
+                neighbor_keys = self._keys(cx + ox, cy + oy, table_size)
+                pair_counts = counts[neighbor_keys]
+                total = int(pair_counts.sum())
+                if not total:
+                    continue
+                first = np.repeat(points, pair_counts)
+                # Rank of each pair within the points of its bucket
+                offsets = np.cumsum(pair_counts) - pair_counts
+                rank = np.arange(total) - np.repeat(offsets, pair_counts)
+                second = order[np.repeat(starts[neighbor_keys], pair_counts) + rank]
+                # The other cells hashed into the same bucket are skipped
+                d = positions[second] - positions[first]
+                keep = ((cx[second] == cx[first] + ox) & (cy[second] == cy[first] + oy)
+                        & (first != second)
+                        & (d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] <= distance * distance))
+                firsts.append(first[keep])
+                seconds.append(second[keep])
+        if not firsts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+
+class MouseSimulation:
+    """Positions of n mice, an (n, 2) array, and their rotations, angles,
+    speeds and eye directions, moved by step() as Mouse.advance() does.
+
+    The mice stay around the origin, within home_radius. colliding tells
+    which mice collide with another one at their current positions."""
+
+    def __init__(self, positions, rotations=None, home_radius=HOME_RADIUS, seed=None):
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        n = len(self.positions)
+        self._rng = np.random.default_rng(seed)
+        if rotations is None:
+            rotations = self._rng.uniform(0.0, 360.0, n)
+        self.rotations = np.array(rotations, dtype=np.float64)
+        self.angles = np.zeros(n)
+        self.speeds = np.zeros(n)
+        self.eye_directions = np.zeros(n)
+        self.colliding = np.zeros(n, dtype=bool)
+        self.home_radius = home_radius
+        self._hash = SpatialHash(DANGER_DISTANCE)
+        self._danger = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))
+        self._query()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _query(self):
+        """Find the mice in the danger triangle of each mouse and the mice
+        colliding with another one."""
+        positions = self.positions
+        n = len(positions)
+        first, second = self._hash.pairs(positions)
+        shapes = to_scene(SHAPE, positions, self.rotations)
+
+        d = positions[second] - positions[first]
+        close = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] <= COLLISION_DISTANCE ** 2
+        hits = polygons_intersect(shapes[first[close]], shapes[second[close]])
+        self.colliding = np.bincount(first[close][hits], minlength=n) > 0
+
+        triangles = to_scene(DANGER, positions[first], self.rotations[first])
+        seen = polygons_intersect(triangles, shapes[second])
+        self._danger = (first[seen], second[seen])
+
+    def step(self):
+        """Move all the mice by one tick, from the positions of the others
+        at the end of the previous tick."""
+        rng = self._rng
+        n = len(self.positions)
+        two_pi = 2.0 * math.pi
+        angles = self.angles
+
+        # Don't move too far away
+        to_center = from_scene(-self.positions, self.rotations)
+        away = np.hypot(to_center[:, 0], to_center[:, 1]) > self.home_radius
+        angle_to_center = np.arctan2(to_center[:, 1], to_center[:, 0])
+        angle_to_center = np.mod(math.pi - angle_to_center + math.pi / 2, two_pi)
+        left = away & (angle_to_center > math.pi / 4) & (angle_to_center < math.pi)
+        right = (away & (angle_to_center >= math.pi)
+                 & (angle_to_center < math.pi + math.pi / 2 + math.pi / 4))
+        sin = np.sin(angles)
+        turn = np.where(left, np.where(angles < -math.pi / 2, 0.25, -0.25), 0.0)
+        turn += np.where(right, np.where(angles < math.pi / 2, 0.25, -0.25), 0.0)
+        turn += np.where(~away & (sin < 0), 0.25, 0.0)
+        turn -= np.where(~away & (sin > 0), 0.25, 0.0)
+        angles += turn
+
+        # Try not to crash with any other mice
+        first, second = self._danger
+        to_mouse = from_scene(self.positions[second] - self.positions[first],
+                              self.rotations[first])
+        angle_to_mouse = np.arctan2(to_mouse[:, 1], to_mouse[:, 0])
+        angle_to_mouse = np.mod(math.pi - angle_to_mouse + math.pi / 2, two_pi)
+        avoid = np.where(angle_to_mouse < math.pi / 2, 0.5,
+                         np.where(angle_to_mouse > two_pi - math.pi / 2, -0.5, 0.0))
+        angles += np.bincount(first, weights=avoid, minlength=n)
+
+        # Add some random movement
+        in_danger = np.bincount(first, minlength=n) > 0
+        wander = in_danger & (rng.integers(0, 10, n) == 0)
+        sign = np.where(rng.integers(0, 2, n) != 0, 1.0, -1.0)
+        angles += np.where(wander, sign * rng.integers(0, 100, n) / 500.0, 0.0)
+
+        self.speeds += (-50 + rng.integers(0, 100, n)) / 100.0
+
+        dx = np.sin(angles) * 10
+        self.eye_directions = np.where(np.abs(dx / 5) < 1, 0.0, dx / 5)
+
+        self.rotations += dx
+        step = 3 + np.sin(self.speeds) * 3
+        radians = np.radians(self.rotations)
+        self.positions[:, 0] += step * np.sin(radians)
+        self.positions[:, 1] -= step * np.cos(radians)
+
+        self._query()
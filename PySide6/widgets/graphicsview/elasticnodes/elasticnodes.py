@@ -6,14 +6,26 @@ from __future__ import annotations
 import sys
 import weakref
 import math
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+import numpy as np
 
 from PySide6.QtCore import (QLineF, QPointF, QRandomGenerator, QRectF, QSizeF,
-                            Qt, qAbs)
+                            Qt)
 from PySide6.QtGui import (QColor, QBrush, QLinearGradient, QPainter, QPainterPath, QPen,
                            QPolygonF, QRadialGradient)
 from PySide6.QtWidgets import (QApplication, QGraphicsItem, QGraphicsScene,
                                QGraphicsView, QStyle)
 
+from forcelayout import ForceLayout
+from graphloader import read_graph
+
+
+# Below this scale, the items are drawn without details nor antialiasing
+DETAIL_LOD = 0.5
+# Average distance between the nodes of a loaded graph when it is built
+SPACING = 30.0
+
 
 def random(boundary):
     return QRandomGenerator.global_().bounded(boundary)
@@ -21,18 +33,20 @@ def random(boundary):
 
 class Edge(QGraphicsItem):
 
-    def __init__(self, sourceNode, destNode):
+    def __init__(self, sourceNode, destNode, adjust=True):
         super().__init__()
 
         self._arrow_size = 10.0
         self._source_point = QPointF()
         self._dest_point = QPointF()
+        self._bounding_rect = QRectF()
         self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
         self.source = weakref.ref(sourceNode)
         self.dest = weakref.ref(destNode)
-        self.source().add_edge(self)
-        self.dest().add_edge(self)
-        self.adjust()
+        self.source().add_edge(self, adjust)
+        self.dest().add_edge(self, adjust)
+        if adjust:
+            self.adjust()
 
     def item_type(self):
         return QGraphicsItem.UserType + 2
@@ -64,21 +78,33 @@ class Edge(QGraphicsItem):
 
         edge_offset = QPointF((line.dx() * 10) / length, (line.dy() * 10) / length)
 
+        self.set_points(line.p1() + edge_offset, line.p2() - edge_offset)
+
+    def set_points(self, source_point, dest_point, bounding_rect=None):
+        """Set the ends of the line, also computed with the bounding
+        rectangle by GraphWidget.update_edges()."""
         self.prepareGeometryChange()
-        self._source_point = line.p1() + edge_offset
-        self._dest_point = line.p2() - edge_offset
+        self._source_point = source_point
+        self._dest_point = dest_point
+
+        # The scene asks for the bounding rectangle of every item it paints
+        if bounding_rect is None:
+            width = dest_point.x() - source_point.x()
+            height = dest_point.y() - source_point.y()
+            rect = QRectF(source_point, QSizeF(width, height))
+            extra = self.extra()
+            bounding_rect = rect.normalized().adjusted(-extra, -extra, extra, extra)
+        self._bounding_rect = bounding_rect
+
+    def extra(self):
+        """Return the margin of the bounding rectangle around the line."""
+        pen_width = 1
+        return (pen_width + self._arrow_size) / 2.0
 
     def boundingRect(self):
         if not self.source() or not self.dest():
             return QRectF()
-
-        pen_width = 1
-        extra = (pen_width + self._arrow_size) / 2.0
-
-        width = self._dest_point.x() - self._source_point.x()
-        height = self._dest_point.y() - self._source_point.y()
-        rect = QRectF(self._source_point, QSizeF(width, height))
-        return rect.normalized().adjusted(-extra, -extra, extra, extra)
+        return self._bounding_rect
 
     def paint(self, painter, option, widget):
         if not self.source() or not self.dest():
@@ -90,6 +116,13 @@ class Edge(QGraphicsItem):
         if line.length() == 0.0:
             return
 
+        # Zoomed out, the arrows would not be seen
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < DETAIL_LOD:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+            painter.setPen(QPen(Qt.GlobalColor.black, 0))
+            painter.drawLine(line)
+            return
+
         painter.setPen(QPen(Qt.GlobalColor.black, 1, Qt.PenStyle.SolidLine,
                             Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin))
         painter.drawLine(line)
@@ -125,7 +158,11 @@ class Node(QGraphicsItem):
 
         self.graph = weakref.ref(graphWidget)
         self._edge_list = []
-        self._new_pos = QPointF()
+        adjust = 2.0
+        self._bounding_rect = QRectF(-10 - adjust, -10 - adjust,
+                                     23 + adjust, 23 + adjust)
+        # Index of the node in the arrays of the layout
+        self.index = -1
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
         self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
@@ -134,64 +171,16 @@ class Node(QGraphicsItem):
     def item_type(self):
         return QGraphicsItem.UserType + 1
 
-    def add_edge(self, edge):
+    def add_edge(self, edge, adjust=True):
         self._edge_list.append(weakref.ref(edge))
-        edge.adjust()
+        if adjust:
+            edge.adjust()
 
     def edges(self):
         return self._edge_list
 
-    def calculate_forces(self):
-        if not self.scene() or self.scene().mouseGrabberItem() is self:
-            self._new_pos = self.pos()
-            return
-
-        # Sum up all forces pushing this item away.
-        xvel = 0.0
-        yvel = 0.0
-        for item in self.scene().items():
-            if not isinstance(item, Node):
-                continue
-
-            line = QLineF(self.mapFromItem(item, 0, 0), QPointF(0, 0))
-            dx = line.dx()
-            dy = line.dy()
-            l = 2.0 * (dx * dx + dy * dy)  # noqa: E741
-            if l > 0:
-                xvel += (dx * 150.0) / l
-                yvel += (dy * 150.0) / l
-
-        # Now subtract all forces pulling items together.
-        weight = (len(self._edge_list) + 1) * 10.0
-        for edge in self._edge_list:
-            if edge().source_node() is self:
-                pos = self.mapFromItem(edge().dest_node(), 0, 0)
-            else:
-                pos = self.mapFromItem(edge().source_node(), 0, 0)
-            xvel += pos.x() / weight
-            yvel += pos.y() / weight
-
-        if qAbs(xvel) < 0.1 and qAbs(yvel) < 0.1:
-            xvel = yvel = 0.0
-
-        scene_rect = self.scene().sceneRect()
-        self._new_pos = self.pos() + QPointF(xvel, yvel)
-        self._new_pos.setX(min(max(self._new_pos.x(), scene_rect.left() + 10),
-                               scene_rect.right() - 10))
-        self._new_pos.setY(min(max(self._new_pos.y(), scene_rect.top() + 10),
-                               scene_rect.bottom() - 10))
-
-    def advance(self):
-        if self._new_pos == self.pos():
-            return False
-
-        self.setPos(self._new_pos)
-        return True
-
     def boundingRect(self):
-        adjust = 2.0
-        return QRectF(-10 - adjust, -10 - adjust,
-                      23 + adjust, 23 + adjust)
+        return self._bounding_rect
 
     def shape(self):
         path = QPainterPath()
@@ -199,6 +188,13 @@ class Node(QGraphicsItem):
         return path
 
     def paint(self, painter, option, widget):
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < DETAIL_LOD:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(Qt.GlobalColor.darkYellow)
+            painter.drawRect(-10, -10, 20, 20)
+            return
+
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(Qt.GlobalColor.darkGray)
         painter.drawEllipse(-7, -7, 20, 20)
@@ -219,9 +215,13 @@ class Node(QGraphicsItem):
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange:
-            for edge in self._edge_list:
-                edge().adjust()
-            self.graph().item_moved()
+            graph = self.graph()
+            # The edges are updated once per tick while the layout is applied
+            if not graph.is_syncing():
+                for edge in self._edge_list:
+                    edge().adjust()
+                graph.node_moved(self, value)
+                graph.item_moved()
 
         return QGraphicsItem.itemChange(self, change, value)
 
@@ -235,7 +235,7 @@ class Node(QGraphicsItem):
 
 
 class GraphWidget(QGraphicsView):
-    def __init__(self):
+    def __init__(self, edges=None):
         super().__init__()
 
         self._timer_id = 0
@@ -249,51 +249,149 @@ class GraphWidget(QGraphicsView):
         self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
         self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
 
-        node1 = Node(self)
-        node2 = Node(self)
-        node3 = Node(self)
-        node4 = Node(self)
-        self._center_node = Node(self)
-        node6 = Node(self)
-        node7 = Node(self)
-        node8 = Node(self)
-        node9 = Node(self)
-        scene.addItem(node1)
-        scene.addItem(node2)
-        scene.addItem(node3)
-        scene.addItem(node4)
-        scene.addItem(self._center_node)
-        scene.addItem(node6)
-        scene.addItem(node7)
-        scene.addItem(node8)
-        scene.addItem(node9)
-        scene.addItem(Edge(node1, node2))
-        scene.addItem(Edge(node2, node3))
-        scene.addItem(Edge(node2, self._center_node))
-        scene.addItem(Edge(node3, node6))
-        scene.addItem(Edge(node4, node1))
-        scene.addItem(Edge(node4, self._center_node))
-        scene.addItem(Edge(self._center_node, node6))
-        scene.addItem(Edge(self._center_node, node8))
-        scene.addItem(Edge(node6, node9))
-        scene.addItem(Edge(node7, node4))
-        scene.addItem(Edge(node8, node7))
-        scene.addItem(Edge(node9, node8))
-
-        node1.setPos(-50, -50)
-        node2.setPos(0, -50)
-        node3.setPos(50, -50)
-        node4.setPos(-50, 0)
-        self._center_node.setPos(0, 0)
-        node6.setPos(50, 0)
-        node7.setPos(-50, 50)
-        node8.setPos(0, 50)
-        node9.setPos(50, 50)
+        self._layout = ForceLayout(np.empty((0, 2)), [])
+        self._nodes = []
+        self._edge_items = []
+        self._edge_pairs = []
+        self._edges_changed = False
+        # Set while the positions computed by the layout are applied
+        self._syncing = False
+
+        node1 = self.add_node(-50, -50)
+        node2 = self.add_node(0, -50)
+        node3 = self.add_node(50, -50)
+        node4 = self.add_node(-50, 0)
+        self._center_node = self.add_node(0, 0)
+        node6 = self.add_node(50, 0)
+        node7 = self.add_node(-50, 50)
+        node8 = self.add_node(0, 50)
+        node9 = self.add_node(50, 50)
+        self.add_edge(node1, node2)
+        self.add_edge(node2, node3)
+        self.add_edge(node2, self._center_node)
+        self.add_edge(node3, node6)
+        self.add_edge(node4, node1)
+        self.add_edge(node4, self._center_node)
+        self.add_edge(self._center_node, node6)
+        self.add_edge(self._center_node, node8)
+        self.add_edge(node6, node9)
+        self.add_edge(node7, node4)
+        self.add_edge(node8, node7)
+        self.add_edge(node9, node8)
 
         self.scale(0.8, 0.8)
         self.setMinimumSize(400, 400)
         self.setWindowTitle(self.tr("Elastic Nodes"))
 
+        if edges is not None:
+            self.set_graph(edges)
+
+    def set_graph(self, edges, node_count=0):
+        """Replace the graph by the one of edges, an (m, 2) array of node
+        indexes, placing the nodes at random.
+
+        The items are created with the scene index disabled and the edges
+        adjusted all at once. The index stays disabled: the nodes move on
+        every tick, and a BSP tree holding long edges grows without bound."""
+        edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+        node_count = max(node_count, int(edges.max()) + 1 if len(edges) else 0)
+        if self._timer_id:
+            self.killTimer(self._timer_id)
+            self._timer_id = 0
+
+        half = SPACING * math.sqrt(max(node_count, 1)) / 2
+        positions = np.random.default_rng().uniform(-half, half, (node_count, 2))
+        self._layout = ForceLayout(positions, edges)
+        self._edge_pairs = edges.tolist()
+        self._edges_changed = False
+
+        scene = self.scene()
+        self._nodes = []
+        self._edge_items = []
+        self._center_node = None
+        scene.clear()
+        scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        scene.setSceneRect(-2 * half, -2 * half, 4 * half, 4 * half)
+        self.setUpdatesEnabled(False)
+        self._syncing = True
+        try:
+            nodes = self._nodes
+            for index, (x, y) in enumerate(positions.tolist()):
+                node = Node(self)
+                node.index = index
+                node.setPos(x, y)
+                scene.addItem(node)
+                nodes.append(node)
+            edge_items = self._edge_items
+            for source, dest in self._edge_pairs:
+                edge = Edge(nodes[source], nodes[dest], adjust=False)
+                scene.addItem(edge)
+                edge_items.append(edge)
+            self.update_edges()
+        finally:
+            self._syncing = False
+            self.setUpdatesEnabled(True)
+        if nodes:
+            self._center_node = nodes[0]
+        self.resetTransform()
+        self.fitInView(scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+
+    def is_syncing(self):
+        return self._syncing
+
+    def update_edges(self, moved=None):
+        """Adjust the lines of the edges of the moved nodes, an array of
+        indexes, or of all the edges, from the positions of the layout."""
+        layout = self._layout
+        edges = layout.edges
+        if moved is None:
+            rows = np.arange(len(edges))
+        else:
+            is_moved = np.zeros(len(layout), dtype=bool)
+            is_moved[moved] = True
+            rows = np.flatnonzero(is_moved[edges[:, 0]] | is_moved[edges[:, 1]])
+        if not len(rows):
+            return
+        source = layout.positions[edges[rows, 0]]
+        dest = layout.positions[edges[rows, 1]]
+        d = dest - source
+        length = np.hypot(d[:, 0], d[:, 1])
+        valid = length > 0
+        offset = d[valid] * (10.0 / length[valid])[:, None]
+        source = source[valid] + offset
+        dest = dest[valid] - offset
+        edge_items = self._edge_items
+        extra = edge_items[0].extra()
+        low = np.minimum(source, dest) - extra
+        size = np.abs(dest - source) + 2 * extra
+        for row, sx, sy, dx, dy, left, top, width, height in zip(
+                rows[valid].tolist(), source[:, 0].tolist(), source[:, 1].tolist(),
+                dest[:, 0].tolist(), dest[:, 1].tolist(), low[:, 0].tolist(),
+                low[:, 1].tolist(), size[:, 0].tolist(), size[:, 1].tolist()):
+            edge_items[row].set_points(QPointF(sx, sy), QPointF(dx, dy),
+                                       QRectF(left, top, width, height))
+
+    def add_node(self, x, y):
+        node = Node(self)
+        node.index = self._layout.add_node(x, y)
+        self._nodes.append(node)
+        self.scene().addItem(node)
+        node.setPos(x, y)
+        return node
+
+    def add_edge(self, source, dest):
+        edge = Edge(source, dest)
+        self.scene().addItem(edge)
+        self._edge_items.append(edge)
+        self._edge_pairs.append((source.index, dest.index))
+        self._edges_changed = True
+        return edge
+
+    def node_moved(self, node, pos):
+        """Store the position of a node moved by the user in the layout."""
+        if not self._syncing and node.index >= 0:
+            self._layout.positions[node.index] = (pos.x(), pos.y())
+
     def item_moved(self):
         if not self._timer_id:
             self._timer_id = self.startTimer(1000 / 25)
@@ -301,7 +399,9 @@ class GraphWidget(QGraphicsView):
     def keyPressEvent(self, event):
         key = event.key()
 
-        if key == Qt.Key.Key_Up:
+        if self._center_node is None:
+            QGraphicsView.keyPressEvent(self, event)
+        elif key == Qt.Key.Key_Up:
             self._center_node.moveBy(0, -20)
         elif key == Qt.Key.Key_Down:
             self._center_node.moveBy(0, 20)
@@ -320,18 +420,33 @@ class GraphWidget(QGraphicsView):
         else:
             QGraphicsView.keyPressEvent(self, event)
 
-    def timerEvent(self, event):
-        nodes = [item for item in self.scene().items() if isinstance(item, Node)]
-
-        for node in nodes:
-            node.calculate_forces()
-
-        items_moved = False
-        for node in nodes:
-            if node.advance():
-                items_moved = True
+    def tick(self):
+        """Step the layout and move the items of the nodes which moved,
+        return their number."""
+        layout = self._layout
+        if self._edges_changed:
+            layout.set_edges(self._edge_pairs)
+            self._edges_changed = False
+
+        grabber = self.scene().mouseGrabberItem()
+        pinned = [grabber.index] if isinstance(grabber, Node) else None
+        rect = self.scene().sceneRect()
+        moved = layout.step((rect.left(), rect.top(), rect.right(), rect.bottom()), pinned)
+
+        # Only the items are updated, the forces are computed by the layout
+        positions = layout.positions
+        nodes = self._nodes
+        self._syncing = True
+        try:
+            for index in moved.tolist():
+                nodes[index].setPos(positions[index, 0], positions[index, 1])
+            self.update_edges(moved)
+        finally:
+            self._syncing = False
+        return len(moved)
 
-        if not items_moved:
+    def timerEvent(self, event):
+        if not self.tick():
             self.killTimer(self._timer_id)
             self._timer_id = 0
 
@@ -385,9 +500,21 @@ class GraphWidget(QGraphicsView):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = ArgumentParser(description="Elastic Nodes example",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("graph", nargs="?",
+                        help="edge list or GraphML file of the graph to show")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
 
     widget = GraphWidget()
+    if options.graph:
+        names, edges = read_graph(options.graph)
+        widget.set_graph(edges, len(names))
+        widget.item_moved()
+        widget.setWindowTitle(f"{widget.windowTitle()} - {options.graph}")
+        widget.resize(800, 800)
     widget.show()
 
     sys.exit(app.exec())
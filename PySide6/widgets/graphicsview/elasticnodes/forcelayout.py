@@ -0,0 +1,184 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Force-directed layout of the Elastic Nodes example computed on NumPy
+arrays.
+
+Each node is pushed away from every other node by a force of 75 / distance
+and pulled towards its neighbors by their offset divided by a weight
+growing with its number of edges, as Node.calculate_forces() used to do.
+
+The repulsion is either summed over all the pairs of nodes, or computed on
+a uniform grid: exactly between the nodes of neighboring cells, and from
+the node counts of the farther cells, convolved with the force kernel by
+FFT, for the other ones."""
+
+import numpy as np
+
+REPULSION = 75.0
+MIN_VELOCITY = 0.1
+MARGIN = 10.0
+# Above this number of nodes, the grid approximation is used by default
+EXACT_LIMIT = 2000
+# Pairs of nodes computed at once by the exact method
+BLOCK_PAIRS = 1 << 22
+NODES_PER_CELL = 4
+MAX_GRID = 256
+
+
+def exact_repulsion(positions):
+    """Return the repulsion of every pair of nodes, O(n²)."""
+    n = len(positions)
+    forces = np.zeros_like(positions)
+    block = max(1, BLOCK_PAIRS // max(n, 1))
+    for start in range(0, n, block):
+        d = positions[start:start + block, None, :] - positions[None, :, :]
+        r2 = np.einsum("ijk,ijk->ij", d, d)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(r2 > 0, REPULSION / r2, 0.0)
+        forces[start:start + block] = np.einsum("ijk,ij->ik", d, scale)
+    return forces
+
+
+def grid_repulsion(positions, size=0):
+    """Return the repulsion approximated on a grid of size x size cells
+    covering the nodes, chosen from the number of nodes by default."""
+    n = len(positions)
+    if n < 2:
+        return np.zeros_like(positions)
+    if not size:
+        size = int(min(MAX_GRID, max(1, np.sqrt(n / NODES_PER_CELL))))
+    low = positions.min(axis=0)
+    extent = np.maximum(positions.max(axis=0) - low, 1e-9)
+    cell_size = extent / size
+    cells = np.minimum((positions - low) / cell_size, size - 1).astype(np.intp)
+    cx = cells[:, 0]
+    cy = cells[:, 1]
+    cell_ids = cy * size + cx
+    counts = np.bincount(cell_ids, minlength=size * size)
+
+    forces = far_field(counts.reshape(size, size).astype(np.float64), cell_size)[cy, cx]
+
+    # Exact forces between the nodes of neighboring cells
+    order = np.argsort(cell_ids, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    fx = np.zeros(n)
+    fy = np.zeros(n)
+    nodes = np.arange(n)
+    for oy in (-1, 0, 1):
+        for ox in (-1, 0, 1):
+            nx = cx + ox
+            ny = cy + oy
+            valid = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+            sources = nodes[valid]
+            neighbor_cells = ny[valid] * size + nx[valid]
+            pair_counts = counts[neighbor_cells]
+            total = int(pair_counts.sum())
+            if not total:
+                continue
+            first = np.repeat(sources, pair_counts)
+            # Rank of each pair within the nodes of its neighboring cell
+            offsets = np.cumsum(pair_counts) - pair_counts
+            rank = np.arange(total) - np.repeat(offsets, pair_counts)
+            second = order[np.repeat(starts[neighbor_cells], pair_counts) + rank]
+            d = positions[first] - positions[second]
+            r2 = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(r2 > 0, REPULSION / r2, 0.0)
+            fx += np.bincount(first, weights=d[:, 0] * scale, minlength=n)
+            fy += np.bincount(first, weights=d[:, 1] * scale, minlength=n)
+    forces[:, 0] += fx
+    forces[:, 1] += fy
+    return forces
+
+
+def far_field(counts, cell_size):
+    """Return the repulsion at the center of each cell of the nodes of the
+    cells which are not its neighbors, assumed at the centers of the
+    cells."""
+    rows, cols = counts.shape
+    oy, ox = np.meshgrid(np.arange(-rows + 1, rows), np.arange(-cols + 1, cols),
+                         indexing="ij")
+    dx = ox * cell_size[0]
+    dy = oy * cell_size[1]
+    r2 = dx * dx + dy * dy
+    near = (np.abs(ox) <= 1) & (np.abs(oy) <= 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(near, 0.0, REPULSION / r2)
+    shape = (2 * rows - 1 + rows - 1, 2 * cols - 1 + cols - 1)
+    density = np.fft.rfft2(counts, shape)
+    forces = np.empty((rows, cols, 2))
+    for axis, offset in enumerate((dx, dy)):
+        kernel = np.fft.rfft2(offset * scale, shape)
+        field = np.fft.irfft2(density * kernel, shape)
+        forces[:, :, axis] = field[rows - 1:2 * rows - 1, cols - 1:2 * cols - 1]
+    return forces
+
+
+class ForceLayout:
+    """Positions of n nodes, an (n, 2) array, moved by step() according to
+    the forces between them and along the edges, an (m, 2) array of node
+    indexes.
+
+    method is "exact", "grid", or "auto" for the exact sums up to
+    EXACT_LIMIT nodes."""
+
+    def __init__(self, positions, edges, method="auto"):
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        self.method = method
+        self.set_edges(edges)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def set_edges(self, edges):
+        n = len(self.positions)
+        self.edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+        degrees = np.bincount(self.edges.ravel(), minlength=n)
+        self._weights = (degrees + 1) * 10.0
+
+    def add_node(self, x, y):
+        """Add a node without edges, return its index."""
+        self.positions = np.vstack((self.positions, (x, y)))
+        self._weights = np.append(self._weights, 10.0)
+        return len(self.positions) - 1
+
+    def repulsion(self):
+        method = self.method
+        if method == "auto":
+            method = "exact" if len(self.positions) <= EXACT_LIMIT else "grid"
+        if method == "exact":
+            return exact_repulsion(self.positions)
+        return grid_repulsion(self.positions)
+
+    def attraction(self):
+        positions = self.positions
+        n = len(positions)
+        source = self.edges[:, 0]
+        dest = self.edges[:, 1]
+        d = positions[dest] - positions[source]
+        forces = np.empty_like(positions)
+        for axis in range(2):
+            forces[:, axis] = (np.bincount(source, weights=d[:, axis], minlength=n)
+                               - np.bincount(dest, weights=d[:, axis], minlength=n))
+        return forces / self._weights[:, None]
+
+    def step(self, rect, pinned=None):
+        """Move the nodes by one tick within rect, (left, top, right,
+        bottom), except the pinned ones, a sequence of indexes. Return the
+        indexes of the nodes which moved."""
+        velocity = self.repulsion() + self.attraction()
+        slow = np.all(np.abs(velocity) < MIN_VELOCITY, axis=1)
+        velocity[slow] = 0.0
+        if pinned is not None:
+            velocity[pinned] = 0.0
+        left, top, right, bottom = rect
+        new_positions = self.positions + velocity
+        np.clip(new_positions[:, 0], left + MARGIN, right - MARGIN, out=new_positions[:, 0])
+        np.clip(new_positions[:, 1], top + MARGIN, bottom - MARGIN, out=new_positions[:, 1])
+        if pinned is not None:
+            new_positions[pinned] = self.positions[pinned]
+        moved = np.flatnonzero(np.any(new_positions != self.positions, axis=1))
+        self.positions = new_positions
+        return moved
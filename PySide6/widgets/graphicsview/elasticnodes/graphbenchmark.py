@@ -0,0 +1,95 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Loading and frame time benchmark of the Elastic Nodes example.
+
+Reads a graph, by default a generated edge list of 50000 edges, builds the
+scene and prints the time of each step, then runs layout ticks, each one
+followed by a repaint of the view, with the whole graph in view and zoomed
+in, and prints the mean time of the tick and of the paint."""
+
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+import numpy as np
+
+from PySide6.QtWidgets import QApplication, QGraphicsView
+
+from elasticnodes import GraphWidget
+from graphloader import read_graph, write_edge_list
+
+
+def random_edges(edges, nodes, seed=0):
+    """Return a random tree over the nodes completed by random edges."""
+    rng = np.random.default_rng(seed)
+    tree = np.column_stack((np.arange(1, nodes), rng.integers(0, np.arange(1, nodes))))
+    extra = rng.integers(0, nodes, (edges - len(tree), 2))
+    extra[:, 1] = np.where(extra[:, 0] == extra[:, 1], (extra[:, 1] + 1) % nodes, extra[:, 1])
+    return np.vstack((tree, extra))
+
+
+def frames(app, widget, count):
+    """Run count ticks and repaints, return their mean times in seconds."""
+    tick_time = paint_time = 0.0
+    for _ in range(count):
+        start = time.perf_counter()
+        widget.tick()
+        middle = time.perf_counter()
+        app.processEvents()
+        widget.viewport().repaint()
+        end = time.perf_counter()
+        tick_time += middle - start
+        paint_time += end - middle
+    return tick_time / count, paint_time / count
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Elastic Nodes loading and frame time benchmark",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("graph", nargs="?",
+                        help="edge list or GraphML file, generated by default")
+    parser.add_argument("--edges", type=int, default=50000,
+                        help="edges of the generated graph (default 50000)")
+    parser.add_argument("--nodes", type=int, default=25000,
+                        help="nodes of the generated graph (default 25000)")
+    parser.add_argument("--frames", "-f", type=int, default=10,
+                        help="frames of each measure (default 10)")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+    with tempfile.TemporaryDirectory() as directory:
+        path = options.graph
+        if not path:
+            path = os.path.join(directory, "graph.txt")
+            write_edge_list(path, random_edges(options.edges, options.nodes))
+        start = time.perf_counter()
+        names, edges = read_graph(path)
+        read_time = time.perf_counter() - start
+
+    widget = GraphWidget()
+    # Only the explicit repaints are measured
+    widget.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.NoViewportUpdate)
+    widget.resize(800, 800)
+    widget.show()
+    app.processEvents()
+    start = time.perf_counter()
+    widget.set_graph(edges, len(names))
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    widget.viewport().repaint()
+    first_paint = time.perf_counter() - start
+
+    print(f"{len(names)} nodes, {len(edges)} edges")
+    print(f"read {read_time:.2f} s, scene built in {build_time:.2f} s, "
+          f"first paint {first_paint:.2f} s")
+    widget.centerOn(0, 0)
+    for name, zoom in (("whole graph", False), ("zoomed in", True)):
+        if zoom:
+            widget.resetTransform()
+        tick, paint = frames(app, widget, options.frames)
+        print(f"{name:>12}: tick {1000 * tick:7.1f} ms, paint {1000 * paint:7.1f} ms, "
+              f"{1 / (tick + paint):5.1f} frames/s", flush=True)
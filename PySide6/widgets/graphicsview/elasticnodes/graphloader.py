@@ -0,0 +1,83 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Reading of the graphs shown by the Elastic Nodes example.
+
+A graph is read from an edge list, a text file with the two nodes of an
+edge on each line separated by spaces, tabs or a comma, "#" and "%"
+starting comments, or from a GraphML file. The nodes are numbered in the
+order in which they are first met."""
+
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+GRAPHML_SUFFIXES = (".graphml", ".xml")
+
+
+class GraphReader:
+    """Collects the nodes and edges of a graph, keeping the names of the
+    nodes and the edges as pairs of node indexes."""
+
+    def __init__(self):
+        self.names = []
+        self._indexes = {}
+        self._edges = []
+
+    def node(self, name):
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def edge(self, source, dest):
+        # Loops have no direction to be drawn in
+        if source != dest:
+            self._edges.append(self.node(source))
+            self._edges.append(self.node(dest))
+
+    def edges(self):
+        return np.array(self._edges, dtype=np.intp).reshape(-1, 2)
+
+
+def read_edge_list(path):
+    """Return the node names and the edges, an (m, 2) array of indexes, of
+    an edge list file."""
+    reader = GraphReader()
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            fields = line.replace(",", " ").split()
+            if len(fields) < 2 or fields[0][0] in "#%":
+                continue
+            reader.edge(fields[0], fields[1])
+    return reader.names, reader.edges()
+
+
+def read_graphml(path):
+    """Return the node names and the edges of a GraphML file, read
+    incrementally."""
+    reader = GraphReader()
+    for _, element in ET.iterparse(path, events=("end",)):
+        tag = element.tag.rpartition("}")[2]
+        if tag == "node":
+            reader.node(element.get("id"))
+        elif tag == "edge":
+            reader.edge(element.get("source"), element.get("target"))
+        else:
+            continue
+        element.clear()
+    return reader.names, reader.edges()
+
+
+def read_graph(path):
+    if os.path.splitext(path)[1].lower() in GRAPHML_SUFFIXES:
+        return read_graphml(path)
+    return read_edge_list(path)
+
+
+def write_edge_list(path, edges):
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(f"{source} {dest}\n" for source, dest in edges.tolist())
@@ -0,0 +1,78 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Benchmark of the force-directed layout of the Elastic Nodes example,
+without window.
+
+Lays out random graphs of each size with the exact sums of the repulsion
+and with the grid approximation, and prints the ticks per second and the
+error of the grid forces relative to the exact ones."""
+
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+import numpy as np
+
+from forcelayout import ForceLayout, exact_repulsion, grid_repulsion
+
+METHODS = ("exact", "grid")
+# Average distance between the nodes of the generated graphs
+SPACING = 30.0
+
+
+def random_graph(nodes, edges_per_node=2, seed=0):
+    """Return the positions of the nodes, scattered in a square, and the
+    edges of a random tree with extra random edges."""
+    rng = np.random.default_rng(seed)
+    half = SPACING * np.sqrt(nodes) / 2
+    positions = rng.uniform(-half, half, (nodes, 2))
+    tree = np.column_stack((np.arange(1, nodes), rng.integers(0, np.arange(1, nodes))))
+    extra = rng.integers(0, nodes, (max(0, (edges_per_node - 1) * nodes), 2))
+    extra = extra[extra[:, 0] != extra[:, 1]]
+    return positions, np.vstack((tree, extra)), (-2 * half, -2 * half, 2 * half, 2 * half)
+
+
+def ticks_per_second(layout, rect, duration):
+    ticks = 0
+    start = time.perf_counter()
+    while True:
+        layout.step(rect)
+        ticks += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return ticks / elapsed
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",")]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Force-directed layout benchmark",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--nodes", type=parse_sizes, default=parse_sizes("1000,10000,50000"),
+                        help="numbers of nodes, comma separated (default 1000,10000,50000)")
+    parser.add_argument("--duration", "-d", type=float, default=3,
+                        help="duration of each measure in seconds (default 3)")
+    parser.add_argument("--method", choices=METHODS, action="append",
+                        help="method, can be repeated, all of them by default")
+    parser.add_argument("--exact-limit", type=int, default=10000,
+                        help="largest graph laid out with the exact method (default 10000)")
+    options = parser.parse_args()
+
+    print(f"{'nodes':>7} {'edges':>7} {'method':>6} {'ticks/s':>9} {'error':>7}")
+    for nodes in options.nodes:
+        positions, edges, rect = random_graph(nodes)
+        error = ""
+        if nodes <= options.exact_limit:
+            exact = exact_repulsion(positions)
+            grid = grid_repulsion(positions)
+            error = f"{np.sqrt(((exact - grid) ** 2).sum() / (exact ** 2).sum()):7.2%}"
+        for method in options.method or METHODS:
+            if method == "exact" and nodes > options.exact_limit:
+                continue
+            layout = ForceLayout(positions, edges, method)
+            rate = ticks_per_second(layout, rect, options.duration)
+            print(f"{nodes:>7} {len(edges):>7} {method:>6} {rate:9.2f} "
+                  f"{error if method == 'grid' else '':>7}", flush=True)
@@ -0,0 +1,110 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Enumeration of a directory in a worker thread, the entries being sent
+by batches as they are read"""
+
+import os
+import stat
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+from PySide6.QtCore import QThread, Signal
+
+
+SCAN_BATCH_SIZE = 2000
+# Sends what was read at least this often, so that a slow file system
+# shows the first entries without waiting for a full batch
+SCAN_INTERVAL = 0.1
+
+
+class Entry(NamedTuple):
+    name: str
+    path: str
+    is_dir: bool
+
+
+def parent_entry(path):
+    """Return the entry of "..", listed first like QDir does, or None for
+    the root directory."""
+    parent = os.path.dirname(os.path.abspath(path))
+    if parent == os.path.abspath(path):
+        return None
+    return Entry("..", parent, True)
+
+
+def is_hidden(entry):
+    """Return whether an os.DirEntry is hidden, which QDir lists only with
+    the QDir.Filter.Hidden filter: its name starts with a dot, or it has the
+    hidden attribute on Windows."""
+    if sys.platform != "win32":
+        return entry.name.startswith(".")
+    try:
+        return bool(entry.stat(follow_symlinks=False).st_file_attributes
+                    & stat.FILE_ATTRIBUTE_HIDDEN)
+    except OSError:
+        return False
+
+
+class DirectoryScanner(QThread):
+    """Reads a directory with os.scandir() and emits its entries by batches
+    of at most batch_size, in the order of the directory. The hidden entries
+    are skipped.
+
+    The generation is passed along with the entries so that the receiver can
+    ignore the batches queued before a new directory was requested."""
+
+    entries_ready = Signal(int, object)
+    scan_finished = Signal(int, int, str)
+
+    def __init__(self, path, generation, batch_size=SCAN_BATCH_SIZE, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.generation = generation
+        self._batch_size = batch_size
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the enumeration at the next entry, no batch is sent after."""
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        count = 0
+        error = ""
+        batch = []
+        parent = parent_entry(self.path)
+        if parent is not None:
+            batch.append(parent)
+        last_sent = time.monotonic()
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if self._cancelled.is_set():
+                        return
+                    if is_hidden(entry):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    batch.append(Entry(entry.name, entry.path, is_dir))
+                    if (len(batch) >= self._batch_size
+                            or time.monotonic() - last_sent >= SCAN_INTERVAL):
+                        count += len(batch)
+                        self.entries_ready.emit(self.generation, batch)
+                        batch = []
+                        last_sent = time.monotonic()
+        except OSError as e:
+            error = e.strerror or str(e)
+        if self._cancelled.is_set():
+            return
+        if batch:
+            count += len(batch)
+            self.entries_ready.emit(self.generation, batch)
+        self.scan_finished.emit(self.generation, count, error)
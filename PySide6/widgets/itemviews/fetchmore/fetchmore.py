@@ -7,24 +7,32 @@ from __future__ import annotations
 """PySide6 port of the itemviews/fetchmore/fetchmore example from Qt v6.x
 
 Navigate to a directory with many entries by doubleclicking and scroll
-down the list to see the model being populated on demand.
+down the list to see the model being populated on demand. The directory
+is read in a worker thread, its entries being listed as they arrive.
 """
 
+import os
 import sys
 
-from PySide6.QtCore import (QAbstractListModel, QDir,
+from PySide6.QtCore import (QAbstractListModel, QDir, QFileInfo,
                             QModelIndex, Qt, Signal, Slot)
 from PySide6.QtWidgets import (QApplication, QFileIconProvider, QListView,
                                QPlainTextEdit, QSizePolicy, QVBoxLayout,
                                QWidget)
 
+from directoryscanner import DirectoryScanner
+
 
 BATCH_SIZE = 100
 
 
 class FileListModel(QAbstractListModel):
+    """Lists a directory enumerated by a DirectoryScanner in a worker
+    thread. The entries are appended as they are read, and revealed to the
+    view by batches of BATCH_SIZE in fetchMore()."""
 
     number_populated = Signal(str, int, int, int)
+    directory_loaded = Signal(str, int, str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -33,6 +41,12 @@ class FileListModel(QAbstractListModel):
         self._file_count = 0
         self._file_list = []
         self._icon_provider = QFileIconProvider()
+        # Suffix (None for folders) -> icon, instead of looking up each file
+        self._icons = {}
+        self._generation = 0
+        self._scanner = None
+        # The canceled scanners, kept until their thread has finished
+        self._stopping = set()
 
     def rowCount(self, parent=QModelIndex()):
         return self._file_count
@@ -46,7 +60,7 @@ class FileListModel(QAbstractListModel):
             return None
 
         if role == Qt.ItemDataRole.DisplayRole:
-            return self._file_list[row].fileName()
+            return self._file_list[row].name
 
         if role == Qt.ItemDataRole.BackgroundRole:
             batch = row // BATCH_SIZE
@@ -54,10 +68,23 @@ class FileListModel(QAbstractListModel):
             return palette.base() if batch % 2 == 0 else palette.alternateBase()
 
         if role == Qt.ItemDataRole.DecorationRole:
-            return self._icon_provider.icon(self._file_list[row])
+            return self.icon(self._file_list[row])
 
         return None
 
+    def icon(self, entry):
+        key = None if entry.is_dir else os.path.splitext(entry.name)[1].lower()
+        icon = self._icons.get(key)
+        if icon is None:
+            if key is None:
+                icon = self._icon_provider.icon(QFileIconProvider.IconType.Folder)
+            elif not key:
+                icon = self._icon_provider.icon(QFileIconProvider.IconType.File)
+            else:
+                icon = self._icon_provider.icon(QFileInfo(entry.path))
+            self._icons[key] = icon
+        return icon
+
     def canFetchMore(self, index):
         return self._file_count < len(self._file_list)
 
@@ -66,8 +93,10 @@ class FileListModel(QAbstractListModel):
         total = len(self._file_list)
         remainder = total - start
         items_to_fetch = min(BATCH_SIZE, remainder)
+        if items_to_fetch <= 0:
+            return
 
-        self.beginInsertRows(QModelIndex(), start, start + items_to_fetch)
+        self.beginInsertRows(QModelIndex(), start, start + items_to_fetch - 1)
 
         self._file_count += items_to_fetch
 
@@ -77,17 +106,65 @@ class FileListModel(QAbstractListModel):
 
     @Slot(str)
     def set_dir_path(self, path):
+        self.stop()
         self._path = path
-        directory = QDir(path)
+        self._generation += 1
 
         self.beginResetModel()
-        directory_filter = QDir.Filter.AllEntries | QDir.Filter.NoDot
-        self._file_list = directory.entryInfoList(directory_filter, QDir.SortFlag.Name)
+        self._file_list = []
         self._file_count = 0
         self.endResetModel()
 
+        scanner = DirectoryScanner(path, self._generation, parent=self)
+        scanner.entries_ready.connect(self._add_entries)
+        scanner.scan_finished.connect(self._scan_finished)
+        self._scanner = scanner
+        scanner.start()
+
+    def stop(self, wait=False):
+        """Cancel the enumeration in progress, waiting for its thread to
+        finish if wait is set."""
+        scanner = self._scanner
+        self._scanner = None
+        if scanner is not None:
+            scanner.cancel()
+            self._stopping.add(scanner)
+            scanner.finished.connect(lambda: self._release(scanner))
+            if scanner.isFinished():
+                self._release(scanner)
+        if wait:
+            for scanner in list(self._stopping):
+                scanner.wait()
+                self._release(scanner)
+
+    def _release(self, scanner):
+        if scanner in self._stopping:
+            self._stopping.discard(scanner)
+            scanner.deleteLater()
+
+    @Slot(int, object)
+    def _add_entries(self, generation, entries):
+        if generation != self._generation:
+            return
+        waiting = not self.canFetchMore(QModelIndex())
+        self._file_list.extend(entries)
+        # The view asked for more than was read, show the new entries
+        if waiting:
+            self.fetchMore(QModelIndex())
+
+    @Slot(int, int, str)
+    def _scan_finished(self, generation, count, error):
+        if generation != self._generation:
+            return
+        scanner = self._scanner
+        self._scanner = None
+        if scanner is not None:
+            scanner.wait()
+            scanner.deleteLater()
+        self.directory_loaded.emit(self._path, count, error)
+
     def fileinfo_at(self, index):
-        return self._file_list[index.row()]
+        return QFileInfo(self._file_list[index.row()].path)
 
 
 class Window(QWidget):
@@ -105,6 +182,7 @@ class Window(QWidget):
                                        QSizePolicy.Policy.Preferred))
 
         self._model.number_populated.connect(self.update_log)
+        self._model.directory_loaded.connect(self.directory_loaded)
         self._view.activated.connect(self.activated)
 
         layout = QVBoxLayout(self)
@@ -120,6 +198,13 @@ class Window(QWidget):
         entry = f'{start}..{last}/{total} items from "{native_path}" added.'
         self._log_viewer.appendPlainText(entry)
 
+    @Slot(str, int, str)
+    def directory_loaded(self, path, total, error):
+        native_path = QDir.toNativeSeparators(path)
+        if error:
+            self._log_viewer.appendPlainText(f'"{native_path}": {error}')
+        self._log_viewer.appendPlainText(f'{total} items read from "{native_path}".')
+
     @Slot(QModelIndex)
     def activated(self, index):
         fileinfo = self._model.fileinfo_at(index)
@@ -127,6 +212,10 @@ class Window(QWidget):
             self._log_viewer.clear()
             self._model.set_dir_path(fileinfo.absoluteFilePath())
 
+    def closeEvent(self, event):
+        self._model.stop(wait=True)
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
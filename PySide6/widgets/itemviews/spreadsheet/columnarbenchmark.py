@@ -0,0 +1,124 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Memory and loading benchmark of the spreadsheet backends.
+
+Writes a CSV file of numbers and texts, then loads it in a process for
+each backend, the table widget of SpreadSheetItems and the model storing
+the cells by columns, and prints the memory used per cell and the time
+from the start of the loading to the first paint of the view."""
+
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from PySide6.QtWidgets import QApplication, QTableView
+
+from columnarmodel import ColumnarSheetModel
+from spreadsheet import SpreadSheetTable
+from spreadsheetitem import SpreadSheetItem
+
+BACKENDS = ("widget", "columnar")
+WORDS = ("NOK", "EUR", "USD", "Lunch", "Taxi", "Hotel", "Dinner", "Flight")
+
+
+def peak_memory():
+    """Return the peak resident memory of the process in bytes."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def write_csv(path, rows, cols, seed=0):
+    """Write rows of cols cells: numbers in the even columns, words in the
+    odd ones and an empty cell in about 5% of the cells."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for _ in range(rows):
+            writer.writerow(["" if rng.random() < 0.05
+                             else str(rng.randrange(-1000, 10000)) if col % 2 == 0
+                             else rng.choice(WORDS)
+                             for col in range(cols)])
+
+
+def load_widget(path):
+    # The table widget is sized before its items are set
+    rows = cols = 0
+    with open(path, newline="", encoding="utf-8") as file:
+        for record in csv.reader(file):
+            rows += 1
+            cols = max(cols, len(record))
+    table = SpreadSheetTable(rows, cols)
+    with open(path, newline="", encoding="utf-8") as file:
+        for row, record in enumerate(csv.reader(file)):
+            for col, text in enumerate(record):
+                if text:
+                    table.setItem(row, col, SpreadSheetItem(text))
+    return table
+
+
+def load_columnar(path):
+    model = ColumnarSheetModel()
+    model.load_csv(path)
+    view = QTableView()
+    view.setModel(model)
+    # The model is owned by the view
+    model.setParent(view)
+    return view
+
+
+def run_backend(backend, path):
+    """Load the file with a backend, print the cells, bytes per cell and
+    the seconds to the first paint."""
+    app = QApplication([sys.argv[0]])  # noqa: F841
+    base = peak_memory()
+    start = time.perf_counter()
+    view = load_widget(path) if backend == "widget" else load_columnar(path)
+    view.resize(800, 600)
+    view.show()
+    view.viewport().repaint()
+    elapsed = time.perf_counter() - start
+    model = view.model()
+    cells = model.rowCount() * model.columnCount()
+    print(cells, (peak_memory() - base) / cells, elapsed)
+
+
+def benchmark(backend, path):
+    command = [sys.executable, os.path.abspath(__file__), "--run", backend, path]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    cells, per_cell, elapsed = output.split()[-3:]
+    print(f"{backend:>9}: {int(cells):9d} cells, {float(per_cell):8.1f} bytes/cell, "
+          f"first paint after {float(elapsed):6.2f} s", flush=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Memory and loading benchmark of the spreadsheet",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="rows of the generated file (default 100000)")
+    parser.add_argument("--cols", type=int, default=10,
+                        help="columns of the generated file (default 10)")
+    parser.add_argument("--backend", choices=BACKENDS, action="append",
+                        help="backend, can be repeated, all of them by default")
+    parser.add_argument("--run", nargs=2, metavar=("BACKEND", "FILE"),
+                        help="load a file with a backend in this process")
+    options = parser.parse_args()
+
+    if options.run:
+        run_backend(*options.run)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sheet.csv")
+        write_csv(path, options.rows, options.cols)
+        size = os.path.getsize(path)
+        print(f"{options.rows} x {options.cols} cells, {size / 1024 / 1024:.1f} MB of CSV")
+        for backend in options.backend or BACKENDS:
+            benchmark(backend, path)
@@ -0,0 +1,300 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Table model storing large sheets by columns.
+
+The numbers of a column are kept in a NumPy array and its texts as indexes
+in a pool where each distinct string is stored once, the arrays covering
+the column up to its last used row only. The cells hold values, not
+formulas, and the sums of ranges are computed by NumPy."""
+
+import csv
+import itertools
+import math
+import sys
+from typing import Any
+
+import numpy as np
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QColor
+
+from formulaengine import parse_value
+
+CHUNK_ROWS = 10000
+
+
+def column_name(col: int) -> str:
+    """Return the name of a column: A to Z, then AA, AB..."""
+    name = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        name = chr(ord('A') + remainder) + name
+    return name
+
+
+def finite_number(value: Any) -> float | None:
+    """Return value as a float if it is a finite number, else None: the
+    cells keep "nan", "inf" and too large integers as texts."""
+    if not isinstance(value, (int, float)):
+        return None
+    try:
+        number = float(value)
+    except OverflowError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def format_number(value: float) -> int | float:
+    return int(value) if value.is_integer() and abs(value) < 2 ** 53 else value
+
+
+class StringPool:
+    """Stores each distinct string once, the cells refer to it by index."""
+
+    def __init__(self) -> None:
+        self._strings = []
+        self._ids = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, index: int) -> str:
+        return self._strings[index]
+
+    def intern(self, text: str) -> int:
+        index = self._ids.get(text)
+        if index is None:
+            index = self._ids[text] = len(self._strings)
+            self._strings.append(sys.intern(text))
+        return index
+
+    def memory_usage(self) -> int:
+        return (sys.getsizeof(self._strings) + sys.getsizeof(self._ids)
+                + sum(sys.getsizeof(s) for s in self._strings))
+
+
+class Column:
+    """The cells of a column: numbers in a float64 array, NaN where there
+    is none, and texts as indexes in the pool in an int32 array, -1 where
+    there is none. The text array is only allocated for the first text."""
+
+    def __init__(self) -> None:
+        self.numbers = np.empty(0)
+        self.texts = None
+        self.size = 0
+
+    def reserve(self, size: int) -> None:
+        """Make room for size rows, growing the arrays geometrically."""
+        if size > self.size:
+            self.size = size
+        capacity = len(self.numbers)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+        numbers = np.full(capacity, np.nan)
+        numbers[:len(self.numbers)] = self.numbers
+        self.numbers = numbers
+        if self.texts is not None:
+            texts = np.full(capacity, -1, dtype=np.int32)
+            texts[:len(self.texts)] = self.texts
+            self.texts = texts
+
+    def _text_array(self) -> np.ndarray:
+        if self.texts is None:
+            self.texts = np.full(len(self.numbers), -1, dtype=np.int32)
+        return self.texts
+
+    def get(self, row: int, pool: StringPool) -> Any:
+        if row >= self.size:
+            return None
+        number = self.numbers[row]
+        if not math.isnan(number):
+            return format_number(float(number))
+        if self.texts is not None and self.texts[row] >= 0:
+            return pool[self.texts[row]]
+        return None
+
+    def set(self, row: int, value: Any, pool: StringPool) -> None:
+        if value is None or value == "":
+            if row < self.size:
+                self.numbers[row] = np.nan
+                if self.texts is not None:
+                    self.texts[row] = -1
+            return
+        self.reserve(row + 1)
+        number = finite_number(value)
+        if number is not None:
+            self.numbers[row] = number
+            if self.texts is not None:
+                self.texts[row] = -1
+        else:
+            self.numbers[row] = np.nan
+            self._text_array()[row] = pool.intern(str(value))
+
+    def load(self, start: int, values: list[str], pool: StringPool) -> None:
+        """Store the texts read for the rows from start."""
+        end = start + len(values)
+        self.reserve(end)
+        try:
+            # Most chunks of numeric columns are converted at once
+            numbers = np.array(values, dtype=np.float64)
+        except ValueError:
+            pass
+        else:
+            self.numbers[start:end] = numbers
+            # "nan", "inf" and the numbers out of range stay texts
+            for i in np.flatnonzero(~np.isfinite(numbers)).tolist():
+                self.numbers[start + i] = np.nan
+                self._text_array()[start + i] = pool.intern(values[i])
+            return
+        numbers = self.numbers
+        for row, text in enumerate(values, start):
+            if not text:
+                continue
+            try:
+                number = float(text)
+            except ValueError:
+                number = math.nan
+            if math.isfinite(number):
+                numbers[row] = number
+            else:
+                self._text_array()[row] = pool.intern(text)
+
+    def sum(self, top: int, bottom: int) -> float:
+        return float(np.nansum(self.numbers[top:min(bottom + 1, self.size)]))
+
+    def memory_usage(self) -> int:
+        texts = self.texts.nbytes if self.texts is not None else 0
+        return self.numbers.nbytes + texts
+
+
+class ColumnarSheetModel(QAbstractTableModel):
+    """Sheet of at least rows x cols cells, growing with the loaded data."""
+
+    def __init__(self, rows: int = 0, cols: int = 0, parent=None) -> None:
+        super().__init__(parent)
+        self._rows = rows
+        self._cols = cols
+        self._columns = {}
+        self._pool = StringPool()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._cols
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return column_name(section)
+        return section + 1
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemFlag.ItemIsEditable
+
+    def value(self, row: int, col: int) -> Any:
+        column = self._columns.get(col)
+        return column.get(row, self._pool) if column is not None else None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.value(index.row(), index.column())
+        if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.EditRole:
+            return value
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if isinstance(value, (int, float)):
+                return QColor(Qt.GlobalColor.red if value < 0 else Qt.GlobalColor.blue)
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if isinstance(value, (int, float)):
+                return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        if isinstance(value, str):
+            value = parse_value(value)
+        column = self._columns.get(index.column())
+        if column is None:
+            column = self._columns[index.column()] = Column()
+        column.set(index.row(), value, self._pool)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+        return True
+
+    def sum_range(self, top: int, left: int, bottom: int, right: int) -> float:
+        """Sum the numbers of a range, the texts counting as 0."""
+        total = 0.0
+        for col in range(left, right + 1):
+            column = self._columns.get(col)
+            if column is not None:
+                total += column.sum(top, bottom)
+        return total
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._columns = {}
+        self._pool = StringPool()
+        self.endResetModel()
+
+    def load_csv(self, path: str, chunk_rows: int = CHUNK_ROWS) -> None:
+        """Replace the cells by the ones of a CSV file, read by chunks."""
+        self.beginResetModel()
+        self._columns = {}
+        self._pool = StringPool()
+        rows = cols = 0
+        try:
+            with open(path, newline="", encoding="utf-8") as file:
+                reader = csv.reader(file)
+                while chunk := list(itertools.islice(reader, chunk_rows)):
+                    width = max(len(record) for record in chunk)
+                    for col in range(width):
+                        values = [record[col] if col < len(record) else "" for record in chunk]
+                        column = self._columns.get(col)
+                        if column is None:
+                            column = self._columns[col] = Column()
+                        column.load(rows, values, self._pool)
+                    rows += len(chunk)
+                    cols = max(cols, width)
+        finally:
+            self._rows = max(self._rows, rows)
+            self._cols = max(self._cols, cols)
+            self.endResetModel()
+
+    def save_csv(self, path: str, chunk_rows: int = CHUNK_ROWS) -> None:
+        """Write the cells up to the last used row and column to a CSV file,
+        by chunks."""
+        used = [col for col, column in self._columns.items() if column.size]
+        cols = max(used) + 1 if used else 0
+        rows = max((self._columns[col].size for col in used), default=0)
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            for start in range(0, rows, chunk_rows):
+                end = min(start + chunk_rows, rows)
+                records = [[""] * cols for _ in range(end - start)]
+                for col in used:
+                    self._write_column(records, col, start, end)
+                writer.writerows(records)
+
+    def _write_column(self, records, col, start, end):
+        column = self._columns[col]
+        end = min(end, column.size)
+        numbers = column.numbers[start:end]
+        texts = column.texts[start:end] if column.texts is not None else None
+        pool = self._pool
+        for i in np.flatnonzero(~np.isnan(numbers)).tolist():
+            records[i][col] = str(format_number(float(numbers[i])))
+        if texts is not None:
+            for i in np.flatnonzero(texts >= 0).tolist():
+                records[i][col] = pool[int(texts[i])]
+
+    def memory_usage(self) -> int:
+        """Return the bytes used by the arrays and the string pool."""
+        return (sum(column.memory_usage() for column in self._columns.values())
+                + self._pool.memory_usage())
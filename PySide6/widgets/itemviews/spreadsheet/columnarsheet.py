@@ -0,0 +1,123 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+from PySide6.QtCore import QCoreApplication, QModelIndex, Qt, Slot
+from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtWidgets import (QFileDialog, QLabel, QLineEdit, QMainWindow,
+                               QMessageBox, QTableView, QToolBar, QWidget)
+
+from columnarmodel import ColumnarSheetModel, column_name
+
+
+class ColumnarSheet(QMainWindow):
+    """Spreadsheet window for large sheets, backed by a ColumnarSheetModel
+    instead of table widget items."""
+
+    def __init__(self, rows: int, cols: int, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+
+        self._model = ColumnarSheetModel(rows, cols, self)
+        self._table = QTableView(self)
+        self._table.setModel(self._model)
+
+        self._tool_bar = QToolBar(self)
+        self._cell_label = QLabel(self._tool_bar)
+        self._cell_label.setMinimumSize(80, 0)
+        self._formula_input = QLineEdit(self)
+        self._tool_bar.addWidget(self._cell_label)
+        self._tool_bar.addWidget(self._formula_input)
+        self.addToolBar(self._tool_bar)
+
+        file_menu = self.menuBar().addMenu("&File")
+        open_action = file_menu.addAction("&Open CSV...", self.open_csv)
+        open_action.setShortcut(QKeySequence.StandardKey.Open)
+        save_action = file_menu.addAction("&Save CSV As...", self.save_csv)
+        save_action.setShortcut(QKeySequence.StandardKey.SaveAs)
+        file_menu.addSeparator()
+        file_menu.addAction("E&xit", QCoreApplication.quit)
+
+        self._cell_sum_action = QAction("Sum", self)
+        self._cell_sum_action.triggered.connect(self.action_sum)
+        self._clear_action = QAction("Clear", self)
+        self._clear_action.setShortcut(Qt.Key.Key_Delete)
+        self._clear_action.triggered.connect(self.clear)
+        cell_menu = self.menuBar().addMenu("&Cell")
+        cell_menu.addAction(self._cell_sum_action)
+        cell_menu.addAction(self._clear_action)
+        self.addAction(self._cell_sum_action)
+        self.addAction(self._clear_action)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
+
+        self.setCentralWidget(self._table)
+        self.statusBar()
+        self._table.selectionModel().currentChanged.connect(self.update_line_edit)
+        self._model.dataChanged.connect(self.update_current)
+        self._formula_input.returnPressed.connect(self.return_pressed)
+
+        self.setWindowTitle("Spreadsheet")
+
+    def model(self) -> ColumnarSheetModel:
+        return self._model
+
+    def load(self, path: str) -> None:
+        self._model.load_csv(path)
+        self.setWindowTitle(f"Spreadsheet - {path}")
+
+    @Slot()
+    def open_csv(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(self, "Open CSV", "", "CSV files (*.csv)")
+        if path:
+            try:
+                self.load(path)
+            except (OSError, UnicodeDecodeError) as e:
+                QMessageBox.warning(self, "Spreadsheet", f"Cannot read {path}: {e}")
+
+    @Slot()
+    def save_csv(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV files (*.csv)")
+        if path:
+            try:
+                self._model.save_csv(path)
+            except OSError as e:
+                QMessageBox.warning(self, "Spreadsheet", f"Cannot write {path}: {e}")
+
+    @Slot(QModelIndex)
+    def update_line_edit(self, index: QModelIndex) -> None:
+        if not index.isValid():
+            self._cell_label.clear()
+            self._formula_input.clear()
+            return
+        self._cell_label.setText(f"Cell: ({column_name(index.column())}{index.row() + 1})")
+        value = index.data(Qt.ItemDataRole.EditRole)
+        self._formula_input.setText("" if value is None else str(value))
+
+    @Slot(QModelIndex, QModelIndex)
+    def update_current(self, top_left: QModelIndex, bottom_right: QModelIndex) -> None:
+        current = self._table.currentIndex()
+        if (current.isValid() and top_left.row() <= current.row() <= bottom_right.row()
+                and top_left.column() <= current.column() <= bottom_right.column()):
+            self.update_line_edit(current)
+
+    @Slot()
+    def return_pressed(self) -> None:
+        current = self._table.currentIndex()
+        if current.isValid():
+            self._model.setData(current, self._formula_input.text())
+
+    @Slot()
+    def action_sum(self) -> None:
+        """Show the sum of the selected cells, each range of the selection
+        being reduced by NumPy."""
+        ranges = self._table.selectionModel().selection()
+        total = sum((self._model.sum_range(r.top(), r.left(), r.bottom(), r.right())
+                     for r in ranges), 0.0)
+        names = ", ".join(f"{column_name(r.left())}{r.top() + 1}:"
+                          f"{column_name(r.right())}{r.bottom() + 1}" for r in ranges)
+        result = int(total) if total.is_integer() else total
+        self.statusBar().showMessage(f"Sum of {names or 'nothing'}: {result}")
+
+    @Slot()
+    def clear(self) -> None:
+        for index in self._table.selectionModel().selectedIndexes():
+            self._model.setData(index, "")
@@ -0,0 +1,100 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Recalculation benchmark of the spreadsheet.
+
+Fills a sheet of three columns: numbers in A, "sum" of the ten cells of A
+above and including the row in B, and the running total of B in C, each
+cell of C adding the one above it. Then it changes cells of A and prints
+the time from the change to the repaint of the view, and the number of
+cells recomputed."""
+
+import random
+import sys
+import time
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from PySide6.QtWidgets import QApplication
+
+from spreadsheet import SpreadSheetTable
+from spreadsheetitem import SpreadSheetItem
+
+
+SUM_WINDOW = 10
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def fill(table, rows):
+    """Fill the 3 columns of the sheet, return the time taken."""
+    start = time.perf_counter()
+    for row in range(rows):
+        first = max(1, row + 2 - SUM_WINDOW)
+        table.setItem(row, 0, SpreadSheetItem(str(row % 100)))
+        table.setItem(row, 1, SpreadSheetItem(f"sum A{first} A{row + 1}"))
+        total = f"+ C{row} B{row + 1}" if row else "= B1"
+        table.setItem(row, 2, SpreadSheetItem(total))
+    return time.perf_counter() - start
+
+
+def edit(table, row, value):
+    """Change the number of a cell of A and repaint the view, return the
+    time taken and the number of cells recomputed."""
+    engine = table.engine
+    recomputed = engine.recomputed
+    start = time.perf_counter()
+    table.item(row, 0).setText(str(value))
+    table.viewport().repaint()
+    return time.perf_counter() - start, engine.recomputed - recomputed
+
+
+def report(name, latencies, recomputed):
+    latencies = sorted(latencies)
+    print(f"{name:>8}: p50 {1000 * percentile(latencies, 50):8.2f} ms, "
+          f"p99 {1000 * percentile(latencies, 99):8.2f} ms, "
+          f"max {1000 * latencies[-1]:8.2f} ms, "
+          f"{sum(recomputed) / len(recomputed):9.0f} cells recomputed per edit", flush=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Recalculation benchmark of the spreadsheet",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--cells", type=int, default=100000,
+                        help="cells of the sheet (default 100000)")
+    parser.add_argument("--edits", "-e", type=int, default=50,
+                        help="edits of each kind (default 50)")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+    rows = max(1, options.cells // 3)
+    table = SpreadSheetTable(rows, 3)
+    print(f"{rows * 3} cells filled in {fill(table, rows):.2f} s")
+    table.resize(600, 800)
+    table.show()
+    table.scrollToBottom()
+    app.processEvents()
+
+    expected = sum(sum(r % 100 for r in range(max(0, row + 1 - SUM_WINDOW), row + 1))
+                   for row in range(rows))
+    if table.engine.value(rows - 1, 2) != expected:
+        print(f"Wrong total {table.engine.value(rows - 1, 2)}, expected {expected}",
+              file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(0)
+    # Changing the last rows recomputes a few cells, the first ones all of C
+    for name, choose_row in (("last", lambda: rows - 1 - rng.randrange(SUM_WINDOW)),
+                             ("random", lambda: rng.randrange(rows)),
+                             ("first", lambda: 0)):
+        latencies = []
+        recomputed = []
+        for i in range(options.edits):
+            elapsed, count = edit(table, choose_row(), rng.randrange(100))
+            latencies.append(elapsed)
+            recomputed.append(count)
+        report(name, latencies, recomputed)
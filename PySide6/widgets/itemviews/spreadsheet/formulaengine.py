@@ -0,0 +1,287 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Formula engine of the spreadsheet.
+
+The formulas ("sum A1 B4", "+ C2 E2", "= A1", ...) are parsed once into
+nodes. The engine caches the value of each cell and keeps the graph of
+the cells read by each formula, so that changing a cell recomputes only
+the formulas depending on it, in topological order."""
+
+import math
+from collections import defaultdict, deque
+from typing import Any, Callable
+
+CYCLE = "#CYCLE"
+
+Cell = tuple[int, int]
+
+
+def decode_pos(pos: str) -> tuple[int, int]:
+    if not pos:
+        col = -1
+        row = -1
+    else:
+        col = ord(pos[0].encode("latin1")) - ord('A')
+        try:
+            row = int(pos[1:]) - 1
+        except ValueError:
+            row = -1
+    return row, col
+
+
+def encode_pos(row: int, col: int) -> str:
+    return str(chr(col + ord('A'))) + str(row + 1)
+
+
+def parse_value(text: str) -> Any:
+    """Return the number written in text, or text itself. "nan", "inf" and
+    the numbers too large for a float are texts."""
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    return value if math.isfinite(value) else text
+
+
+def number(value: Any) -> int | float:
+    """Return the value of a cell read by an arithmetic operation."""
+    return value if isinstance(value, (int, float)) else 0
+
+
+def is_error(value: Any) -> bool:
+    return value == CYCLE
+
+
+class Literal:
+    """A text or a number which is not a formula."""
+
+    cells: tuple[Cell, ...] = ()
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._value = parse_value(text)
+
+    def evaluate(self, get: Callable[[Cell], Any]) -> Any:
+        return self._value
+
+
+class Copy:
+    """"= A1", the value of another cell."""
+
+    def __init__(self, text: str, cell: Cell) -> None:
+        self.text = text
+        self.cells = (cell,)
+
+    def evaluate(self, get: Callable[[Cell], Any]) -> Any:
+        return get(self.cells[0])
+
+
+class BinaryOperation:
+    """"+ A1 B1", "- A1 B1", "* A1 B1" or "/ A1 B1"."""
+
+    def __init__(self, text: str, op: str, first: Cell, second: Cell) -> None:
+        self.text = text
+        self.op = op
+        self.cells = (first, second)
+
+    def evaluate(self, get: Callable[[Cell], Any]) -> Any:
+        first = get(self.cells[0])
+        second = get(self.cells[1])
+        if is_error(first):
+            return first
+        if is_error(second):
+            return second
+        first = number(first)
+        second = number(second)
+        op = self.op
+        if op == "+":
+            return first + second
+        if op == "-":
+            return first - second
+        if op == "*":
+            return first * second
+        return "nan" if second == 0 else first / second
+
+
+class Sum:
+    """"sum A1 C4", the sum of the cells of a range, except the cell of the
+    formula itself."""
+
+    def __init__(self, text: str, first: Cell, last: Cell, owner: Cell) -> None:
+        self.text = text
+        rows = range(min(first[0], last[0]), max(first[0], last[0]) + 1)
+        cols = range(min(first[1], last[1]), max(first[1], last[1]) + 1)
+        self.cells = tuple((r, c) for r in rows for c in cols if (r, c) != owner)
+
+    def evaluate(self, get: Callable[[Cell], Any]) -> Any:
+        total = 0
+        for cell in self.cells:
+            value = get(cell)
+            if is_error(value):
+                return value
+            total += number(value)
+        return total
+
+
+def parse_formula(text: str, owner: Cell) -> Literal | Copy | BinaryOperation | Sum:
+    """Compile the formula of the cell owner, a text which is not a valid
+    formula is a literal."""
+    tokens = text.split(' ')
+    op = tokens[0].lower()
+    if op not in ("sum", "+", "-", "*", "/", "="):
+        return Literal(text)
+    cells = [decode_pos(token) for token in tokens[1:]]
+    if any(row < 0 or col < 0 for row, col in cells):
+        return Literal(text)
+    if op == "=" and len(cells) == 1:
+        return Copy(text, cells[0])
+    if len(cells) != 2:
+        return Literal(text)
+    if op == "sum":
+        return Sum(text, cells[0], cells[1], owner)
+    return BinaryOperation(text, op, cells[0], cells[1])
+
+
+class FormulaEngine:
+    """Values of the cells whose formulas are read by source(row, col).
+
+    A cell is compiled and evaluated the first time its value is asked for,
+    the cells it reads being evaluated before it. Each change of a formula
+    must be passed to set_formula(), which recomputes the cells depending
+    on it. A formula depending on itself evaluates to CYCLE, as do the
+    formulas depending on it."""
+
+    def __init__(self, source: Callable[[int, int], str]) -> None:
+        self._source = source
+        self._nodes = {}
+        self._values = {}
+        # cell -> the cells whose formulas read it
+        self._dependents = defaultdict(set)
+        self.recomputed = 0
+
+    def value(self, row: int, col: int) -> Any:
+        return self._get((row, col))
+
+    def formula(self, row: int, col: int) -> str:
+        return self._node((row, col)).text
+
+    def dependents(self, row: int, col: int) -> set[Cell]:
+        return set(self._dependents.get((row, col), ()))
+
+    def set_formula(self, row: int, col: int, text: str) -> list[Cell]:
+        """Change the formula of a cell and return the cells whose values
+        were recomputed, in the order of the computation."""
+        cell = (row, col)
+        node = self._nodes.get(cell)
+        if node is not None and node.text == text and cell in self._values:
+            return []
+        self._set_node(cell, parse_formula(text, cell))
+        affected = self._affected(cell)
+        for c in affected:
+            self._values.pop(c, None)
+        order = self._topological_order(affected)
+        get = self._get
+        for c in order:
+            self._values[c] = self._nodes[c].evaluate(get)
+        self.recomputed += len(order)
+        if len(order) < len(affected):
+            # The cells left belong to a cycle or depend on one
+            computed = set(order)
+            for c in affected:
+                if c not in computed:
+                    self._values[c] = CYCLE
+                    order.append(c)
+        return order
+
+    def _node(self, cell: Cell):
+        node = self._nodes.get(cell)
+        if node is None:
+            node = parse_formula(self._source(*cell), cell)
+            self._set_node(cell, node)
+        return node
+
+    def _set_node(self, cell: Cell, node) -> None:
+        old = self._nodes.get(cell)
+        if old is not None:
+            for precedent in old.cells:
+                dependents = self._dependents.get(precedent)
+                if dependents is not None:
+                    dependents.discard(cell)
+                    if not dependents:
+                        del self._dependents[precedent]
+        self._nodes[cell] = node
+        for precedent in node.cells:
+            self._dependents[precedent].add(cell)
+
+    def _get(self, cell: Cell) -> Any:
+        try:
+            return self._values[cell]
+        except KeyError:
+            self._evaluate(cell)
+            return self._values[cell]
+
+    def _evaluate(self, cell: Cell) -> None:
+        """Evaluate a cell and the cells it reads which have no value yet,
+        depth first without recursion since the chains can be long."""
+        values = self._values
+        stack = [cell]
+        # The cells being evaluated, all of them ancestors of the top one
+        path = set()
+        while stack:
+            c = stack[-1]
+            if c in values:
+                stack.pop()
+                continue
+            node = self._node(c)
+            if c in path:
+                path.discard(c)
+                stack.pop()
+                values[c] = node.evaluate(self._get)
+                self.recomputed += 1
+                continue
+            pending = [p for p in node.cells if p not in values]
+            # A formula reading its own cell is a cycle too
+            if any(p == c or p in path for p in pending):
+                values[c] = CYCLE
+                stack.pop()
+                continue
+            path.add(c)
+            stack.extend(pending)
+
+    def _affected(self, cell: Cell) -> list[Cell]:
+        """Return the cell and the cells depending on it, transitively."""
+        seen = {cell}
+        queue = deque([cell])
+        while queue:
+            for dependent in self._dependents.get(queue.popleft(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        return list(seen)
+
+    def _topological_order(self, cells: list[Cell]) -> list[Cell]:
+        """Order the cells so that each one comes after the cells it reads,
+        leaving out the cells of cycles and the cells depending on them."""
+        affected = set(cells)
+        indegree = dict.fromkeys(cells, 0)
+        for c in cells:
+            for dependent in self._dependents.get(c, ()):
+                if dependent in affected:
+                    indegree[dependent] += 1
+        queue = deque(c for c in cells if indegree[c] == 0)
+        order = []
+        while queue:
+            c = queue.popleft()
+            order.append(c)
+            for dependent in self._dependents.get(c, ()):
+                if dependent in affected:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        queue.append(dependent)
+        return order
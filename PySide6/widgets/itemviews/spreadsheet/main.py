@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import sys
+from argparse import ArgumentParser, RawTextHelpFormatter
 
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QApplication, QLayout
@@ -10,7 +11,24 @@ from PySide6.QtWidgets import QApplication, QLayout
 from spreadsheet import SpreadSheet
 
 if __name__ == "__main__":
-    app = QApplication()
+    parser = ArgumentParser(description="Spreadsheet example",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument("--csv", help="CSV file opened in a sheet stored by columns")
+    parser.add_argument("--columnar", action="store_true",
+                        help="show an empty sheet stored by columns")
+    options, args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + args)
+
+    if options.csv or options.columnar:
+        # The columnar sheet needs NumPy, the classic one does not
+        from columnarsheet import ColumnarSheet
+        sheet = ColumnarSheet(1000, 26)
+        if options.csv:
+            sheet.load(options.csv)
+        sheet.resize(800, 600)
+        sheet.show()
+        sys.exit(app.exec())
 
     sheet = SpreadSheet(10, 6)
     sheet.setWindowIcon(QPixmap(":/images/interview.png"))
@@ -9,12 +9,34 @@ from PySide6.QtWidgets import (QColorDialog, QComboBox, QDialog, QFontDialog,
                                QLineEdit, QMessageBox, QPushButton, QToolBar,
                                QTableWidgetItem, QTableWidget, QVBoxLayout, QWidget)
 
+from formulaengine import FormulaEngine
 from spreadsheetdelegate import SpreadSheetDelegate
 from spreadsheetitem import SpreadSheetItem
 
 from numbers import Number
 
 
+class SpreadSheetTable(QTableWidget):
+    """Table widget computing the values of its SpreadSheetItems with a
+    FormulaEngine, which is told of each change of an item."""
+
+    def __init__(self, rows: Number, cols: Number, parent: QWidget | None = None) -> None:
+        super().__init__(rows, cols, parent)
+        self.engine = FormulaEngine(self.formula_at)
+        self.itemChanged.connect(self.update_formula)
+
+    def formula_at(self, row: int, col: int) -> str:
+        item = self.item(row, col)
+        return item.formula() if isinstance(item, SpreadSheetItem) else ""
+
+    @Slot(QTableWidgetItem)
+    def update_formula(self, item: QTableWidgetItem) -> None:
+        row = self.row(item)
+        col = self.column(item)
+        if row >= 0 and col >= 0 and self.engine.set_formula(row, col, self.formula_at(row, col)):
+            self.viewport().update()
+
+
 class SpreadSheet(QMainWindow):
     def __init__(self, rows: Number, cols: Number, parent: QWidget | None = None) -> None:
         super().__init__(parent)
@@ -36,7 +58,7 @@ class SpreadSheet(QMainWindow):
         # self._print_action = QAction()
 
         self._cell_label = QLabel(self._tool_bar)
-        self._table = QTableWidget(rows, cols, self)
+        self._table = SpreadSheetTable(rows, cols, self)
         self._formula_input = QLineEdit(self)
 
         self.addToolBar(self._tool_bar)
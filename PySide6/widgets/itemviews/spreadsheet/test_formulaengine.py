@@ -0,0 +1,46 @@
+# Copyright (C) 2022 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR BSD-3-Clause
+from __future__ import annotations
+
+"""Tests of the cycles of the formula engine, run with
+python -m unittest test_formulaengine"""
+
+import unittest
+
+from formulaengine import CYCLE, FormulaEngine, decode_pos
+
+
+def engine(formulas):
+    """Return an engine reading formulas, a dict of position -> formula."""
+    cells = {decode_pos(pos): text for pos, text in formulas.items()}
+    return FormulaEngine(lambda row, col: cells.get((row, col), ""))
+
+
+class CycleTest(unittest.TestCase):
+
+    def test_lazy_self_reference(self):
+        self.assertIs(engine({"A1": "= A1"}).value(0, 0), CYCLE)
+
+    def test_lazy_binary_self_reference(self):
+        cells = engine({"A1": "+ A1 B1", "B1": "2"})
+        self.assertIs(cells.value(0, 0), CYCLE)
+        self.assertEqual(cells.value(0, 1), 2)
+
+    def test_lazy_cycle(self):
+        cells = engine({"A1": "= B1", "B1": "= A1", "C1": "= A1"})
+        self.assertIs(cells.value(0, 2), CYCLE)
+        self.assertIs(cells.value(0, 0), CYCLE)
+        self.assertIs(cells.value(0, 1), CYCLE)
+
+    def test_self_reference_set(self):
+        cells = engine({"A1": "1", "B1": "= A1"})
+        self.assertEqual(cells.value(0, 1), 1)
+        cells.set_formula(0, 0, "= A1")
+        self.assertIs(cells.value(0, 0), CYCLE)
+        self.assertIs(cells.value(0, 1), CYCLE)
+        cells.set_formula(0, 0, "3")
+        self.assertEqual(cells.value(0, 1), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,9 +5,13 @@
 
 ####################################################################################################
 
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Any
+from typing import Optional, Any, Iterable
+import argparse
 import sys
+import tempfile
+import time
 
 from PySide6.QtCore import QObject, QAbstractItemModel, QModelIndex, Qt, QUrl, Property, Slot
 from PySide6.QtGui import QGuiApplication
@@ -25,7 +29,12 @@ os.environ['QT_LOGGING_RULES'] = ';'.join((
 
 ####################################################################################################
 
+# Set to False to silence the tracing of the model calls, e.g. for a large tree
+DEBUG = True
+
 def dprint(*args):
+    if not DEBUG:
+        return
     parts = []
     for arg in args:
         match arg:
@@ -36,14 +45,25 @@ def dprint(*args):
 
 ####################################################################################################
 
+# Computed once, combining Qt enums is costly in the per index calls of the model
+DATA_ROLES = frozenset((Qt.DisplayRole, Qt.EditRole))
+ITEM_FLAGS = Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+####################################################################################################
+
 class TreeItem:
 
+    # A tree can hold millions of items, slots save the per instance dict
+    __slots__ = ('_data', '_parent', '_childs', '_row')
+
     ##############################################
 
     def __init__(self, data: list, parent: Optional['TreeItem'] = None) -> None:
         self._data = data
         self._parent = parent
         self._childs = []
+        # row of the item in its parent, maintained by the parent
+        self._row = 0
 
     ##############################################
 
@@ -109,28 +129,51 @@ class TreeItem:
 
     @property
     def child_index(self) -> int:
+        # O(1), unlike self._parent._childs.index(self) which is called for each parent() lookup
         if self._parent:
-            return self._parent._childs.index(self)
+            return self._row
         return 0
 
     ##############################################
 
+    def _renumber(self, position: int) -> None:
+        for row in range(position, len(self._childs)):
+            self._childs[row]._row = row
+
+    ##############################################
+
+    def append_child(self, item: 'TreeItem') -> None:
+        item._parent = self
+        item._row = len(self._childs)
+        self._childs.append(item)
+
+    ##############################################
+
+    def insert_childs(self, position: int, items: list['TreeItem']) -> bool:
+        """Insert the items in one splice, the following rows are renumbered once."""
+        if not 0 <= position <= len(self._childs):
+            return False
+        for item in items:
+            item._parent = self
+        self._childs[position:position] = items
+        self._renumber(position)
+        return True
+
+    ##############################################
+
     def insert_child(self, position: int, number_of_columns: int, count: int = 1) -> bool:
-        if 0 <= position <= len(self._childs):
-            for row in range(count):
-                data = [None] * number_of_columns
-                item = TreeItem(data, self)
-                self._childs.insert(position, item)
-            return True
-        return False
+        items = [TreeItem([None] * number_of_columns) for _ in range(count)]
+        return self.insert_childs(position, items)
 
     ##############################################
 
     def remove_child(self, position: int, count: int) -> bool:
         if position < 0 or position + count > len(self._childs):
             return False
-        for row in range(count):
-            self._childs.pop(position)
+        for item in self._childs[position:position + count]:
+            item._parent = None
+        del self._childs[position:position + count]
+        self._renumber(position)
         return True
 
     ##############################################
@@ -161,7 +204,8 @@ class TreeModel(QAbstractItemModel):
 
     ##############################################
 
-    def __init__(self, headers: list, data: str, parent: Optional[QObject] = None) -> None:
+    def __init__(self, headers: list, data: str | Iterable[str],
+                 parent: Optional[QObject] = None) -> None:
         super().__init__(parent)
         # Note: root item is not rendered by Qt
         self._root_data = headers   # Fixme: root_data is unused
@@ -227,7 +271,7 @@ class TreeModel(QAbstractItemModel):
         dprint('> data', index, role)
         if not index.isValid():
             return None
-        if role not in (Qt.DisplayRole, Qt.EditRole):
+        if role not in DATA_ROLES:
             return None
         item: TreeItem = self._get_item(index)
         return item.data(index.column())
@@ -266,7 +310,8 @@ class TreeModel(QAbstractItemModel):
         dprint('flags', index)
         if not index.isValid():
             return Qt.NoItemFlags
-        return Qt.ItemIsEditable | QAbstractItemModel.flags(self, index)
+        # QAbstractItemModel.flags() returns ItemIsSelectable | ItemIsEnabled for a valid index
+        return ITEM_FLAGS
 
     ##############################################
 
@@ -381,20 +426,44 @@ class TreeModel(QAbstractItemModel):
 
     ##############################################
 
-    def _setup_model_data(self, data: str, parent: TreeItem) -> None:
+    def insert_items(
+            self,
+            position: int,
+            items: list[TreeItem],
+            parent: QModelIndex = QModelIndex(),
+    ) -> bool:
+        """Insert already built items under parent with a single beginInsertRows."""
+        parent_item: TreeItem = self._get_item(parent)
+        if not items or not 0 <= position <= parent_item.number_of_childs:
+            return False
+        self.beginInsertRows(parent, position, position + len(items) - 1)
+        success: bool = parent_item.insert_childs(position, items)
+        self.endInsertRows()
+        return success
+
+    ##############################################
+
+    def _setup_model_data(self, data: str | Iterable[str], parent: TreeItem) -> None:
+        """Build the tree from the lines of data, a string or an iterable of lines like an open
+        file.
+
+        The lines are consumed one at a time, so that a file is streamed instead of being read at
+        once. The items are appended to the end of their parent.
+
+        """
+        if isinstance(data, str):
+            data = data.split('\n')
+        number_of_columns = self._root.number_of_columns
         parents = [parent]
         indentations = [0]
-        for line in data.split('\n'):
+        for line in data:
             line = line.rstrip()
             if line and '\t' in line:
                 # process line
-                position = 0
-                while position < len(line):
-                    if line[position] != ' ':
-                        break
-                    position += 1
-                _ = line[position:].split('\t')
-                column_data = [string for string in _ if string]
+                text = line.lstrip(' ')
+                position = len(line) - len(text)
+                column_data = [string for string in text.split('\t') if string][:number_of_columns]
+                column_data += [None] * (number_of_columns - len(column_data))
 
                 # handle indentation
                 if position > indentations[-1]:
@@ -407,14 +476,7 @@ class TreeModel(QAbstractItemModel):
                         indentations.pop()
 
                 # insert data
-                parent: TreeItem = parents[-1]
-                parent.insert_child(
-                    position=parent.number_of_childs,
-                    number_of_columns=self._root.number_of_columns,
-                )
-                for i, value in enumerate(column_data):
-                    child = parent.last_child
-                    child.set_data(i, value)
+                parents[-1].append_child(TreeItem(column_data))
 
     ##############################################
 
@@ -431,17 +493,260 @@ class TreeModel(QAbstractItemModel):
 
 ####################################################################################################
 
+class LazyTreeItem(TreeItem):
+
+    """Item of a LazyTreeModel, which knows where its childs are in the source file."""
+
+    __slots__ = ('_first', '_next', '_indentation', '_child_indentation', '_has_children')
+
+    ##############################################
+
+    def __init__(self, data: list, offset: int, indentation: int) -> None:
+        super().__init__(data)
+        # byte offset of the first line after the item, where its childs begin
+        self._first = offset
+        # byte offset where the next fetch resumes, None when all the childs are fetched
+        self._next = offset
+        self._indentation = indentation
+        self._child_indentation = None
+        self._has_children = False
+
+    ##############################################
+
+    @property
+    def can_fetch_more(self) -> bool:
+        return self._next is not None
+
+    ##############################################
+
+    def unload(self) -> None:
+        """Forget the childs, the next fetch rereads them from the source file."""
+        for child in self._childs:
+            child._parent = None
+        self._childs = []
+        self._next = self._first
+
+####################################################################################################
+
+class LazyTreeModel(TreeModel):
+
+    """Tree model reading its items on demand from an indented file.
+
+    An item records the byte offset of its childs in the file, so that fetchMore() parses only the
+    lines of the expanded item, by batches of batch_size childs. The lines of the deeper levels are
+    skipped without being decoded, a batch ends early once scan_limit bytes are read, so that the
+    time to open the file or expand an item doesn't depend on the size of the file.
+
+    The childs of collapsed items are unloaded, least recently collapsed first, when the number of
+    loaded items exceeds max_items. The view must report expansions and collapses using
+    item_expanded() and item_collapsed().
+
+    """
+
+    ##############################################
+
+    def __init__(
+            self,
+            headers: list,
+            path: Path,
+            batch_size: int = 1000,
+            max_items: int = 100_000,
+            scan_limit: int = 4 * 2**20,
+            parent: Optional[QObject] = None,
+    ) -> None:
+        QAbstractItemModel.__init__(self, parent)
+        self._root_data = headers
+        self._root = LazyTreeItem(self._root_data.copy(), offset=0, indentation=-1)
+        self._root._has_children = True
+        self._file = open(path, 'rb')
+        self._batch_size = batch_size
+        self._scan_limit = scan_limit
+        self._max_items = max_items
+        self._number_of_items = 0
+        self._expanded = set()
+        # collapsed items having loaded childs, least recently collapsed first
+        self._collapsed = OrderedDict()
+        self.fetchMore(QModelIndex())
+
+    ##############################################
+
+    @property
+    def number_of_items(self) -> int:
+        return self._number_of_items
+
+    ##############################################
+
+    def close(self) -> None:
+        self._file.close()
+
+    ##############################################
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.isValid() and parent.column() > 0:
+            return False
+        return self._get_item(parent)._has_children
+
+    ##############################################
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if parent.isValid() and parent.column() > 0:
+            return False
+        return self._get_item(parent).can_fetch_more
+
+    ##############################################
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        dprint('! fetchMore', parent)
+        parent_item: LazyTreeItem = self._get_item(parent)
+        if not parent_item.can_fetch_more:
+            return
+        last = parent_item.last_child
+        had_children = last is None or last._has_children
+        items = self._read_childs(parent_item)
+        if not had_children and last._has_children:
+            # the previous batch ended before the childs of its last item, the view caches
+            # hasChildren() and shows this item without an expand arrow until a relayout
+            self.layoutAboutToBeChanged.emit()
+            self.layoutChanged.emit()
+        if items:
+            position = parent_item.number_of_childs
+            self.beginInsertRows(parent, position, position + len(items) - 1)
+            for item in items:
+                parent_item.append_child(item)
+            self._number_of_items += len(items)
+            self.endInsertRows()
+        self._evict()
+
+    ##############################################
+
+    def _read_childs(self, parent_item: LazyTreeItem) -> list[LazyTreeItem]:
+        """Read the next batch of childs of parent_item and update the offset of the next batch."""
+        number_of_columns = self._root.number_of_columns
+        indentation = parent_item._indentation
+        child_indentation = parent_item._child_indentation
+        last = parent_item.last_child
+        items = []
+        offset = parent_item._next
+        self._file.seek(offset)
+        for line in self._file:
+            line_offset = offset
+            if items and line_offset - parent_item._next > self._scan_limit:
+                # large subtrees were skipped, don't delay the view further
+                parent_item._next = line_offset
+                return items
+            offset += len(line)
+            if b'\t' not in line or not line.strip():
+                continue
+            position = len(line) - len(line.lstrip(b' '))
+            if position <= indentation:
+                # end of the subtree of parent_item
+                parent_item._next = None
+                return items
+            if child_indentation is None:
+                child_indentation = parent_item._child_indentation = position
+            if position > child_indentation:
+                # deeper item, it belongs to the last child
+                if last is not None:
+                    last._has_children = True
+                continue
+            if len(items) == self._batch_size:
+                parent_item._next = line_offset
+                return items
+            text = line.decode('utf-8', 'replace').strip(' \r\n')
+            column_data = [string for string in text.split('\t') if string][:number_of_columns]
+            column_data += [None] * (number_of_columns - len(column_data))
+            last = LazyTreeItem(column_data, offset, position)
+            items.append(last)
+        parent_item._next = None
+        return items
+
+    ##############################################
+
+    def _index_of(self, item: TreeItem) -> QModelIndex:
+        if item is self._root:
+            return QModelIndex()
+        return self.createIndex(item.child_index, 0, item)
+
+    ##############################################
+
+    def _forget(self, item: TreeItem) -> int:
+        """Drop the bookkeeping of the loaded descendants of item, returns their number."""
+        count = 0
+        stack = list(item._childs)
+        while stack:
+            child = stack.pop()
+            self._expanded.discard(child)
+            self._collapsed.pop(child, None)
+            stack.extend(child._childs)
+            count += 1
+        return count
+
+    ##############################################
+
+    def _evict(self) -> None:
+        while self._number_of_items > self._max_items and self._collapsed:
+            item, _ = self._collapsed.popitem(last=False)
+            if item._parent is None or not item.number_of_childs:
+                continue
+            self.beginRemoveRows(self._index_of(item), 0, item.number_of_childs - 1)
+            self._number_of_items -= self._forget(item)
+            item.unload()
+            self.endRemoveRows()
+
+    ##############################################
+
+    @Slot(QModelIndex)
+    def item_expanded(self, index: QModelIndex) -> None:
+        item = self._get_item(index)
+        self._collapsed.pop(item, None)
+        self._expanded.add(item)
+
+    ##############################################
+
+    @Slot(QModelIndex)
+    def item_collapsed(self, index: QModelIndex) -> None:
+        item = self._get_item(index)
+        self._expanded.discard(item)
+        if item.number_of_childs:
+            self._collapsed[item] = None
+            self._evict()
+
+    ##############################################
+
+    @Slot()
+    def fetch_tail(self) -> None:
+        """Fetch the next batch of the last displayed rows, to be called when the view reaches its
+        end."""
+        # follow the last child of the expanded items to the last displayed row
+        path = [self._root]
+        while path[-1].last_child in self._expanded:
+            path.append(path[-1].last_child)
+        for item in reversed(path):
+            if item.can_fetch_more:
+                self.fetchMore(self._index_of(item))
+                return
+
+####################################################################################################
+
 class QmlApplication(QObject):
 
     ##############################################
 
-    def __init__(self) -> None:
+    def __init__(self, path: Optional[Path] = None, lazy: bool = False,
+                 max_items: int = 100_000) -> None:
         super().__init__()
-        path = Path(__file__).parent / 'default.txt'
+        if path is None:
+            path = Path(__file__).parent / 'default.txt'
         headers = ['Title', 'Description']
         # tree is encoded in title indentation
-        self._model = TreeModel(headers, path.read_text())
-        print(self._model)
+        self._lazy = lazy
+        if lazy:
+            self._model = LazyTreeModel(headers, path, max_items=max_items)
+        else:
+            with open(path, encoding='utf-8') as fh:
+                self._model = TreeModel(headers, fh)
+            if DEBUG:
+                print(self._model)
 
     ##############################################
 
@@ -451,6 +756,12 @@ class QmlApplication(QObject):
 
     ##############################################
 
+    @Property(bool, constant=True)
+    def lazy(self) -> bool:
+        return self._lazy
+
+    ##############################################
+
     # @Slot()
     # def insert_child(self) -> None:
     #     index: QModelIndex = 
@@ -510,13 +821,143 @@ class QmlApplication(QObject):
 
 ####################################################################################################
 
+def generate_tree(path: Path, number_of_lines: int, fanout: int = 1000) -> None:
+    """Write an indented file of number_of_lines items, root items have fanout childs and every
+    tenth child has a child.
+
+    """
+    with open(path, 'w', encoding='utf-8') as fh:
+        for i in range(number_of_lines):
+            k = i % (fanout + 1)
+            depth = 0 if k == 0 else 1 if k % 10 else 2
+            fh.write(f"{'    ' * depth}Item {i}\tDescription of item {i}\n")
+
+####################################################################################################
+
+def walk(model: TreeModel, parent: QModelIndex = QModelIndex()) -> int:
+    """Visit every item like a fully expanded view does, returns the number of visited rows."""
+    visited = 0
+    stack = [parent]
+    number_of_columns = model.columnCount()
+    while stack:
+        parent = stack.pop()
+        for row in range(model.rowCount(parent)):
+            for column in range(number_of_columns):
+                index = model.index(row, column, parent)
+                model.data(index, Qt.DisplayRole)
+                model.flags(index)
+                # a view maps each visible index back to its parent
+                model.parent(index)
+            index = model.index(row, 0, parent)
+            if model.rowCount(index):
+                stack.append(index)
+            visited += 1
+    return visited
+
+
+def benchmark(path: Optional[Path], number_of_lines: int, lazy: bool = False) -> None:
+    global DEBUG
+    DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp:
+        if path is None:
+            path = Path(tmp) / 'tree.txt'
+            start = time.perf_counter()
+            generate_tree(path, number_of_lines)
+            print(f'Generated {number_of_lines} lines in {time.perf_counter() - start:.2f} s')
+        if lazy:
+            benchmark_lazy(path)
+        else:
+            benchmark_eager(path)
+
+
+def benchmark_eager(path: Path) -> None:
+    start = time.perf_counter()
+    with open(path, encoding='utf-8') as fh:
+        model = TreeModel(['Title', 'Description'], fh)
+    load_time = time.perf_counter() - start
+    print(f'Loaded {path.name} in {load_time:.2f} s, peak RSS {peak_rss() / 2**20:.0f} MB')
+
+    start = time.perf_counter()
+    rows = walk(model)
+    walk_time = time.perf_counter() - start
+    print(f'Walked {rows} rows in {walk_time:.2f} s, {rows / walk_time:.0f} rows/s')
+
+    # remove then reinsert the first half of the largest root level in one step each
+    count = model.rowCount() // 2
+    items = [model._root.child(row) for row in range(count)]
+    start = time.perf_counter()
+    model.removeRows(0, count)
+    model.insert_items(0, items)
+    print(f'Removed and inserted {count} rows in {time.perf_counter() - start:.3f} s')
+
+
+def benchmark_lazy(path: Path, max_items: int = 100_000) -> None:
+    start = time.perf_counter()
+    model = LazyTreeModel(['Title', 'Description'], path, max_items=max_items)
+    print(f'Opened {path.name} in {time.perf_counter() - start:.3f} s, '
+          f'{model.number_of_items} items loaded, peak RSS {peak_rss() / 2**20:.0f} MB')
+
+    # expand, read and collapse the root items one after the other, like a user browsing the tree
+    expansions = 0
+    peak_items = 0
+    start = time.perf_counter()
+    row = 0
+    while row < model.rowCount() and expansions < 200:
+        index = model.index(row, 0)
+        if model.hasChildren(index):
+            while model.canFetchMore(index):
+                model.fetchMore(index)
+            model.item_expanded(index)
+            walk(model, index)
+            peak_items = max(peak_items, model.number_of_items)
+            model.item_collapsed(index)
+            expansions += 1
+        row += 1
+        if row == model.rowCount():
+            model.fetch_tail()
+    browse_time = time.perf_counter() - start
+    each = 1000 * browse_time / max(expansions, 1)
+    print(f'Expanded {expansions} items in {browse_time:.2f} s, {each:.1f} ms each, '
+          f'at most {peak_items} items loaded, peak RSS {peak_rss() / 2**20:.0f} MB')
+    model.close()
+
+
+def peak_rss() -> int:
+    try:
+        import resource
+    except ImportError:   # Windows
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+####################################################################################################
+
 if __name__ == '__main__':
-    app = QGuiApplication(sys.argv)
+    parser = argparse.ArgumentParser(description='Tree Model example')
+    parser.add_argument('file', nargs='?', type=Path,
+                        help='indented file to load, default.txt by default')
+    parser.add_argument('--benchmark', type=int, nargs='?', const=1_000_000, metavar='LINES',
+                        help='load the file, or a generated file of LINES lines '
+                        '(default 1000000), then walk the model like a view and exit')
+    parser.add_argument('--lazy', action='store_true',
+                        help='read the items from the file when they are expanded')
+    parser.add_argument('--max-items', type=int, default=100_000,
+                        help='number of loaded items above which the collapsed items are unloaded '
+                        'with --lazy (default 100000)')
+    parser.add_argument('--quiet', action='store_true', help='do not trace the model calls')
+    options, qt_args = parser.parse_known_args()
+
+    if options.benchmark is not None:
+        benchmark(options.file, options.benchmark, options.lazy)
+        sys.exit(0)
+    if options.quiet:
+        DEBUG = False
+
+    app = QGuiApplication(sys.argv[:1] + qt_args)
     view = QQuickView()
     context = view.rootContext()
     view.setResizeMode(QQuickView.SizeRootObjectToView)
 
-    qml_appplication = QmlApplication()
+    qml_appplication = QmlApplication(options.file, options.lazy, options.max_items)
     context.setContextProperty('application', qml_appplication)
 
     qml_filename = 'view.qml'
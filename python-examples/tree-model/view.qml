@@ -8,7 +8,9 @@ Item {
     height: 800
 
     Component.onCompleted: {
-        tree_view.expandRecursively()
+        // expanding everything would read the whole file
+        if (!application.lazy)
+            tree_view.expandRecursively()
     }
 
     // https://doc-snapshots.qt.io/qt6-dev/qml-qtquick-treeview.html
@@ -18,6 +20,21 @@ Item {
         anchors.margins: 20
         model: application.model
 
+        // a lazy model fetches the childs of the expanded items itself, it must know which items
+        // are collapsed to unload them, and the view asks for the next rows at the end
+        onExpanded: (row, depth) => {
+            if (application.lazy)
+                application.model.item_expanded(index(row, 0))
+        }
+        onCollapsed: (row, recursively) => {
+            if (application.lazy)
+                application.model.item_collapsed(index(row, 0))
+        }
+        onAtYEndChanged: {
+            if (application.lazy && atYEnd)
+                application.model.fetch_tail()
+        }
+
         delegate: Item {
             id: tree_delegate
 
@@ -7,15 +7,19 @@
 
 ####################################################################################################
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any
 import glob
+import hashlib
+import json
 import operator
 import os
 import pathlib
 # import tempfile
 import shutil
 import sys
+import time
 
 # import invoke
 from invoke import task, call, UnexpectedExit
@@ -284,6 +288,104 @@ def qml(ctx, qml_path):
 
 ####################################################################################################
 
+def _cmake_command(ctx, source_path: Path, build_path: Path, verbose: bool,
+                   compiler_launcher: str = None) -> str:
+    is_android = ctx.build.arch.startswith('android')
+    use_ninja = ctx.build.generator == 'ninja'
+
+    command = [
+        'cmake',
+        f'-S {source_path}',
+        f'-B {build_path}',
+
+        '-G Ninja' if use_ninja else '',
+        # -D CMAKE_GENERATOR:STRING=Ninja
+
+        f'-D CMAKE_BUILD_TYPE:STRING={ctx.build.build_type}',
+
+        f'-D CMAKE_C_FLAGS:STRING="{ctx.build.cflags}"',
+        f'-D CMAKE_CXX_FLAGS:STRING="{ctx.build.cflags}"',
+
+        # mandatory
+        f'-D CMAKE_PREFIX_PATH:PATH={ctx.build.qt_arch_path}',
+        # for cross-compiling
+        f'-D CMAKE_FIND_ROOT_PATH:PATH={ctx.build.qt_arch_path}',
+        f'-D QT_HOST_PATH:PATH={ctx.build.qt_host_path}',
+    ]
+
+    # -DCMAKE_PROJECT_INCLUDE_BEFORE:FILEPATH=/srv/qt/Qt/Tools/QtCreator/share/qtcreator/package-manager/auto-setup.cmake
+
+    if verbose:
+        # cf. main CMakeLists.txt
+        command.append("-D CMAKE_VERBOSE_MAKEFILE:BOOL=ON")
+
+    if is_android:
+        # https://cmake.org/cmake/help/latest/manual/cmake-toolchains.7.html#cross-compiling-for-android
+        # https://cmake.org/cmake/help/latest/manual/cmake-toolchains.7.html
+        ndk = Path(ctx.build.ndk)
+        sdk = Path(ctx.build.sdk)
+        toolchain_path = ndk / 'toolchains' / 'llvm' / 'prebuilt' / 'linux-x86_64' / 'bin'
+        cmake_toolchain_path = ndk / 'build' / 'cmake' / 'android.toolchain.cmake'
+        clang_path = toolchain_path / 'clang'
+        ABI_MAP = {
+            'android_armv7': 'armeabi-v7a',
+            'android_x86': 'x86',
+        }
+        abi = ABI_MAP[ctx.build.arch]
+        command += [
+            # This variable is specified on the command line when cross-compiling with
+            # CMake. It is the path to a file which is read early in the CMake run and which
+            # specifies locations for compilers and toolchain utilities, and other target
+            # platform and compiler related information.
+            # https://cmake.org/cmake/help/latest/variable/CMAKE_TOOLCHAIN_FILE.html
+            f'-D CMAKE_TOOLCHAIN_FILE:FILEPATH={cmake_toolchain_path}',
+
+            # Done
+            #   Must be specified to enable cross compiling for Android.
+            #   https://cmake.org/cmake/help/latest/variable/CMAKE_SYSTEM_NAME.html#variable:CMAKE_SYSTEM_NAME
+            #   '-DCMAKE_SYSTEM_NAME=Android',
+            #   Set to the Android API level
+            #   https://cmake.org/cmake/help/latest/variable/CMAKE_ANDROID_NDK.html#variable:CMAKE_ANDROID_NDK
+            #   f'-D CMAKE_ANDROID_NDK:PATH={ndk}',
+            #   https://cmake.org/cmake/help/latest/variable/CMAKE_SYSTEM_VERSION.html
+            #   '-DCMAKE_SYSTEM_VERSION=...',
+            #   https://cmake.org/cmake/help/latest/variable/CMAKE_ANDROID_ARCH_ABI.html
+            #   '-DCMAKE_ANDROID_ARCH_ABI=x86',
+
+            f'-D CMAKE_C_COMPILER:FILEPATH={clang_path}',
+            f'-D CMAKE_CXX_COMPILER:FILEPATH={clang_path}++',
+
+            f'-D ANDROID_NDK:PATH={ndk}',
+            f'-D ANDROID_SDK_ROOT:PATH={sdk}',
+            f'-D ANDROID_ABI:STRING={abi}',
+            '-D ANDROID_NATIVE_API_LEVEL:STRING=23',
+            '-D ANDROID_STL:STRING=c++_shared',
+
+           '-D QT_NO_GLOBAL_APK_TARGET_PART_OF_ALL:BOOL=ON',
+            f'-D QT_QMAKE_EXECUTABLE:FILEPATH={ctx.build.qmake_path}',
+        ]
+
+    command += [
+        # https://sarcasm.github.io/notes/dev/compilation-database.html#cmake
+        #     This will create a file name compile_commands.json in the build directory.
+        '-D CMAKE_EXPORT_COMPILE_COMMANDS:STRING=ON',
+    ]
+
+    command += [
+        '-D SANITIZE:STRING=OFF',
+        '-D INSTRUMENT_FUNTIONS:STRING=OFF',
+    ]
+
+    if compiler_launcher:
+        command += [
+            f'-D CMAKE_C_COMPILER_LAUNCHER:FILEPATH={compiler_launcher}',
+            f'-D CMAKE_CXX_COMPILER_LAUNCHER:FILEPATH={compiler_launcher}',
+        ]
+
+    return ' '.join(command)
+
+####################################################################################################
+
 @task(
     pre=[],
     optional=[],
@@ -301,7 +403,6 @@ def build(
     print_section_rule()
     _init_config(ctx, source)
     is_android = ctx.build.arch.startswith('android')
-    use_ninja = ctx.build.generator == 'ninja'
 
     env = {
         'LC_ALL': 'C',
@@ -339,91 +440,7 @@ def build(
 
         if cmake:
             # /etc/security/limits.d/00-user.conf
-
-            command = [
-                'cmake',
-                f'-S {ctx.build.source}',
-                f'-B {ctx.build.path}',
-
-                '-G Ninja' if use_ninja else '',
-                # -D CMAKE_GENERATOR:STRING=Ninja
-
-                f'-D CMAKE_BUILD_TYPE:STRING={ctx.build.build_type}',
-
-                f'-D CMAKE_C_FLAGS:STRING="{ctx.build.cflags}"',
-                f'-D CMAKE_CXX_FLAGS:STRING="{ctx.build.cflags}"',
-
-                # mandatory
-                f'-D CMAKE_PREFIX_PATH:PATH={ctx.build.qt_arch_path}',
-                # for cross-compiling
-                f'-D CMAKE_FIND_ROOT_PATH:PATH={ctx.build.qt_arch_path}',
-                f'-D QT_HOST_PATH:PATH={ctx.build.qt_host_path}',
-            ]
-
-            # -DCMAKE_PROJECT_INCLUDE_BEFORE:FILEPATH=/srv/qt/Qt/Tools/QtCreator/share/qtcreator/package-manager/auto-setup.cmake
-
-            if verbose:
-                # cf. main CMakeLists.txt
-                command.append("-D CMAKE_VERBOSE_MAKEFILE:BOOL=ON")
-
-            if is_android:
-                # https://cmake.org/cmake/help/latest/manual/cmake-toolchains.7.html#cross-compiling-for-android
-                # https://cmake.org/cmake/help/latest/manual/cmake-toolchains.7.html
-                ndk = Path(ctx.build.ndk)
-                sdk = Path(ctx.build.sdk)
-                toolchain_path = ndk / 'toolchains' / 'llvm' / 'prebuilt' / 'linux-x86_64' / 'bin'
-                cmake_toolchain_path = ndk / 'build' / 'cmake' / 'android.toolchain.cmake'
-                clang_path = toolchain_path / 'clang'
-                ABI_MAP = {
-                    'android_armv7': 'armeabi-v7a',
-                    'android_x86': 'x86',
-                }
-                abi = ABI_MAP[ctx.build.arch]
-                command += [
-                    # This variable is specified on the command line when cross-compiling with
-                    # CMake. It is the path to a file which is read early in the CMake run and which
-                    # specifies locations for compilers and toolchain utilities, and other target
-                    # platform and compiler related information.
-                    # https://cmake.org/cmake/help/latest/variable/CMAKE_TOOLCHAIN_FILE.html
-                    f'-D CMAKE_TOOLCHAIN_FILE:FILEPATH={cmake_toolchain_path}',
-
-                    # Done
-                    #   Must be specified to enable cross compiling for Android.
-                    #   https://cmake.org/cmake/help/latest/variable/CMAKE_SYSTEM_NAME.html#variable:CMAKE_SYSTEM_NAME
-                    #   '-DCMAKE_SYSTEM_NAME=Android',
-                    #   Set to the Android API level
-                    #   https://cmake.org/cmake/help/latest/variable/CMAKE_ANDROID_NDK.html#variable:CMAKE_ANDROID_NDK
-                    #   f'-D CMAKE_ANDROID_NDK:PATH={ndk}',
-                    #   https://cmake.org/cmake/help/latest/variable/CMAKE_SYSTEM_VERSION.html
-                    #   '-DCMAKE_SYSTEM_VERSION=...',
-                    #   https://cmake.org/cmake/help/latest/variable/CMAKE_ANDROID_ARCH_ABI.html
-                    #   '-DCMAKE_ANDROID_ARCH_ABI=x86',
-
-                    f'-D CMAKE_C_COMPILER:FILEPATH={clang_path}',
-                    f'-D CMAKE_CXX_COMPILER:FILEPATH={clang_path}++',
-
-                    f'-D ANDROID_NDK:PATH={ndk}',
-                    f'-D ANDROID_SDK_ROOT:PATH={sdk}',
-                    f'-D ANDROID_ABI:STRING={abi}',
-                    '-D ANDROID_NATIVE_API_LEVEL:STRING=23',
-                    '-D ANDROID_STL:STRING=c++_shared',
-
-                   '-D QT_NO_GLOBAL_APK_TARGET_PART_OF_ALL:BOOL=ON',
-                    f'-D QT_QMAKE_EXECUTABLE:FILEPATH={ctx.build.qmake_path}',
-                ]
-
-            command += [
-                # https://sarcasm.github.io/notes/dev/compilation-database.html#cmake
-                #     This will create a file name compile_commands.json in the build directory.
-                '-D CMAKE_EXPORT_COMPILE_COMMANDS:STRING=ON',
-            ]
-
-            command += [
-                '-D SANITIZE:STRING=OFF',
-                '-D INSTRUMENT_FUNTIONS:STRING=OFF',
-            ]
-
-            command = ' '.join(command)
+            command = _cmake_command(ctx, ctx.build.source, ctx.build.path, verbose)
             print_section_rule()
             print_section('Run CMake ...')
             print_section(command.replace(' -', os.linesep + '  -'))
@@ -477,6 +494,227 @@ def build(
 
 ####################################################################################################
 
+BATCH_STATE_FILENAME = '.batch-build.json'
+BATCH_REPORT_FILENAME = 'batch-build-report.json'
+
+def _find_projects(path: Path) -> list[Path]:
+    """Return the directories holding a top level CMakeLists.txt, subprojects are not returned."""
+    projects = []
+    for root, directories, filenames in os.walk(path):
+        if 'CMakeLists.txt' in filenames:
+            projects.append(Path(root))
+            directories.clear()
+        else:
+            directories[:] = sorted(_ for _ in directories if not _.startswith('.'))
+    return sorted(projects)
+
+def _source_digest(path: Path) -> str:
+    """Hash the content of the files of a project, independently of their modification time."""
+    digest = hashlib.sha256()
+    for root, directories, filenames in os.walk(path):
+        directories[:] = sorted(_ for _ in directories if not _.startswith('.'))
+        for filename in sorted(filenames):
+            file_path = Path(root) / filename
+            if filename == 'compile_commands.json' and file_path.is_symlink():
+                continue
+            digest.update(str(file_path.relative_to(path)).encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(file_path.read_bytes())
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+def _build_project(ctx, name: str, source_path: Path, build_path: Path, options: dict) -> dict:
+    """Configure and build a project, output goes to build.log.
+
+    Run by a worker thread of build_all.
+    """
+    env = {
+        'LC_ALL': 'C',
+    }
+    if options['ccache_dir']:
+        env['CCACHE_DIR'] = str(options['ccache_dir'])
+        env['CCACHE_BASEDIR'] = str(ROOT_PATH)
+
+    result = {
+        'project': name,
+        'status': 'built',
+        'configure': 0.,
+        'build': 0.,
+    }
+    start = time.monotonic()
+
+    if options['wipe'] and build_path.exists():
+        shutil.rmtree(build_path)
+    build_path.mkdir(parents=True, exist_ok=True)
+
+    state_path = build_path / BATCH_STATE_FILENAME
+    cmake_command = options['cmake_command'](source_path, build_path)
+    state = {
+        'configure': hashlib.sha256(cmake_command.encode('utf-8')).hexdigest(),
+        'sources': _source_digest(source_path),
+    }
+    try:
+        previous = json.loads(state_path.read_text())
+    except (OSError, ValueError):
+        previous = {}
+    has_cache = (build_path / 'CMakeCache.txt').exists()
+    if has_cache and previous == state and not options['force']:
+        result['status'] = 'skipped'
+        return result
+    # a successful build must be recorded again
+    state_path.unlink(missing_ok=True)
+
+    with open(build_path / 'build.log', 'w') as log:
+        def run(command: str) -> bool:
+            log.write(f'$ {command}\n')
+            log.flush()
+            _ = ctx.run(command, env=env, hide=True, warn=True, in_stream=False,
+                        out_stream=log, err_stream=log)
+            return _.ok
+
+        # CMake reconfigures by itself when a CMakeLists.txt changes
+        if not has_cache or previous.get('configure') != state['configure']:
+            ok = run(cmake_command)
+            result['configure'] = time.monotonic() - start
+            if not ok:
+                result['status'] = 'configure failed'
+                return result
+
+        start_build = time.monotonic()
+        ok = run(f"cmake --build {build_path} --parallel {options['parallel']}")
+        result['build'] = time.monotonic() - start_build
+        if not ok:
+            result['status'] = 'build failed'
+            return result
+
+    state_path.write_text(json.dumps(state))
+    return result
+
+@task(
+    help={
+        'path': 'directory where to look for CMake projects, c++-examples by default',
+        'jobs': 'number of projects built concurrently, 0 for the number of CPUs',
+        'wipe': 'remove the build directories before building',
+        'force': 'build the projects even when nothing has changed',
+        'ccache': 'use ccache with a compiler cache shared by the projects, if it is installed',
+        'verbose': 'pass CMAKE_VERBOSE_MAKEFILE to CMake to print the build commands',
+    },
+)
+def build_all(
+        ctx,
+        path='c++-examples',
+        jobs=0,
+        wipe=False,
+        force=False,
+        ccache=True,
+        verbose=False,
+):
+    """Configure and build all the CMake projects found in a directory concurrently.
+
+    The projects whose sources and CMake options didn't change since their last successful build are
+    skipped. The per project timings are written to the batch-build-report.json file in the build
+    directory, and the output of each project to the build.log file in its build directory.
+
+    """
+    print_section_rule()
+    _init_config(ctx)
+    path = ROOT_PATH / path
+    projects = _find_projects(path)
+    if not projects:
+        print_error(f'No CMake project found in {path}')
+        return
+
+    number_of_cpus = os.cpu_count() or 1
+    jobs = int(jobs) or number_of_cpus
+    jobs = max(1, min(jobs, len(projects)))
+
+    ccache_dir = None
+    compiler_launcher = None
+    if ccache:
+        compiler_launcher = shutil.which('ccache')
+        if compiler_launcher:
+            if hasattr(ctx.build, 'ccache_dir'):
+                ccache_dir = Path(ctx.build.ccache_dir)
+            else:
+                ccache_dir = ctx.build.path / 'ccache'
+            ccache_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            print_error('ccache not found, the compiler outputs are not cached')
+
+    options = {
+        'cmake_command': lambda source_path, build_path: _cmake_command(
+            ctx, source_path, build_path, verbose, compiler_launcher),
+        # share the CPUs between the concurrent builds
+        'parallel': max(1, number_of_cpus // jobs),
+        'ccache_dir': ccache_dir,
+        'wipe': wipe,
+        'force': force,
+    }
+
+    ctx.build.path.mkdir(parents=True, exist_ok=True)
+    print_info(f'Projects: {len(projects)} in {path}')
+    print_info(f'Build path: {ctx.build.path}')
+    print_info(f'Jobs: {jobs} x {options["parallel"]} CPUs')
+    if ccache_dir:
+        print_info(f'Compiler cache: {ccache_dir}')
+
+    start = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for source_path in projects:
+            name = str(source_path.relative_to(path))
+            future = executor.submit(_build_project, ctx, name, source_path,
+                                     ctx.build.path / name, options)
+            futures[future] = name
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exception:
+                result = {
+                    'project': futures[future],
+                    'status': f'error: {exception}',
+                    'configure': 0.,
+                    'build': 0.,
+                }
+            result['total'] = result['configure'] + result['build']
+            results.append(result)
+            message = f"{result['status']:>16}  {result['project']}  {result['total']:.1f} s"
+            if result['status'] in ('built', 'skipped'):
+                print_info(message)
+            else:
+                print_error(message)
+    elapsed = time.monotonic() - start
+
+    # slowest first
+    results.sort(key=lambda _: _['total'], reverse=True)
+    print_section_rule()
+    print_section(f"{'Project':<40} {'Status':>16} {'Configure':>10} {'Build':>10} {'Total':>10}")
+    for _ in results:
+        print(f"{_['project']:<40} {_['status']:>16} "
+              f"{_['configure']:>9.1f}s {_['build']:>9.1f}s {_['total']:>9.1f}s")
+    print_section_rule()
+    failed = [_ for _ in results if _['status'] not in ('built', 'skipped')]
+    summary = f'{len(results)} projects in {elapsed:.1f} s, {len(failed)} failed'
+    if failed:
+        print_error(summary)
+    else:
+        print_info(summary)
+
+    report = {
+        'path': str(path),
+        'jobs': jobs,
+        'elapsed': elapsed,
+        'projects': results,
+    }
+    report_path = ctx.build.path / BATCH_REPORT_FILENAME
+    report_path.write_text(json.dumps(report, indent=2))
+    print_info(f'Report: {report_path}')
+    if failed:
+        sys.exit(1)
+
+####################################################################################################
+
 @task(
     # pre=[call(build, cmake=False)]
 )